@@ -0,0 +1,175 @@
+"""Benchmark headless de la capa de datos y del Dashboard.
+
+    python -m benchmarks.bench --sizes 1000 10000 100000 1000000 --backend csv --ops 100
+
+Cada tamaño corre en un proceso nuevo (pico de RSS aislado) sobre un user_data/
+temporal con un journal sintético (benchmarks.synth). No necesita Streamlit:
+render_cal_html solo se mide si streamlit está instalado.
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+USER, ACC, BALANCE = "bench", "Cuenta Bench", 100000.0
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+def peak_rss_mb():
+    if resource is None: return None
+    kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return kb / (1024 * 1024) if sys.platform == "darwin" else kb / 1024
+
+def _timed(fn, n):
+    lat = []
+    for i in range(n):
+        t = time.perf_counter(); fn(i); lat.append(time.perf_counter() - t)
+    lat = np.array(lat)
+    return {"n": n, "ops_s": n / lat.sum() if lat.sum() else float("inf"),
+            "p50_ms": float(np.percentile(lat, 50) * 1e3), "p99_ms": float(np.percentile(lat, 99) * 1e3)}
+
+def run_size(size, backend, ops, seed):
+    """Genera la cuenta con size trades y mide cada ruta. Se ejecuta en su propio proceso."""
+    tmp = tempfile.mkdtemp(prefix="trading_bench_")
+    os.chdir(tmp)
+    os.environ["TRADING_BACKEND"] = backend
+    if ROOT not in sys.path: sys.path.insert(0, ROOT)
+    from modules import data, db, aggregates, analytics, equity, rollups, sessions, search, journal
+    from benchmarks.synth import make_journal, new_trade
+
+    try:
+        rng = np.random.default_rng(seed)
+        t = time.perf_counter()
+        df = make_journal(size, seed=seed)
+        gen_s = time.perf_counter() - t
+
+        data.init_filesystem()
+        if data._sql():
+            db.import_files(data._sql(), {USER: "bench"}, {USER: {ACC: BALANCE}}, lambda u, a: df)
+        else:
+            data._users.set((USER,), "bench"); data._accounts.set((USER, ACC), BALANCE)
+            os.makedirs(os.path.join(data.DATA_DIR, USER), exist_ok=True)
+            journal.write_snapshot(data._trade_file(USER, ACC), df)
+        ids = df["ID"].to_numpy()
+        del df
+
+        res = {}
+        def cold_load(i):
+            data._frames.clear(); data.get_balance_data(USER, ACC)
+        res["get_balance_data (frío)"] = _timed(cold_load, max(3, min(ops, 20)))
+        res["get_balance_data (caché)"] = _timed(lambda i: data.get_balance_data(USER, ACC), ops)
+
+        _, _, view = data.get_balance_data(USER, ACC)
+        res["stats dashboard (rebuild)"] = _timed(lambda i: aggregates.rebuild(view), max(3, min(ops, 20)))
+        res["stats dashboard (analytics)"] = _timed(lambda i: analytics.compute_stats(view), max(3, min(ops, 20)))
+        res["stats dashboard (memo)"] = _timed(lambda i: data.get_dashboard_stats(USER, ACC), ops)
+        data.get_account_stats(USER, ACC)
+        res["stats dashboard (registro)"] = _timed(lambda i: data.get_account_stats(USER, ACC), ops)
+
+        res["equity (construcción)"] = _timed(lambda i: equity.EquityCurve.from_frame(view, BALANCE), max(3, min(ops, 20)))
+        curve = data.get_equity_curve(USER, ACC)
+        res["equity (plot LTTB)"] = _timed(lambda i: curve.plot_frame(), max(3, min(ops, 20)))
+        res["rollups (construcción)"] = _timed(lambda i: rollups.RollupIndex.from_frame(view), max(3, min(ops, 20)))
+        from modules import instruments
+        syms = view["Par"].astype(str).to_numpy(); px = rng.uniform(1.0, 2.0, len(syms))
+        res["lotaje (todas las filas)"] = _timed(lambda i: instruments.size_positions(syms, px, px * 0.99, 1.0, BALANCE), max(3, min(ops, 20)))
+        res["sesiones (etiquetado + PnL)"] = _timed(lambda i: sessions.breakdown(view), max(3, min(ops, 20)))
+        data.get_session_stats(USER, ACC)
+        res["sesiones (memo)"] = _timed(lambda i: data.get_session_stats(USER, ACC), ops)
+        res["historial índice (construcción)"] = _timed(lambda i: search.SearchIndex.from_frame(view), max(3, min(ops, 20)))
+        res["historial par"] = _timed(lambda i: view.iloc[data.query_trades(USER, ACC, "JPY")[:100]], ops)
+        res["historial par+resultado"] = _timed(lambda i: view.iloc[data.query_trades(USER, ACC, "USD", ["WIN", "LOSS"])[:100]], ops)
+        res["historial rango fechas"] = _timed(lambda i: view.iloc[data.query_trades(USER, ACC, date_from="2016-01-01", date_to="2016-12-31")[:100]], ops)
+        from modules import ohlc
+        from benchmarks.synth import make_bars
+        store, bars = ohlc.OHLCStore(os.path.join(tmp, "ohlc")), make_bars("EURUSD")   # ~10 años de 1H
+        res["ohlc ingesta 10 años 1H"] = _timed(lambda i: (store.ingest("EURUSD", "1H", bars[:len(bars) // 2]), store.ingest("EURUSD", "1H", bars)), 3)
+        res["ohlc rango 1 mes (memmap)"] = _timed(lambda i: store.range("EURUSD", "1H", "2020-03-01", "2020-04-01"), ops)
+        res["ohlc apertura en frío"] = _timed(lambda i: ohlc.OHLCStore(store.root).range("EURUSD", "1H", "2020-03-01", "2020-04-01"), ops)
+        from modules import excursion
+        res["MAE/MFE (trades EURUSD)"] = _timed(lambda i: excursion.excursions(view, store), max(3, min(ops, 10)))
+        from modules import backtest
+        res["backtest Swing (EURUSD 10 años)"] = _timed(lambda i: backtest.run_symbol("EURUSD", "Swing", root=store.root), 3)
+        from modules.scanner import IndicatorCache
+        cache = IndicatorCache(store)
+        res["indicadores (frío, W-D-4H)"] = _timed(lambda i: IndicatorCache(store).prefill("Swing", "EURUSD"), 3)
+        cache.prefill("Swing", "EURUSD")
+        res["checklist prefill (caché)"] = _timed(lambda i: cache.prefill("Swing", "EURUSD"), ops)
+        def new_bar(i):
+            b = store.bars("EURUSD", "1H")[-1:].copy(); b["t"] += 3_600
+            store.ingest("EURUSD", "1H", b); cache.prefill("Swing", "EURUSD")
+        res["indicadores (vela nueva, incremental)"] = _timed(new_bar, max(3, min(ops, 20)))
+        t = time.perf_counter(); data.get_text_index(USER, ACC)
+        res["notas índice (construcción)"] = {"n": 1, "ops_s": None, "p50_ms": (time.perf_counter() - t) * 1e3, "p99_ms": None}
+        res["notas búsqueda"] = _timed(lambda i: data.search_notes(USER, ACC, "envolvente AOI GBPJPY LOSS"), ops)
+
+        try:
+            import streamlit.logger
+            streamlit.logger.set_log_level("error")  # avisos de "bare mode" de st.session_state
+            from modules.utils import render_cal_html
+            roll = data.get_rollups(USER, ACC)
+            res["render_cal_html"] = _timed(lambda i: render_cal_html(roll, True), ops)
+            from modules.utils import render_year_heatmap, render_weekday_bars
+            years = tuple(roll.active_years()[-3:])
+            res["heatmap 3 años (figura)"] = _timed(lambda i: render_year_heatmap(roll, years, True), max(3, min(ops, 10)))
+            res["barras día semana (figura)"] = _timed(lambda i: render_weekday_bars(roll, True), max(3, min(ops, 10)))
+        except ImportError:
+            pass
+        del view
+
+        res["save_trade (alta)"] = _timed(lambda i: data.save_trade(USER, ACC, new_trade(rng, i)), ops)
+        upd = rng.choice(ids, ops, replace=False) if ops <= len(ids) else ids
+        res["save_trade (update)"] = _timed(
+            lambda i: data.save_trade(USER, ACC, {"Status": "CLOSED", "Resultado": "WIN", "Dinero": 150.0}, trade_id=upd[i]), len(upd))
+        dels = rng.choice(ids, min(ops, len(ids)), replace=False)
+        res["delete_trade"] = _timed(lambda i: data.delete_trade(USER, ACC, dels[i]), len(dels))
+
+        data._frames.clear()
+        t = time.perf_counter(); data.get_balance_data(USER, ACC)
+        res["get_balance_data (tras escrituras)"] = {"n": 1, "ops_s": None, "p50_ms": (time.perf_counter() - t) * 1e3, "p99_ms": None}
+        return {"size": size, "backend": backend, "gen_s": gen_s, "peak_rss_mb": peak_rss_mb(), "ops": res}
+    finally:
+        os.chdir(ROOT)
+        if data._sql(): data._sql().close()
+        shutil.rmtree(tmp, ignore_errors=True)
+
+def _fmt(v, spec):
+    return "-" if v is None else format(v, spec)
+
+def report(r):
+    print(f"\n== {r['size']:,} trades · backend={r['backend']} · generación {r['gen_s']:.1f}s · pico RSS {_fmt(r['peak_rss_mb'], '.0f')} MB")
+    print(f"{'operación':<36}{'n':>6}{'ops/s':>12}{'p50 ms':>11}{'p99 ms':>11}")
+    for name, m in r["ops"].items():
+        print(f"{name:<36}{m['n']:>6}{_fmt(m['ops_s'], ',.1f'):>12}{_fmt(m['p50_ms'], '.3f'):>11}{_fmt(m['p99_ms'], '.3f'):>11}")
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000, 1000000])
+    ap.add_argument("--backend", choices=["csv", "sqlite"], default="csv")
+    ap.add_argument("--ops", type=int, default=100, help="repeticiones por operación")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--json", help="guarda los resultados en este fichero (para comparar entre versiones)")
+    args = ap.parse_args(argv)
+
+    results = []
+    for size in args.sizes:
+        # Proceso nuevo por tamaño: el pico de RSS no arrastra el del tamaño anterior
+        with ProcessPoolExecutor(max_workers=1, mp_context=mp.get_context("spawn")) as ex:
+            r = ex.submit(run_size, size, args.backend, args.ops, args.seed).result()
+        report(r); results.append(r)
+    if args.json:
+        with open(args.json, "w") as f: json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+import numpy as np
+import pandas as pd
+from modules.data import OFFICIAL_PAIRS
+from modules.schema import TRADE_COLS
+
+# --- GENERADOR DE JOURNALS SINTÉTICOS ---
+# Trades con la forma de los que guarda modal_new_trade / modal_update_trade:
+# majors más frecuentes, ~85% cerrados, WR ~45% con R:R ~2, confluencia en
+# múltiplos de 5 y Notas con la línea Entry/SL/TP + plan + análisis IA.
+_BASE_PRICE = {"JPY": 150.0, "XAU": 2000.0, "XAG": 25.0, "XPT": 950.0, "XPD": 1000.0, "WTI": 75.0, "BCO": 80.0,
+               "US30": 38000.0, "NAS100": 17000.0, "SPX500": 5000.0, "GER30": 17500.0, "UK100": 7600.0, "JPN225": 38000.0,
+               "BTC": 60000.0, "ETH": 3000.0, "LTC": 80.0}
+_PLANS = ["Rechazo en AOI semanal con envolvente en 4H.", "Triple alineación W-D-4H, SOS claro.",
+          "Retesteo de estructura previa + EMA 50.", "Nivel psicológico redondo, patrón de vela de rechazo."]
+_IA = ["🎯 SINCRONÍA: PERFECTA\n📊 PROBABILIDAD: 80%\n📝 ANÁLISIS: Tendencia alineada, AOI respetado.",
+       "🎯 SINCRONÍA: DUDOSA\n📊 PROBABILIDAD: 55%\n📝 ANÁLISIS: 4H contra tendencia diaria.",
+       ""]
+
+def _base(pair):
+    for k, v in _BASE_PRICE.items():
+        if k in pair: return v
+    return 1.1
+
+def make_journal(n, seed=0, start="2015-01-05", open_frac=0.15, win_rate=0.45):
+    """DataFrame de n trades con las columnas de TRADE_COLS, ordenados por fecha."""
+    rng = np.random.default_rng(seed)
+    # Majors 4x más probables que el resto
+    w = np.array([4.0 if i < 7 else 1.0 for i in range(len(OFFICIAL_PAIRS))]); w /= w.sum()
+    pairs = np.array(OFFICIAL_PAIRS)[rng.choice(len(OFFICIAL_PAIRS), n, p=w)]
+    span = max(n // 3, 30)
+    # Hora de entrada en UTC a lo largo del día (la sesión sale de ella)
+    fechas = pd.bdate_range(start, periods=span)[np.sort(rng.integers(0, span, n))] + pd.to_timedelta(rng.integers(1, 86_400, n), unit="s")
+
+    closed = rng.random(n) >= open_frac
+    u = rng.random(n)
+    res = np.where(u < win_rate, "WIN", np.where(u < win_rate + 0.1, "BE", "LOSS"))
+    risk = np.round(100 * rng.lognormal(0, 0.35, n), 2)
+    ratio = np.round(rng.uniform(1.5, 3.5, n), 2)
+    dinero = np.where(res == "WIN", risk * ratio, np.where(res == "LOSS", -risk, 0.0))
+    conf = np.clip(np.round((rng.normal(70, 12, n) + np.where(res == "WIN", 5, 0)) / 5) * 5, 20, 100)
+
+    base = np.array([_base(p) for p in pairs]) * rng.uniform(0.9, 1.1, n)
+    sl_dist = base * rng.uniform(0.002, 0.01, n)
+    long = rng.random(n) < 0.5
+    sl = np.where(long, base - sl_dist, base + sl_dist); tp = np.where(long, base + sl_dist * ratio, base - sl_dist * ratio)
+    plans, ias = rng.integers(0, len(_PLANS), n), rng.integers(0, len(_IA), n)
+    notas = [f"Entry: {e:.5f} | SL: {s:.5f} | TP: {t:.5f}\n{_PLANS[p]}" + (f"\n\n[IA]: {_IA[a]}" if _IA[a] else "")
+             for e, s, t, p, a in zip(base, sl, tp, plans, ias)]
+
+    df = pd.DataFrame({
+        "ID": [f"{i:015x}" for i in range(n)],
+        "Fecha": fechas.strftime("%Y-%m-%d %H:%M:%S"),
+        "Par": pairs,
+        "Direccion": np.where(long, "LONG 🟢", "SHORT 🔴"),
+        "Status": np.where(closed, "CLOSED", "OPEN"),
+        "Resultado": np.where(closed, res, "PENDING"),
+        "Dinero": np.where(closed, dinero, 0.0),
+        "Ratio": np.where(closed, ratio, 0.0),
+        "Notas": notas,
+        "Img_Antes": None, "Img_Despues": None,
+        "Confluencia": conf,
+        "Modo": np.where(rng.random(n) < 0.7, "Swing", "Scalping"),
+        "Entry": base, "SL": sl, "TP": tp,
+    })
+    return df[TRADE_COLS]
+
+def make_bars(pair, start="2015-01-05", end="2025-01-01", tf="1H", seed=0):
+    """Velas sintéticas (array ohlc.BAR) de pair en [start, end): paseo aleatorio
+    log-normal alrededor del precio base, sin fines de semana."""
+    from modules import ohlc
+    rng = np.random.default_rng(seed)
+    step = ohlc.TIMEFRAMES[tf]
+    t = np.arange(ohlc._secs(start), ohlc._secs(end), step, dtype=np.int64)
+    t = t[(t // 86_400 + 3) % 7 < 5] if step < 86_400 else t   # 1970-01-01 fue jueves: lunes..viernes
+    vol = 0.0015 * np.sqrt(step / 3_600)
+    close = _base(pair) * np.exp(np.cumsum(rng.normal(0, vol, len(t))))
+    open_ = np.concatenate(([close[0]], close[:-1]))
+    wick = np.abs(rng.normal(0, vol / 2, (2, len(t)))) * close
+    bars = np.empty(len(t), ohlc.BAR)
+    bars["t"], bars["open"], bars["close"] = t, open_, close
+    bars["high"] = np.maximum(open_, close) + wick[0]; bars["low"] = np.minimum(open_, close) - wick[1]
+    bars["volume"] = rng.integers(100, 5000, len(t))
+    return bars
+
+def new_trade(rng, i=0):
+    """Fila nueva como la que guarda modal_new_trade."""
+    par = OFFICIAL_PAIRS[int(rng.integers(0, len(OFFICIAL_PAIRS)))]
+    return {"Fecha": "2030-01-01 13:30:00", "Par": par, "Direccion": "LONG 🟢", "Status": "OPEN", "Resultado": "PENDING",
+            "Dinero": 0.0, "Ratio": 0.0, "Notas": f"Entry: 1.08 | SL: 1.07 | TP: 1.10\nbench {i}",
+            "Img_Antes": None, "Img_Despues": None, "Confluencia": 75, "Modo": "Swing",
+            "Entry": 1.08, "SL": 1.07, "TP": 1.10}
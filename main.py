@@ -4,11 +4,13 @@ from datetime import datetime
 from modules.styles import inject_theme
 from modules.data import (
     init_filesystem, verify_user, register_user, get_user_accounts, 
-    get_balance_data, OFFICIAL_PAIRS
+    get_balance_data, query_trades, get_account_stats, get_dashboard_stats, get_equity_curve, get_rollups, trades_version, simulate_account, get_edge, get_session_stats, search_notes, search_brain, get_portfolio, get_excursions, get_recent_trades, OFFICIAL_PAIRS
 )
 from modules.ui import modal_new_trade, modal_update_trade, modal_user_settings
-from modules.utils import get_live_clock_html, render_cal_html
+from modules.utils import get_live_clock_html, render_cal_html, render_equity_fig, render_year_heatmap, render_weekday_bars, cached_fragment
 from modules.ai import init_ai, chat_with_mentor
+from modules import ohlc, backtest
+from modules.scanner import scanner
 import streamlit.components.v1 as components
 
 # 1. CONFIG
@@ -51,9 +53,10 @@ def main_app():
         accs = get_user_accounts(user)
         sel_acc = st.selectbox("Cuenta Seleccionada", accs)
         ini, act, df = get_balance_data(user, sel_acc)
+        stats = get_account_stats(user, sel_acc)
         
         # --- RECTÁNGULO DE PNL TOTAL (FINALMENTE CORREGIDO) ---
-        pnl_total = act - ini
+        pnl_total = stats['net_pnl']; act = ini + pnl_total
         color_pnl = "#10b981" if pnl_total >= 0 else "#ef4444"
         pnl_bg = color_pnl + '10'
         pnl_sign = '+' if pnl_total > 0 else ''
@@ -83,11 +86,22 @@ def main_app():
 
     # 1. PESTAÑA OPERATIVA
     with tab_op:
+        # Checklist prellenado con la caché de indicadores (velas locales) al cambiar de par o de modo
+        def prefill_checklist():
+            if st.session_state.get("auto_fill", True):
+                st.session_state.update(scanner.prefill(st.session_state.get("mode_op", "Swing").split()[0], st.session_state["sb_pair_main"]))
         c_mod = st.columns([1,2,1])
         with c_mod[1]: 
-            global_mode = st.radio("", ["Swing (W-D-4H)", "Scalping (4H-2H-1H)"], horizontal=True, key="mode_op", label_visibility="collapsed")
+            global_mode = st.radio("", ["Swing (W-D-4H)", "Scalping (4H-2H-1H)"], horizontal=True, key="mode_op", label_visibility="collapsed", on_change=prefill_checklist)
         
-        st.session_state.pair_selector = st.selectbox("ACTIVO", OFFICIAL_PAIRS, key="sb_pair_main")
+        if "sb_pair_main" not in st.session_state:   # primera carga: el par por defecto también se prellena
+            st.session_state["sb_pair_main"] = OFFICIAL_PAIRS[0]; prefill_checklist()
+        st.session_state.pair_selector = st.selectbox("ACTIVO", OFFICIAL_PAIRS, key="sb_pair_main", on_change=prefill_checklist)
+        pf_snap = scanner.snapshot(st.session_state.pair_selector, "4H" if "Swing" in global_mode else "1H")
+        if pf_snap:
+            a1, a2 = st.columns([3, 1])
+            with a1: st.caption(f"📈 Velas locales hasta {pd.Timestamp(pf_snap['t'], unit='s'):%Y-%m-%d %H:%M} UTC · EMA 50 a {pf_snap['ema_dist']:.1f} ATR · nivel redondo {pf_snap['psych_level']:g}")
+            with a2: st.toggle("Autorrellenar", value=True, key="auto_fill", on_change=prefill_checklist)
         st.markdown("---")
         
         r1_c1, r1_c2 = st.columns(2)
@@ -120,9 +134,9 @@ def main_app():
                 st.markdown('<div class="dashboard-card" style="margin-top:20px">', unsafe_allow_html=True)
                 st.markdown(header("4. GATILLO FINAL"), unsafe_allow_html=True)
                 if tw==td==t4: st.success("💎 TRIPLE ALINEACIÓN")
-                sos = st.checkbox("⚡ SOS (Obligatorio)")
-                eng = st.checkbox("🕯️ Envolvente (Obligatorio)")
-                pat_ent = st.checkbox("Patrón en Entrada (+5%)")
+                sos = st.checkbox("⚡ SOS (Obligatorio)", key="sos")
+                eng = st.checkbox("🕯️ Envolvente (Obligatorio)", key="eng")
+                pat_ent = st.checkbox("Patrón en Entrada (+5%)", key="pat_ent")
                 rr = st.checkbox("💰 Ratio > 1:2.5")
                 entry_score = (10 if sos else 0) + (10 if eng else 0) + (5 if pat_ent else 0)
                 total = w_sc + d_sc + h4_sc + entry_score
@@ -132,17 +146,23 @@ def main_app():
                 st.markdown('<div class="dashboard-card">', unsafe_allow_html=True)
                 st.markdown(header("1. CONTEXTO (4H)"), unsafe_allow_html=True)
                 t4 = st.selectbox("Trend 4H", ["Alcista", "Bajista"], key="s4")
-                total = sum([st.checkbox("AOI (+50%)")*50, st.checkbox("Estructura (+50%)")*50])
+                total = sum([st.checkbox("AOI (+50%)", key="scalp_aoi")*50, st.checkbox("Estructura (+50%)", key="scalp_struct")*50])
                 st.markdown('</div>', unsafe_allow_html=True)
 
         st.markdown("<br>", unsafe_allow_html=True)
         
+        # Veredicto por el histórico del tramo de puntuación (par > modo > total); umbral fijo si aún no hay muestra
+        ed = get_edge(user, sel_acc).edge_for(total, global_mode.split()[0], st.session_state.pair_selector)
+        verdict = (ed or {}).get('verdict') or ('SNIPER' if total>=90 else 'VÁLIDO' if total>=60 else 'ESPERAR')
+        v_class = {'SNIPER': 'status-sniper', 'VÁLIDO': 'status-warning'}.get(verdict, 'status-stop')
+        ed_src = {'pair': st.session_state.pair_selector, 'mode': global_mode.split()[0], 'all': 'todos'}.get((ed or {}).get('source'), '')
+        ed_line = f"Histórico {ed['bucket']}% ({ed_src}): WR {ed['win_rate']:.0f}% · E ${ed['expectancy']:,.2f} · PF {ed['profit_factor']:.2f} · {ed['trades']} trades" if ed and ed['trades'] else "Sin histórico para este tramo"
         col_hud, col_btn = st.columns([3, 1])
         with col_hud:
             st.markdown(f"""
             <div class="hud-container">
                 <div class="hud-stat"><div class="hud-label">PUNTAJE</div><div class="hud-value-large">{total}%</div></div>
-                <div style="flex-grow:1; text-align:center; margin:0 20px;"><span class="{'status-sniper' if total>=90 else 'status-warning' if total>=60 else 'status-stop'}">{('SNIPER' if total>=90 else 'VÁLIDO' if total>=60 else 'ESPERAR')}</span></div>
+                <div style="flex-grow:1; text-align:center; margin:0 20px;"><span class="{v_class}">{verdict}</span><div style="color:#94a3b8; font-size:0.75rem; margin-top:6px;">{ed_line}</div></div>
             </div>
             """, unsafe_allow_html=True)
             st.progress(min(total, 100))
@@ -150,46 +170,63 @@ def main_app():
             if st.button("🚀 EJECUTAR", type="primary" if total >= 60 else "secondary", use_container_width=True):
                 modal_new_trade(user, sel_acc, global_mode, st.session_state.pair_selector, total)
 
+        with st.expander("📋 Ranking de la watchlist (velas locales)"):
+            rank_mode = global_mode.split()[0]
+            # Bajo demanda: recorre toda la watchlist, no se recalcula en cada rerun
+            if st.button("ACTUALIZAR RANKING", use_container_width=True, key="rank_run"):
+                with st.spinner("Leyendo señales por par..."):
+                    st.session_state['rank_result'] = rank_mode, scanner.rank(rank_mode, OFFICIAL_PAIRS)
+            rk_mode, ranking = st.session_state.get('rank_result', (None, None))
+            if rk_mode != rank_mode: st.caption(f"Pulsa ACTUALIZAR RANKING para puntuar la watchlist con el checklist {rank_mode}.")
+            elif ranking.empty: st.info("Sin datos de precio. Importa velas en Dashboard › 📈 Datos OHLC.")
+            else: st.dataframe(ranking.round(2), use_container_width=True, hide_index=True)
+
     # 2. PESTAÑA HISTORIAL
     with tab_hist:
         if not df.empty:
-            f1, f2 = st.columns([2, 1])
-            with f1: f_pair = st.text_input("Buscar", placeholder="EURUSD...")
-            with f2: f_res = st.multiselect("Filtro", ["WIN", "LOSS", "BE", "PENDING"])
-            
-            df_view = df.copy()
-            if f_pair: df_view = df_view[df_view['Par'].str.contains(f_pair.upper())]
-            if f_res: df_view = df_view[df_view['Resultado'].isin(f_res)]
+            f_text = st.text_input("🔎 Notas y análisis IA", placeholder="envolvente AOI GBPJPY LOSS")
+            if f_text:
+                # Búsqueda de texto (BM25 sobre el índice de notas): los mejores resultados, sin paginar
+                df_view = search_notes(user, sel_acc, f_text)
+                st.caption(f"{len(df_view)} trades más relevantes")
+                view_cols = ['Score', 'Fecha', 'Par', 'Direccion', 'Status', 'Resultado', 'Dinero', 'Confluencia']
+                brain_hits = search_brain(f_text)
+                if brain_hits:
+                    with st.expander(f"🧠 Análisis guardados ({len(brain_hits)})"):
+                        for b, score in brain_hits: st.markdown(f"**{b.get('pair', '')} · {b.get('result', '')}** ({score:.1f})\n\n{str(b.get('analysis', ''))[:400]}")
+            else:
+                f1, f2, f3 = st.columns([2, 1, 1])
+                with f1: f_pair = st.text_input("Buscar", placeholder="EURUSD...")
+                with f2: f_res = st.multiselect("Filtro", ["WIN", "LOSS", "BE", "PENDING"])
+                with f3: f_dates = st.date_input("Rango", value=(), format="YYYY-MM-DD")
+                
+                # Posiciones (ya ordenadas, recientes primero) desde el índice del journal; solo se pinta la página visible
+                d_from, d_to = (tuple(f_dates) + (None, None))[:2] if f_dates else (None, None)
+                hits = query_trades(user, sel_acc, f_pair, f_res, date_from=d_from, date_to=d_to or d_from)
+                p1, p2, p3 = st.columns([1, 1, 2])
+                with p1: page_size = st.selectbox("Filas", [50, 100, 250], key="hist_page_size")
+                n_pages = max(1, -(-len(hits) // page_size))
+                with p2: page = st.number_input("Página", 1, n_pages, 1, key=f"hist_page_{n_pages}") - 1
+                start = page * page_size
+                with p3: st.caption(f"{start + 1 if len(hits) else 0}–{min(start + page_size, len(hits))} de {len(hits)} trades")
+                df_view = df.iloc[hits[start:start + page_size]]
+                view_cols = ['Fecha', 'Par', 'Direccion', 'Status', 'Resultado', 'Dinero', 'Confluencia']
             
-            st.dataframe(df_view[['Fecha', 'Par', 'Direccion', 'Status', 'Resultado', 'Dinero', 'Confluencia']], use_container_width=True, hide_index=True)
-            tr_idx = st.selectbox("Editar Trade:", df_view.index, format_func=lambda x: f"#{x} {df_view.loc[x,'Par']}")
-            if st.button("📂 ABRIR"):
-                modal_update_trade(user, sel_acc, tr_idx, df.loc[tr_idx])
+            st.dataframe(df_view[view_cols], use_container_width=True, hide_index=True, column_config={"Fecha": st.column_config.DateColumn("Fecha"), "Score": st.column_config.NumberColumn("Score", format="%.1f")})
+            labels = dict(zip(df_view['ID'], df_view['Fecha'].dt.strftime('%Y-%m-%d') + " " + df_view['Par'].astype(str)))
+            tr_id = st.selectbox("Editar Trade:", list(labels), format_func=lambda x: f"{labels[x]} · #{x[-6:]}")
+            if st.button("📂 ABRIR") and tr_id is not None:
+                modal_update_trade(user, sel_acc, tr_id, df_view[df_view['ID'] == tr_id].iloc[0])
         else:
             st.info("No hay trades registrados.")
 
     # 3. PESTAÑA DASHBOARD PRO
     with tab_dash:
         st.markdown("### 📊 Trading Dashboard")
-        net_pnl = 0; win_rate = 0; pf = 0; best_streak = 0; largest_win = 0; largest_loss = 0
-        total_trades = 0; wins_count = 0; loss_count = 0
-        
-        if not df.empty:
-            net_pnl = df['Dinero'].sum()
-            closed = df[df['Status'] == 'CLOSED']
-            total_trades = len(closed)
-            wins = closed[closed['Resultado'] == 'WIN']; losses = closed[closed['Resultado'] == 'LOSS']
-            wins_count = len(wins); loss_count = len(losses)
-            if total_trades > 0: win_rate = (wins_count / total_trades) * 100
-            gross_win = wins['Dinero'].sum(); gross_loss = abs(losses['Dinero'].sum())
-            if gross_loss > 0: pf = gross_win / gross_loss
-            else: pf = gross_win
-            if not wins.empty: largest_win = wins['Dinero'].max()
-            if not losses.empty: largest_loss = losses['Dinero'].min()
-            current_streak = 0
-            for res in closed['Resultado']:
-                if res == 'WIN': current_streak += 1; best_streak = max(best_streak, current_streak)
-                else: current_streak = 0
+        ds = get_dashboard_stats(user, sel_acc)
+        net_pnl = ds['net_pnl']; total_trades = ds['total_trades']; win_rate = ds['win_rate']
+        wins_count = ds['wins']; loss_count = ds['losses']; pf = ds['profit_factor']
+        largest_win = ds['largest_win']; largest_loss = ds['largest_loss']; best_streak = ds['best_streak']
 
         top_c1, top_c2, top_c3 = st.columns([2, 1, 1])
         with top_c1:
@@ -202,25 +239,165 @@ def main_app():
         with m1: st.markdown(f"""<div class="dashboard-card"><div class="sub-stat-label">Largest Win</div><div class="sub-stat-value text-green">${largest_win:,.2f}</div></div>""", unsafe_allow_html=True)
         with m2: st.markdown(f"""<div class="dashboard-card"><div class="sub-stat-label">Largest Loss</div><div class="sub-stat-value text-red">${largest_loss:,.2f}</div></div>""", unsafe_allow_html=True)
         with m3: st.markdown(f"""<div class="dashboard-card"><div class="sub-stat-label">Best Streak</div><div class="sub-stat-value">🔥 {best_streak}</div></div>""", unsafe_allow_html=True)
-        with m4: st.markdown(f"""<div class="dashboard-card"><div class="sub-stat-label">Avg Confluence</div><div class="sub-stat-value">{(df['Confluencia'].mean() if not df.empty else 0):.0f}%</div></div>""", unsafe_allow_html=True)
+        with m4: st.markdown(f"""<div class="dashboard-card"><div class="sub-stat-label">Avg Confluence</div><div class="sub-stat-value">{ds['avg_confluence']:.0f}%</div></div>""", unsafe_allow_html=True)
+
+        e1, e2, e3, e4 = st.columns(4)
+        exp_color = "text-green" if ds['expectancy'] >= 0 else "text-red"
+        with e1: st.markdown(f"""<div class="dashboard-card"><div class="sub-stat-label">Expectancy</div><div class="sub-stat-value {exp_color}">${ds['expectancy']:,.2f}</div><div style="font-size:0.8rem; color:#94a3b8;">por trade</div></div>""", unsafe_allow_html=True)
+        with e2: st.markdown(f"""<div class="dashboard-card"><div class="sub-stat-label">Avg Win</div><div class="sub-stat-value text-green">${ds['avg_win']:,.2f}</div></div>""", unsafe_allow_html=True)
+        with e3: st.markdown(f"""<div class="dashboard-card"><div class="sub-stat-label">Avg Loss</div><div class="sub-stat-value text-red">${ds['avg_loss']:,.2f}</div><div style="font-size:0.8rem; color:#94a3b8;">Payoff {ds['payoff']:.2f}</div></div>""", unsafe_allow_html=True)
+        with e4: st.markdown(f"""<div class="dashboard-card"><div class="sub-stat-label">Worst Streak</div><div class="sub-stat-value">🧊 {ds['worst_streak']}</div></div>""", unsafe_allow_html=True)
+
+        st.markdown("#### 📈 Equity & Drawdown")
+        curve = get_equity_curve(user, sel_acc); eq = curve.summary()
+        if eq['points']:
+            q1, q2, q3, q4 = st.columns(4)
+            with q1: st.markdown(f"""<div class="dashboard-card"><div class="sub-stat-label">Max Drawdown</div><div class="sub-stat-value text-red">${eq['max_dd']:,.2f}</div><div style="font-size:0.8rem; color:#94a3b8;">{eq['max_dd_pct']:.2f}%</div></div>""", unsafe_allow_html=True)
+            with q2: st.markdown(f"""<div class="dashboard-card"><div class="sub-stat-label">Current Drawdown</div><div class="sub-stat-value">{eq['dd_pct']:.2f}%</div><div style="font-size:0.8rem; color:#94a3b8;">${eq['dd']:,.2f}</div></div>""", unsafe_allow_html=True)
+            with q3: st.markdown(f"""<div class="dashboard-card"><div class="sub-stat-label">Max Underwater</div><div class="sub-stat-value">{eq['max_underwater_days']:.0f} días</div><div style="font-size:0.8rem; color:#94a3b8;">{eq['max_underwater_trades']} trades sin nuevo máximo</div></div>""", unsafe_allow_html=True)
+            with q4: st.markdown(f"""<div class="dashboard-card"><div class="sub-stat-label">Peak Equity</div><div class="sub-stat-value text-green">${eq['peak']:,.2f}</div></div>""", unsafe_allow_html=True)
+            st.plotly_chart(render_equity_fig(curve.plot_frame(), True), use_container_width=True)
+        else:
+            st.info("Aún no hay trades cerrados para la curva de equity.")
 
         st.markdown("#### 📅 Calendar")
         c_cal, c_week = st.columns([3, 1])
         d = st.session_state.get('cal_date', datetime.now())
+        ver = trades_version(user, sel_acc)  # antes de leer el índice: un fragmento nunca queda con versión más nueva que sus datos
+        roll = get_rollups(user, sel_acc); mo = roll.month(d.year, d.month)
         with c_cal:
             nc1, nc2, nc3 = st.columns([1, 6, 1])
             with nc1: 
-                if st.button("◀"): st.session_state['cal_date'] = d.replace(month=d.month-1) if d.month>1 else d.replace(year=d.year-1, month=12); st.rerun()
-            with nc2: st.markdown(f"<h3 style='text-align:center; margin:0;'>{d.strftime('%B %Y')}</h3>", unsafe_allow_html=True)
+                if st.button("◀"): st.session_state['cal_date'] = d.replace(day=1, month=d.month-1) if d.month>1 else d.replace(day=1, year=d.year-1, month=12); st.rerun()
+            with nc2:
+                mo_color = "#10b981" if mo['pnl'] >= 0 else "#ef4444"
+                st.markdown(f"<h3 style='text-align:center; margin:0;'>{d.strftime('%B %Y')}</h3><div style='text-align:center; color:{mo_color}; font-size:0.85rem;'>${mo['pnl']:,.2f} · {mo['closed']} trades · {mo['win_rate']:.0f}% WR</div>", unsafe_allow_html=True)
             with nc3: 
-                if st.button("▶"): st.session_state['cal_date'] = d.replace(month=d.month+1) if d.month<12 else d.replace(year=d.year+1, month=1); st.rerun()
-            html_cal, _, _ = render_cal_html(df, True)
+                if st.button("▶"): st.session_state['cal_date'] = d.replace(day=1, month=d.month+1) if d.month<12 else d.replace(day=1, year=d.year+1, month=1); st.rerun()
+            html_cal = cached_fragment((user, sel_acc, "cal", d.year, d.month), ver, lambda: render_cal_html(roll, True)[0])
             st.markdown(html_cal, unsafe_allow_html=True)
         with c_week:
             st.markdown("<div style='margin-top:40px;'></div>", unsafe_allow_html=True)
             st.markdown("##### Weekly Summary")
-            for wk in ["Week 1", "Week 2", "Week 3", "Week 4"]:
-                st.markdown(f"""<div class="dashboard-card" style="padding:10px; margin-bottom:8px; min-height:60px;"><div style="display:flex; justify-content:space-between;"><span style="color:#94a3b8; font-size:0.8rem;">{wk}</span><span style="color:#10b981; font-weight:bold;">$0.00</span></div></div>""", unsafe_allow_html=True)
+            for wk in roll.month_weeks(d.year, d.month):
+                wk_color = "#10b981" if wk['pnl'] > 0 else "#ef4444" if wk['pnl'] < 0 else "#94a3b8"
+                st.markdown(f"""<div class="dashboard-card" style="padding:10px; margin-bottom:8px; min-height:60px;"><div style="display:flex; justify-content:space-between;"><span style="color:#94a3b8; font-size:0.8rem;">Week {wk['week']}</span><span style="color:{wk_color}; font-weight:bold;">${wk['pnl']:,.2f}</span></div><div style="color:#64748b; font-size:0.7rem;">{wk['start'].strftime('%d %b')} · {wk['closed']} trades · {wk['win_rate']:.0f}% WR</div></div>""", unsafe_allow_html=True)
+
+        st.markdown("#### 🔥 Heatmap")
+        years = roll.active_years()
+        if years:
+            n_years = st.radio("Años", [1, 3, 5, 10], index=1, horizontal=True)
+            span = tuple(years[-n_years:])
+            h1, h2 = st.columns([3, 1])
+            with h1: st.plotly_chart(cached_fragment((user, sel_acc, "heatmap", span), ver, lambda: render_year_heatmap(roll, span, True)), use_container_width=True)
+            with h2: st.plotly_chart(cached_fragment((user, sel_acc, "weekday"), ver, lambda: render_weekday_bars(roll, True)), use_container_width=True)
+        else:
+            st.info("Sin trades para el heatmap.")
+
+        with st.expander(f"💼 Portafolio · {len(accs)} cuentas"):
+            pf_all = get_portfolio(user); pst = pf_all['stats']
+            pf_pnl = pf_all['act'] - pf_all['ini']
+            c1, c2, c3, c4 = st.columns(4)
+            with c1: st.markdown(f"""<div class="dashboard-card"><div class="sub-stat-label">Balance Total</div><div class="sub-stat-value">${pf_all['act']:,.2f}</div><div style="font-size:0.8rem; color:{'#10b981' if pf_pnl >= 0 else '#ef4444'};">{'+' if pf_pnl > 0 else ''}${pf_pnl:,.2f}</div></div>""", unsafe_allow_html=True)
+            with c2: st.markdown(f"""<div class="dashboard-card"><div class="sub-stat-label">Win Rate</div><div class="sub-stat-value">{pst['win_rate']:.1f}%</div><div style="font-size:0.8rem; color:#94a3b8;">{pst['total_trades']} trades</div></div>""", unsafe_allow_html=True)
+            with c3: st.markdown(f"""<div class="dashboard-card"><div class="sub-stat-label">Profit Factor</div><div class="sub-stat-value">{pst['profit_factor']:.2f}</div></div>""", unsafe_allow_html=True)
+            with c4: st.markdown(f"""<div class="dashboard-card"><div class="sub-stat-label">Max Drawdown</div><div class="sub-stat-value text-red">{pf_all['curve'].max_dd_pct:.2f}%</div></div>""", unsafe_allow_html=True)
+            st.dataframe(pf_all['table'].round(2), use_container_width=True)
+            if pf_all['curve'].n: st.plotly_chart(render_equity_fig(pf_all['curve'].plot_frame(), True), use_container_width=True, key="pf_equity")
+
+        with st.expander("🕒 PnL por sesión"):
+            ss = get_session_stats(user, sel_acc)
+            cols = {"trades": "Trades", "win_rate": "Win Rate %", "expectancy": "Expectancy $", "pnl": "PnL $"}
+            s1, s2 = st.columns(2)
+            with s1: st.caption("Sesión (hora NY)"); st.dataframe(ss["session"].rename(columns=cols).round(2), use_container_width=True)
+            with s2: st.caption("Zona prime"); st.dataframe(ss["zone"].rename(columns=cols).round(2), use_container_width=True)
+            if "SIN HORA" in ss["zone"].index: st.caption("SIN HORA: trades guardados solo con fecha (sin hora de entrada).")
+
+        with st.expander("🎯 Edge por confluencia"):
+            edges = get_edge(user, sel_acc)
+            ec1, ec2 = st.columns([1, 2])
+            with ec1: e_dim = st.radio("Agrupar", ["Total", "Modo", "Par"], horizontal=True, key="edge_dim")
+            dim = {"Total": "all", "Modo": "mode", "Par": "pair"}[e_dim]
+            with ec2: e_key = st.selectbox("Filtro", edges.keys(dim), key=f"edge_key_{dim}") if dim != "all" else None
+            e_tab = edges.table(dim, e_key)
+            if e_tab.empty: st.info("Sin trades cerrados con puntuación.")
+            else: st.dataframe(e_tab.rename(columns={"trades": "Trades", "win_rate": "Win Rate %", "expectancy": "Expectancy $", "profit_factor": "PF", "pnl": "PnL $"}).round(2), use_container_width=True)
+
+        with st.expander("🎲 Monte Carlo · Riesgo de ruina"):
+            mc1, mc2, mc3, mc4 = st.columns(4)
+            with mc1:
+                mc_paths = st.selectbox("Caminos", [10_000, 100_000, 1_000_000], index=1, format_func=lambda n: f"{n:,}")
+                mc_trades = st.number_input("Trades por camino", 10, 2000, 100, step=10)
+            with mc2:
+                mc_mode = st.radio("Remuestrear", ["$ del journal", "R compuesto"], key="mc_mode")
+                mc_risk = st.number_input("Riesgo por trade (%)", 0.1, 10.0, 1.0, step=0.1, disabled=mc_mode != "R compuesto")
+            with mc3:
+                mc_dd = st.number_input("Pérdida máx. (%)", 1.0, 100.0, 10.0, step=1.0)
+                mc_trail = st.checkbox("Drawdown desde el pico (trailing)")
+            with mc4:
+                mc_target = st.number_input("Objetivo (%)", 0.0, 100.0, 8.0, step=1.0)
+                mc_seed = st.number_input("Semilla", 0, 10**9, 42)
+            if st.button("SIMULAR", use_container_width=True):
+                with st.spinner("Simulando..."):
+                    st.session_state['mc_result'] = sel_acc, simulate_account(user, sel_acc, mode="r" if mc_mode == "R compuesto" else "pnl",
+                        n_paths=mc_paths, n_trades=int(mc_trades), risk_pct=mc_risk, max_dd_pct=mc_dd, trailing=mc_trail,
+                        target_pct=mc_target or None, seed=int(mc_seed))
+            mc_acc, mc = st.session_state.get('mc_result', (None, None))
+            if mc_acc != sel_acc: pass
+            elif mc:
+                k1, k2, k3, k4 = st.columns(4)
+                with k1: st.markdown(f"""<div class="dashboard-card"><div class="sub-stat-label">Risk of Ruin</div><div class="sub-stat-value text-red">{mc['risk_of_ruin']:.2f}%</div></div>""", unsafe_allow_html=True)
+                with k2: st.markdown(f"""<div class="dashboard-card"><div class="sub-stat-label">Objetivo alcanzado</div><div class="sub-stat-value text-green">{mc['pass_rate']:.2f}%</div></div>""", unsafe_allow_html=True)
+                with k3: st.markdown(f"""<div class="dashboard-card"><div class="sub-stat-label">Max DD (p50 / p95)</div><div class="sub-stat-value">{mc['max_dd_pct'][50]:.1f}% / {mc['max_dd_pct'][95]:.1f}%</div></div>""", unsafe_allow_html=True)
+                with k4: st.markdown(f"""<div class="dashboard-card"><div class="sub-stat-label">Trades al objetivo (p50)</div><div class="sub-stat-value">{mc['trades_to_target'].get(50, float('nan')):.0f}</div></div>""", unsafe_allow_html=True)
+                st.dataframe(pd.DataFrame({"Max DD %": mc['max_dd_pct'], "Trades al objetivo": mc['trades_to_target'], "Balance final": mc['final_balance']}).rename_axis("Percentil"), use_container_width=True)
+            else:
+                st.info("No hay trades cerrados que remuestrear.")
+
+        with st.expander("📐 MAE / MFE contra velas"):
+            if st.checkbox("Calcular con los datos OHLC locales (1H)", key="mae_on"):
+                exc, exc_sum = get_excursions(user, sel_acc)
+                n_exc = int(exc["Salida"].notna().sum())
+                if not n_exc: st.info("Sin trades cerrados con Entry/SL/TP y velas de su par. Importa datos en 📈 Datos OHLC.")
+                else:
+                    x1, x2, x3, x4 = st.columns(4)
+                    with x1: st.markdown(f"""<div class="dashboard-card"><div class="sub-stat-label">Trades medidos</div><div class="sub-stat-value">{n_exc}</div></div>""", unsafe_allow_html=True)
+                    with x2: st.markdown(f"""<div class="dashboard-card"><div class="sub-stat-label">MAE medio</div><div class="sub-stat-value text-red">{exc['MAE_R'].mean():.2f}R</div></div>""", unsafe_allow_html=True)
+                    with x3: st.markdown(f"""<div class="dashboard-card"><div class="sub-stat-label">MFE medio</div><div class="sub-stat-value text-green">{exc['MFE_R'].mean():.2f}R</div></div>""", unsafe_allow_html=True)
+                    with x4: st.markdown(f"""<div class="dashboard-card"><div class="sub-stat-label">R realizado medio</div><div class="sub-stat-value">{exc['R'].mean():.2f}R</div></div>""", unsafe_allow_html=True)
+                    st.dataframe(exc_sum.round(2), use_container_width=True)
+                    st.caption("R realizado según las velas: TP = R:R del trade, SL = -1R, sin tocar ninguno en un mes = cierre de la última vela.")
+
+        with st.expander("🧪 Backtest del checklist"):
+            bt_pairs = sorted(set(ohlc.store.inventory()["Par"]))
+            if not bt_pairs: st.info("Sin datos de precio. Importa velas en 📈 Datos OHLC.")
+            else:
+                b1, b2, b3 = st.columns([1, 1, 2])
+                with b1: bt_mode = st.radio("Checklist", ["Swing", "Scalping"], horizontal=True, key="bt_mode")
+                with b2: bt_rr = st.number_input("R:R", 1.0, 10.0, 2.5, step=0.5, key="bt_rr")
+                with b3: bt_sel = st.multiselect("Pares", bt_pairs, default=bt_pairs, key="bt_pairs")
+                if st.button("EJECUTAR BACKTEST", use_container_width=True, disabled=not bt_sel):
+                    with st.spinner("Calculando señales y salidas..."):
+                        st.session_state['bt_result'] = bt_mode, backtest.report(backtest.run(bt_sel, bt_mode, rr=bt_rr))
+                bt_res = st.session_state.get('bt_result')
+                if bt_res:
+                    st.caption(f"Checklist {bt_res[0]}: eventos con envolvente o SOS a favor de tendencia, puntuados con los pesos de la pestaña Operativa. Expectancy en R por trade.")
+                    st.dataframe(bt_res[1][0].round(3), use_container_width=True)
+                    st.dataframe(bt_res[1][1].round(3), use_container_width=True)
+
+        with st.expander("📈 Datos OHLC"):
+            oc1, oc2, oc3 = st.columns([1, 1, 2])
+            with oc1: o_sym = st.selectbox("Par", OFFICIAL_PAIRS, key="ohlc_pair")
+            with oc2: o_tf = st.selectbox("Temporalidad", list(ohlc.TIMEFRAMES), key="ohlc_tf")
+            with oc3: o_file = st.file_uploader("CSV de velas (MT4/MT5, TradingView...)", type=["csv", "txt"], key="ohlc_csv")
+            if o_file is not None and st.button("IMPORTAR VELAS", use_container_width=True):
+                try:
+                    n = ohlc.store.ingest_csv(o_sym, o_tf, o_file)
+                    st.success(f"{o_sym} {o_tf}: {n:,} velas guardadas")
+                except ValueError as e: st.error(f"CSV no válido: {e}")
+            inv = ohlc.store.inventory()
+            if inv.empty: st.info("Sin datos de precio. Importa un CSV por par y temporalidad.")
+            else: st.dataframe(inv, use_container_width=True, hide_index=True)
 
     # 4. PESTAÑA MENTOR IA
     with tab_ai:
@@ -250,7 +427,7 @@ def main_app():
                     with chat_container:
                         with st.chat_message("assistant", avatar="🦁"):
                             with st.spinner("Analizando gráfico y datos..."):
-                                response = chat_with_mentor(prompt, df, img_upload)
+                                response = chat_with_mentor(prompt, get_recent_trades(user, sel_acc), img_upload)
                                 st.markdown(response)
                     st.session_state.messages.append({"role": "assistant", "content": response, "image": None})
                     st.rerun()
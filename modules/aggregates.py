@@ -0,0 +1,101 @@
+import pandas as pd
+from modules.schema import num
+
+# --- AGREGADOS INCREMENTALES POR CUENTA ---
+# Registro pequeño (balance, PnL, conteos, extremos, rachas) que se actualiza en
+# O(1) con cada escritura. Lo que no se puede "restar" (máximos, rachas cuando
+# cambia un trade antiguo) se marca como sucio y se reconstruye desde el journal.
+# open_tail: IDs (en orden) de los trades posteriores al último cerrado, todos
+# abiertos. Cerrar uno de ellos sigue la racha en O(1) sin saber su posición.
+AGG_FIELDS = ["n", "pnl", "closed", "wins", "losses", "gross_win", "loss_sum", "largest_win", "largest_loss",
+              "conf_sum", "conf_n", "cur_streak", "best_streak"]
+TOL = 1e-6
+
+def empty():
+    agg = {k: 0 for k in AGG_FIELDS}
+    agg.update(open_tail=[], dirty=False, version=None)
+    return agg
+
+def _contrib(agg, r, sign):
+    """Suma (sign=1) o resta (sign=-1) la aportación de una fila a los contadores."""
+    d = num(r.get("Dinero"))
+    agg["n"] += sign; agg["pnl"] += sign * d
+    conf = r.get("Confluencia")
+    if not pd.isna(conf):  # None, NaN de cualquier float (np.float32) y pd.NA
+        agg["conf_sum"] += sign * num(conf); agg["conf_n"] += sign
+    if r.get("Status") != "CLOSED": return
+    agg["closed"] += sign
+    if r.get("Resultado") == "WIN":
+        agg["wins"] += sign; agg["gross_win"] += sign * d
+        if sign > 0: agg["largest_win"] = max(agg["largest_win"], d) if agg["wins"] > 1 else d
+        elif d >= agg["largest_win"]: agg["dirty"] = True
+    elif r.get("Resultado") == "LOSS":
+        agg["losses"] += sign; agg["loss_sum"] += sign * d
+        if sign > 0: agg["largest_loss"] = min(agg["largest_loss"], d) if agg["losses"] > 1 else d
+        elif d <= agg["largest_loss"]: agg["dirty"] = True
+
+def _close(agg, tid, res):
+    # Racha en O(1) solo si el trade cerrado queda detrás del último cerrado (está en open_tail)
+    tail = agg["open_tail"]
+    if tid not in tail: agg["dirty"] = True; return
+    agg["cur_streak"] = agg["cur_streak"] + 1 if res == "WIN" else 0
+    agg["best_streak"] = max(agg["best_streak"], agg["cur_streak"])
+    agg["open_tail"] = tail[tail.index(tid) + 1:]
+
+def apply_add(agg, row):
+    """Nuevo trade al final del journal."""
+    _contrib(agg, row, 1)
+    agg["open_tail"].append(row.get("ID"))
+    if row.get("Status") == "CLOSED": _close(agg, row.get("ID"), row.get("Resultado"))
+    return agg
+
+def apply_update(agg, old, new):
+    """Trade existente: old -> new (filas completas, con ID)."""
+    _contrib(agg, old, -1)
+    _contrib(agg, new, 1)
+    was, now = old.get("Status") == "CLOSED", new.get("Status") == "CLOSED"
+    if was and (not now or old.get("Resultado") != new.get("Resultado")): agg["dirty"] = True
+    elif now and not was: _close(agg, old.get("ID"), new.get("Resultado"))
+    return agg
+
+def apply_delete(agg, old):
+    _contrib(agg, old, -1)
+    if old.get("Status") == "CLOSED": agg["dirty"] = True
+    elif old.get("ID") in agg["open_tail"]: agg["open_tail"].remove(old.get("ID"))
+    return agg
+
+def rebuild(df):
+    """Reconstrucción completa desde el DataFrame del journal (vectorizada)."""
+    agg = empty()
+    if df.empty: return agg
+    agg["open_tail"] = df["ID"].tolist()
+    dinero = pd.to_numeric(df["Dinero"], errors="coerce").fillna(0.0)
+    conf = pd.to_numeric(df["Confluencia"], errors="coerce")
+    is_closed = (df["Status"] == "CLOSED").to_numpy()
+    res = df["Resultado"].to_numpy()
+    win = is_closed & (res == "WIN"); loss = is_closed & (res == "LOSS")
+    agg.update(n=len(df), pnl=float(dinero.sum()), closed=int(is_closed.sum()), wins=int(win.sum()), losses=int(loss.sum()),
+               gross_win=float(dinero[win].sum()), loss_sum=float(dinero[loss].sum()),
+               largest_win=float(dinero[win].max()) if win.any() else 0, largest_loss=float(dinero[loss].min()) if loss.any() else 0,
+               conf_sum=float(conf.sum()), conf_n=int(conf.notna().sum()))
+    if is_closed.any():
+        cw = win[is_closed].astype(int)
+        # Longitud de cada racha de WIN consecutivos entre trades cerrados
+        grp = (cw == 0).cumsum()
+        runs = pd.Series(cw).groupby(grp).cumsum().to_numpy()
+        agg.update(best_streak=int(runs.max()), cur_streak=int(runs[-1]), open_tail=df["ID"].iloc[is_closed.nonzero()[0][-1] + 1:].tolist())
+    return agg
+
+def check(agg, df):
+    """Compara un registro al día (ni sucio ni de otra versión) con una reconstrucción;
+    devuelve los campos desviados."""
+    ref = rebuild(df)
+    bad = [k for k in AGG_FIELDS if abs(num(agg.get(k)) - num(ref[k])) > TOL]
+    return bad + ["open_tail"] if agg.get("open_tail") != ref["open_tail"] else bad
+
+def to_stats(agg):
+    """Cifras de cabecera del Dashboard / sidebar a partir del registro."""
+    return {"net_pnl": agg["pnl"], "total_trades": agg["closed"], "wins": agg["wins"], "losses": agg["losses"],
+            "gross_win": agg["gross_win"], "gross_loss": abs(agg["loss_sum"]),
+            "largest_win": agg["largest_win"], "largest_loss": agg["largest_loss"],
+            "best_streak": agg["best_streak"], "avg_confluence": agg["conf_sum"] / agg["conf_n"] if agg["conf_n"] else 0}
@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+
+# --- ANALÍTICA DEL DASHBOARD PRO ---
+# Todo el bloque de estadísticas sale de una sola pasada vectorizada: se extraen
+# una vez los arrays de Dinero/Resultado de los trades cerrados y cada cifra es
+# una reducción de NumPy sobre ellos (sin bucles Python ni filtros repetidos).
+# El resultado se memoiza por versión del journal en data.get_dashboard_stats.
+
+def _longest_run(mask):
+    """Longitud de la racha más larga de True consecutivos."""
+    if not mask.any(): return 0
+    edges = np.diff(np.concatenate(([0], mask.view(np.int8), [0])))
+    return int((np.flatnonzero(edges == -1) - np.flatnonzero(edges == 1)).max())
+
+def _trailing_run(mask):
+    """Longitud de la racha de True con la que termina mask."""
+    if not len(mask) or not mask[-1]: return 0
+    off = np.flatnonzero(~mask)
+    return int(len(mask) - (off[-1] + 1 if len(off) else 0))
+
+def compute_stats(df):
+    """Estadísticas del Dashboard a partir del DataFrame de trades de la cuenta."""
+    dinero_all = pd.to_numeric(df["Dinero"], errors="coerce").to_numpy(dtype=np.float64, na_value=0.0)
+    conf = pd.to_numeric(df["Confluencia"], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+    closed = (df["Status"] == "CLOSED").to_numpy(dtype=bool)
+
+    d = dinero_all[closed]
+    res = df["Resultado"].to_numpy()[closed]
+    win, loss = res == "WIN", res == "LOSS"
+    n, n_win, n_loss = len(d), int(win.sum()), int(loss.sum())
+    gross_win, gross_loss = float(d[win].sum()), float(-d[loss].sum())
+    net_closed = float(d.sum())
+    avg_win = gross_win / n_win if n_win else 0.0
+    avg_loss = -gross_loss / n_loss if n_loss else 0.0
+    conf_ok = ~np.isnan(conf)
+
+    return {
+        "net_pnl": float(dinero_all.sum()),
+        "total_trades": n, "wins": n_win, "losses": n_loss, "breakeven": int((res == "BE").sum()),
+        "win_rate": n_win / n * 100 if n else 0.0,
+        "gross_win": gross_win, "gross_loss": gross_loss,
+        # Sin pérdidas se muestra el bruto ganado (como hacía el Dashboard), no infinito
+        "profit_factor": gross_win / gross_loss if gross_loss > 0 else gross_win,
+        "expectancy": net_closed / n if n else 0.0,
+        "avg_win": avg_win, "avg_loss": avg_loss,
+        "payoff": avg_win / abs(avg_loss) if avg_loss else 0.0,
+        "largest_win": float(d[win].max()) if n_win else 0.0,
+        "largest_loss": float(d[loss].min()) if n_loss else 0.0,
+        "best_streak": _longest_run(win), "worst_streak": _longest_run(loss),
+        "cur_streak": _trailing_run(win) or -_trailing_run(loss),
+        "avg_confluence": float(conf[conf_ok].mean()) if conf_ok.any() else 0.0,
+    }
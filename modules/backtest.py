@@ -0,0 +1,99 @@
+import os
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from modules import ohlc, indicators, checklist
+from modules.excursion import scan_exits
+
+# --- BACKTEST DEL CHECKLIST SET & FORGET ---
+# Por símbolo, sobre las velas locales (modules.ohlc):
+#   1. señales de modules.indicators en cada temporalidad del modo;
+#   2. eventos = velas de ejecución (4H Swing, 1H Scalping) con envolvente o
+#      SOS a favor de la tendencia de la temporalidad de dirección;
+#   3. puntuación de cada evento con los pesos del checklist (modules.checklist),
+#      usando solo velas ya cerradas de las temporalidades mayores;
+#   4. trade a cierre de vela: SL a SL_ATR ATR, TP a rr x riesgo, salida con
+#      las velas de 1H (o las de ejecución si no hay), como excursion.
+# Cada evento se guarda con su puntuación, así que un solo backtest responde
+# a cualquier umbral (60 % / 90 %). Los símbolos van en un pool de procesos
+# (spawn, como montecarlo); cada worker abre los memmap por su cuenta.
+SL_ATR = 1.0
+HORIZON_BARS = 24 * 30   # velas de 1H (un mes) hasta dar el trade por abierto
+MIN_BARS = indicators.AOI_BARS + indicators.EMA_LEN
+
+def _closed_index(bars, tf, when):
+    """Por cada instante de when, índice de la última vela de tf cerrada (-1 si ninguna)."""
+    return np.searchsorted(bars["t"] + ohlc.TIMEFRAMES[tf], when, side="right") - 1
+
+def run_symbol(symbol, mode="Swing", rr=2.5, horizon=HORIZON_BARS, root=None):
+    """Eventos de un símbolo: dict de arrays (t, direction, score, aligned, R, exit) o None sin datos."""
+    store = ohlc.OHLCStore(root)
+    exec_tf = checklist.EXEC_TF[mode]
+    ex = store.series(symbol, exec_tf)
+    if len(ex) < MIN_BARS: return None
+    series = {tf: ex if tf == exec_tf else store.series(symbol, tf) for tf in checklist.timeframes(mode)}
+    feats = {tf: indicators.features(b, symbol) for tf, b in series.items() if len(b)}
+    ef = feats[exec_tf]
+    close_t = np.asarray(ex["t"]) + ohlc.TIMEFRAMES[exec_tf]
+    # Señales de cada temporalidad vistas al cierre de cada vela de ejecución
+    signals = {}
+    for tf, f in feats.items():
+        idx = np.arange(len(ex)) if tf == exec_tf else _closed_index(series[tf], tf, close_t)
+        ok = idx >= 0
+        for sig in indicators.SIGNALS: signals[(tf, sig)] = np.where(ok, f[sig][np.maximum(idx, 0)], 0).astype(np.int8)
+    for _, tf, sig, _ in checklist.ITEMS[mode]: signals.setdefault((tf, sig), np.zeros(len(ex), np.int8))
+    for _, tf in checklist.TRENDS[mode]: signals.setdefault((tf, "trend"), np.zeros(len(ex), np.int8))
+    direction = signals[(checklist.TRENDS[mode][-1][1], "trend")]
+    trigger = (signals[(exec_tf, "engulfing")] == direction) | (signals[(exec_tf, "sos")] == direction)
+    ev = np.flatnonzero(trigger & (direction != 0) & np.isfinite(ef["atr"]) & (ef["atr"] > 0))
+    ev = ev[ev < len(ex) - 1]   # la última vela no tiene continuación
+    if not len(ev): return None
+    d = direction[ev]
+    entry = np.asarray(ex["close"])[ev]
+    sl = entry - d * SL_ATR * ef["atr"][ev]
+    tp = entry + d * rr * np.abs(entry - sl)
+    path = store.bars(symbol, "1H")
+    path, path_tf = (path, "1H") if len(path) else (ex, exec_tf)
+    horizon = horizon if path_tf == "1H" else max(1, horizon * 3_600 // ohlc.TIMEFRAMES[exec_tf])
+    _, _, code, _, px = scan_exits(path, path_tf, close_t[ev], entry, sl, tp, d > 0, horizon)
+    with np.errstate(invalid="ignore"):
+        r = (px - entry) * d / np.abs(entry - sl)
+    at_ev = {k: v[ev] for k, v in signals.items()}
+    return {"t": close_t[ev], "direction": d, "score": checklist.score(mode, at_ev, d), "aligned": checklist.aligned(mode, at_ev),
+            "R": r, "exit": code}
+
+def run(symbols, mode="Swing", rr=2.5, horizon=HORIZON_BARS, root=None, workers=None):
+    """Backtest de symbols: DataFrame con un evento por fila (Par, Fecha, Dirección, Score, Alineado, R, Salida)."""
+    symbols = list(symbols)
+    args = [(s, mode, rr, horizon, root) for s in symbols]
+    workers = min(workers or os.cpu_count() or 1, len(symbols))
+    if workers > 1:
+        # spawn: el proceso de Streamlit tiene hilos y fork no es seguro
+        with ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context("spawn")) as ex:
+            parts = list(ex.map(run_symbol, *zip(*args)))
+    else: parts = [run_symbol(*a) for a in args]
+    frames = [pd.DataFrame({"Par": s, "Fecha": pd.to_datetime(p["t"], unit="s"), "Dirección": np.where(p["direction"] > 0, "LONG", "SHORT"),
+                            "Score": p["score"], "Alineado": p["aligned"], "R": p["R"],
+                            "Salida": np.array([None, "ABIERTO", "SL", "TP"], dtype=object)[p["exit"] + 1]})
+              for s, p in zip(symbols, parts) if p is not None]
+    if not frames: return pd.DataFrame(columns=["Par", "Fecha", "Dirección", "Score", "Alineado", "R", "Salida"])
+    return pd.concat(frames, ignore_index=True).sort_values("Fecha", kind="stable", ignore_index=True)
+
+def _stats(r):
+    r = r[np.isfinite(r)]
+    wins, losses = r[r > 0].sum(), -r[r < 0].sum()
+    return {"Trades": len(r), "Win Rate %": (r > 0).mean() * 100 if len(r) else 0.0, "Expectancy R": r.mean() if len(r) else 0.0,
+            "Profit Factor": wins / losses if losses > 0 else np.inf if wins > 0 else 0.0, "R total": r.sum()}
+
+def report(trades, thresholds=checklist.THRESHOLDS):
+    """(tabla por umbral, tabla por tramo de 10 puntos). Expectancy en R por trade."""
+    r, score = trades["R"].to_numpy(np.float64), trades["Score"].to_numpy()
+    valid, sniper = thresholds["VÁLIDO"], thresholds["SNIPER"]
+    rows = {"Todos": np.ones(len(r), bool), f"< {valid}": score < valid, f"≥ {valid}": score >= valid,
+            f"{valid}–{sniper - 1}": (score >= valid) & (score < sniper), f"≥ {sniper}": score >= sniper,
+            f"≥ {valid} + alineación": (score >= valid) & trades["Alineado"].to_numpy(bool)}
+    by_thr = pd.DataFrame({k: _stats(r[m]) for k, m in rows.items()}).T
+    bucket = score // 10 * 10
+    by_bucket = pd.DataFrame({f"{b}%": _stats(r[bucket == b]) for b in np.unique(bucket)}).T
+    return by_thr, by_bucket
@@ -0,0 +1,92 @@
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+# --- CACHÉ LRU POR VERSIÓN ---
+# Entradas por clave (usuario, cuenta) validadas con la versión del origen
+# (mtime+tamaño de los ficheros, contador en SQLite). Escribir en una cuenta
+# solo invalida esa entrada; el resto de sesiones siguen sirviéndose de memoria.
+# Todas las cachés comparten un solo presupuesto (TRADING_CACHE_MB) y un orden
+# LRU global: al pasarse se expulsa la entrada menos usada de cualquiera de ellas.
+CACHE_MAX_MB = float(os.environ.get("TRADING_CACHE_MB", 256))
+
+_lock = threading.Lock()
+_order = OrderedDict()   # (caché, clave) -> None, de menos a más reciente
+_total = 0
+
+def file_version(*paths):
+    """Versión barata de uno o varios ficheros: (mtime_ns, tamaño) de cada uno."""
+    out = []
+    for p in paths:
+        try:
+            s = os.stat(p); out.append((s.st_mtime_ns, s.st_size))
+        except OSError: out.append(None)
+    return tuple(out)
+
+def frame_nbytes(df):
+    try: return int(df.memory_usage(deep=True).sum())
+    except: return 0
+
+def dict_nbytes(d):
+    """Tamaño aproximado de un dict de escalares / DataFrames (bloques de estadísticas)."""
+    return sys.getsizeof(d) + sum(frame_nbytes(v) if hasattr(v, "memory_usage") else sys.getsizeof(v) for v in d.values())
+
+def budget_stats():
+    with _lock: return {"entries": len(_order), "bytes": _total, "max_bytes": int(CACHE_MAX_MB * 1024 * 1024)}
+
+class VersionedLRU:
+    """max_bytes: tope propio opcional, además del presupuesto global."""
+    def __init__(self, max_bytes=None, sizeof=frame_nbytes):
+        self.max_bytes = int(max_bytes) if max_bytes is not None else None
+        self.sizeof = sizeof
+        self._data = OrderedDict()  # key -> (version, value, nbytes)
+        self._bytes = 0
+
+    def get(self, key, version):
+        """Devuelve el valor si la versión coincide; None si falta o está obsoleto."""
+        with _lock:
+            hit = self._data.get(key)
+            if hit is None or hit[0] != version: return None
+            self._data.move_to_end(key); _order.move_to_end((self, key))
+            return hit[1]
+
+    def _drop(self, key):
+        global _total
+        old = self._data.pop(key, None)
+        if old:
+            self._bytes -= old[2]; _total -= old[2]
+            _order.pop((self, key), None)
+
+    def put(self, key, version, value):
+        global _total
+        nbytes = self.sizeof(value) if self.sizeof else 0
+        limit = int(CACHE_MAX_MB * 1024 * 1024)
+        with _lock:
+            self._drop(key)
+            if nbytes > limit or (self.max_bytes is not None and nbytes > self.max_bytes): return value  # no cabe: se sirve sin cachear
+            self._data[key] = (version, value, nbytes)
+            self._bytes += nbytes; _total += nbytes
+            _order[(self, key)] = None
+            # Tope propio: se expulsan primero las entradas más antiguas de esta caché
+            while self.max_bytes is not None and self._bytes > self.max_bytes:
+                self._drop(next(iter(self._data)))
+            while _total > limit and _order:
+                c, k = next(iter(_order))
+                c._drop(k)
+        return value
+
+    def get_or_load(self, key, version, loader):
+        val = self.get(key, version)
+        return val if val is not None else self.put(key, version, loader())
+
+    def invalidate(self, key):
+        with _lock: self._drop(key)
+
+    def clear(self):
+        with _lock:
+            for k in list(self._data): self._drop(k)
+
+    def stats(self):
+        with _lock:
+            return {"entries": len(self._data), "bytes": self._bytes, "max_bytes": self.max_bytes}
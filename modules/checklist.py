@@ -0,0 +1,40 @@
+import numpy as np
+
+# --- CHECKLIST DE CONFLUENCIAS (PESOS DE LA PESTAÑA OPERATIVA) ---
+# Las casillas de main.py como datos: (clave del widget, temporalidad, señal de
+# modules.indicators, peso). Tiene que coincidir con los bloques Swing y
+# Scalping de la pestaña Operativa; lo usan el backtester y el autorrelleno.
+# Las casillas del gatillo final no tienen key en la UI: se nombran aquí.
+ITEMS = {
+    "Swing": [
+        ("w1", "W", "aoi", 10), ("w2", "W", "structure", 10), ("w3", "W", "candle", 10), ("w4", "W", "pattern", 10),
+        ("w5", "W", "ema", 5), ("w6", "W", "psych", 5),
+        ("d1", "D", "aoi", 10), ("d2", "D", "structure", 10), ("d3", "D", "candle", 10), ("d4", "D", "pattern", 10),
+        ("d5", "D", "ema", 5),
+        ("h1", "4H", "candle", 10), ("h2", "4H", "pattern", 10), ("h3", "4H", "structure", 5), ("h4", "4H", "ema", 5),
+        ("sos", "4H", "sos", 10), ("eng", "4H", "engulfing", 10), ("pat_ent", "4H", "candle", 5),
+    ],
+    "Scalping": [("scalp_aoi", "4H", "aoi", 50), ("scalp_struct", "4H", "structure", 50)],
+}
+# Selectores de tendencia (clave, temporalidad); la dirección del trade es la del último
+TRENDS = {"Swing": [("tw", "W"), ("td", "D"), ("t4", "4H")], "Scalping": [("s4", "4H")]}
+# Temporalidad en la que se busca el gatillo (envolvente o SOS) y se entra
+EXEC_TF = {"Swing": "4H", "Scalping": "1H"}
+THRESHOLDS = {"VÁLIDO": 60, "SNIPER": 90}
+
+def timeframes(mode):
+    return sorted({tf for _, tf, _, _ in ITEMS[mode]} | {tf for _, tf in TRENDS[mode]} | {EXEC_TF[mode]})
+
+def score(mode, signals, direction):
+    """Puntuación por fila: suma de pesos de las casillas cuya señal va en direction.
+
+    signals: {(temporalidad, señal): array int8} ya alineados entre sí;
+    direction: array de +1 / -1."""
+    total = np.zeros(len(direction), np.int16)
+    for _, tf, sig, w in ITEMS[mode]: total += np.where(signals[(tf, sig)] == direction, w, 0).astype(np.int16)
+    return total
+
+def aligned(mode, signals):
+    """Todas las tendencias del modo iguales (la "triple alineación" en Swing)."""
+    trends = [signals[(tf, "trend")] for _, tf in TRENDS[mode]]
+    return np.logical_and.reduce([t == trends[-1] for t in trends]) & (trends[-1] != 0)
@@ -2,8 +2,14 @@ import os
 import json
 import shutil
 import pandas as pd
-import streamlit as st
 import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from modules.schema import TRADE_COLS, LIGHT_COLS, DETAIL_COLS, apply_schema, empty_frame
+from modules.journal import new_trade_id, read_seq, has_data, journal_append, load_journaled, load_details
+from modules import db, aggregates, analytics, equity, rollups, edge, montecarlo, sessions, search, fulltext, portfolio
+from modules.locks import file_lock, atomic_write
+from modules.registry import JsonRegistry
+from modules.cache import VersionedLRU, file_version, frame_nbytes, dict_nbytes
 
 # Constantes
 DATA_DIR = "user_data"
@@ -11,6 +17,10 @@ IMG_DIR = os.path.join(DATA_DIR, "brain_images")
 BRAIN_FILE = os.path.join(DATA_DIR, "brain_data.json")
 USERS_FILE = os.path.join(DATA_DIR, "users.json")
 ACCOUNTS_FILE = os.path.join(DATA_DIR, "accounts_config.json")
+DB_FILE = os.path.join(DATA_DIR, "trading.db")
+
+# Backend de almacenamiento: "csv" (ficheros, por defecto) o "sqlite" (TRADING_BACKEND=sqlite)
+BACKEND = os.environ.get("TRADING_BACKEND", "csv").lower()
 
 OFFICIAL_PAIRS = [
     # --- MAJORS ---
@@ -45,6 +55,13 @@ def init_filesystem():
     for d in [DATA_DIR, IMG_DIR]:
         if not os.path.exists(d): os.makedirs(d)
 
+# Registros en memoria de usuarios y cuentas (backend de ficheros)
+_users = JsonRegistry(USERS_FILE)
+_accounts = JsonRegistry(ACCOUNTS_FILE)
+
+def _sql():
+    return db.get_conn(DB_FILE) if BACKEND == "sqlite" else None
+
 # --- JSON Utils ---
 def load_json(fp):
     if not os.path.exists(fp): return {}
@@ -53,9 +70,10 @@ def load_json(fp):
     except: return {}
 
 def save_json(fp, data):
+    # Temporal + rename bajo lock: un lector nunca ve un JSON a medias
     try:
-        with open(fp, "w") as f: json.dump(data, f)
-    except: pass
+        with file_lock(fp): atomic_write(fp, lambda f: json.dump(data, f))
+    except Exception as e: print(f"Error guardando {fp}: {e}")
 
 # --- GESTIÓN DE CONFIGURACIÓN DE USUARIO (NUEVO) ---
 def get_user_config(user):
@@ -75,83 +93,356 @@ def save_user_config(user, config_data):
 # --- Auth ---
 def verify_user(u, p):
     if u == "admin" and p == "1234": return True
-    d = load_json(USERS_FILE)
-    return u in d and d[u] == p
+    if _sql(): return db.verify_user(_sql(), u, p)
+    pw = _users.get(u)
+    return pw is not None and pw == p
 
 def register_user(u, p):
-    d = load_json(USERS_FILE)
-    d[u] = p
-    save_json(USERS_FILE, d)
+    if _sql(): return db.register_user(_sql(), u, p)
+    _users.set((u,), p)
 
 # --- Cuentas y Trades ---
 def get_user_accounts(u):
-    d = load_json(ACCOUNTS_FILE)
-    return list(d.get(u, {}).keys()) if u in d else ["Principal"]
+    if _sql(): return db.get_user_accounts(_sql(), u) or ["Principal"]
+    accs = _accounts.get(u)
+    return list(accs.keys()) if accs is not None else ["Principal"]
 
 def create_account(u, name, bal):
-    d = load_json(ACCOUNTS_FILE)
-    d.setdefault(u, {})[name] = bal
-    save_json(ACCOUNTS_FILE, d)
+    if _sql(): return db.create_account(_sql(), u, name, bal)
+    _accounts.set((u, name), bal)
     save_trade(u, name, None, init=True)
 
-@st.cache_data(ttl=2)
+def _trade_file(u, acc):
+    return os.path.join(DATA_DIR, u, f"{acc}.csv".replace(" ", "_"))
+
+def account_lock(u, acc):
+    """Lock de escritura de la cuenta, compartido entre hilos y workers."""
+    os.makedirs(os.path.join(DATA_DIR, u), exist_ok=True)
+    return file_lock(_trade_file(u, acc))
+
+# Caché de DataFrames por (usuario, cuenta), validada con la versión de los trades
+_frames = VersionedLRU(sizeof=lambda v: frame_nbytes(v[0]))
+
+def trades_version(u, acc):
+    """Versión actual de los trades de la cuenta: cambia con cada escritura, no al compactar."""
+    if _sql(): return db.account_version(_sql(), u, acc)
+    return read_seq(_trade_file(u, acc))
+
+def _load_trades(u, acc):
+    """Trades de la cuenta, tipados y sin las columnas pesadas (ver get_trade_details)."""
+    if _sql(): return apply_schema(db.load_trades(_sql(), u, acc, LIGHT_COLS), LIGHT_COLS)
+    fp = _trade_file(u, acc)
+    if has_data(fp):
+        try: return apply_schema(load_journaled(fp, LIGHT_COLS), LIGHT_COLS)
+        except Exception as e: print(f"Error cargando {fp}: {e}")
+    return empty_frame(LIGHT_COLS)
+
+def get_trade_details(u, acc, trade_id):
+    """Notas e imágenes de un trade, leídas bajo demanda (al abrir el modal)."""
+    if _sql(): out = db.get_trade_details(_sql(), u, acc, trade_id, DETAIL_COLS)
+    else: out = load_details(_trade_file(u, acc), trade_id, DETAIL_COLS) if has_data(_trade_file(u, acc)) else None
+    return {c: (None if v is None or v != v else v) for c, v in (out or {}).items()} or dict.fromkeys(DETAIL_COLS)
+
+def get_recent_trades(u, acc, n=15):
+    """Últimos n trades con sus Notas (contexto del mentor IA): frame ligero + detalles por ID."""
+    df = get_balance_data(u, acc)[2].tail(n).copy()
+    df["Notas"] = [get_trade_details(u, acc, tid)["Notas"] for tid in df["ID"]]
+    return df
+
+def _initial_balance(u, acc):
+    if _sql(): return db.get_account_balance(_sql(), u, acc)
+    return _accounts.get(u, acc, default=0.0)
+
 def get_balance_data(u, acc):
-    d = load_json(ACCOUNTS_FILE)
-    ini = d.get(u, {}).get(acc, 0.0)
-    fp = os.path.join(DATA_DIR, u, f"{acc}.csv".replace(" ", "_"))
-    
-    if os.path.exists(fp):
-        try:
-            df = pd.read_csv(fp)
-            expected_cols = ["Fecha", "Par", "Direccion", "Status", "Resultado", "Dinero", "Ratio", "Notas", "Img_Antes", "Img_Despues", "Confluencia"]
-            for col in expected_cols:
-                if col not in df.columns: df[col] = None
-            pnl = df["Dinero"].sum() if not df.empty else 0
-        except:
-            df = pd.DataFrame(); pnl = 0
-    else:
-        df = pd.DataFrame(); pnl = 0
+    ini = _initial_balance(u, acc)
+    df, pnl = _frames.get_or_load((u, acc), trades_version(u, acc), lambda: _with_pnl(_load_trades(u, acc)))
     return ini, ini + pnl, df
 
-def save_trade(u, acc, data, init=False, index=None):
-    folder = os.path.join(DATA_DIR, u)
-    if not os.path.exists(folder): os.makedirs(folder)
-    fp = os.path.join(folder, f"{acc}.csv".replace(" ", "_"))
-    cols = ["Fecha", "Par", "Direccion", "Status", "Resultado", "Dinero", "Ratio", "Notas", "Img_Antes", "Img_Despues", "Confluencia"]
-    
+def _with_pnl(df):
+    return df, (df["Dinero"].sum() if not df.empty else 0)
+
+def save_trade(u, acc, data, init=False, trade_id=None):
+    """Alta (trade_id=None) o actualización por ID. Devuelve el ID del trade."""
+    fp = _trade_file(u, acc)
     if init:
-        if not os.path.exists(fp): pd.DataFrame(columns=cols).to_csv(fp, index=False)
+        if _sql(): return
+        with account_lock(u, acc):
+            if not has_data(fp): atomic_write(fp, lambda f: pd.DataFrame(columns=TRADE_COLS).to_csv(f, index=False))
         return
+    if not data: return
+    if trade_id is None: data = dict(data, ID=data.get("ID") or new_trade_id())
 
-    try:
-        df = pd.read_csv(fp) if os.path.exists(fp) else pd.DataFrame(columns=cols)
-    except:
-        df = pd.DataFrame(columns=cols)
-        
-    if data:
-        new_row = pd.DataFrame([data])
-        for c in cols: 
-            if c not in new_row.columns: new_row[c] = None
-
-        if index is not None and not df.empty and index < len(df):
-            for col in data.keys(): df.at[index, col] = data[col]
+    # Journal/BD y agregados se actualizan juntos bajo el lock de la cuenta
+    with account_lock(u, acc):
+        agg, live = _agg_prepare(u, acc), _live_prepare(u, acc)
+        old = _old_row(u, acc, trade_id) if (agg is not None or any(live)) and trade_id is not None else None
+        if _sql():
+            if trade_id is not None: db.update_trade(_sql(), u, acc, trade_id, data)
+            else: db.insert_trade(_sql(), u, acc, data)
         else:
-            df = pd.concat([df, new_row], ignore_index=True)
-            
-        df.to_csv(fp, index=False)
-        get_balance_data.clear()
+            # Append-only: el trade nuevo o la actualización por ID es una línea en el journal
+            if trade_id is not None: journal_append(fp, {"op": "upd", "id": trade_id, "data": data})
+            else: journal_append(fp, {"op": "add", "row": data})
+        _frames.invalidate((u, acc))
+        if trade_id is None:
+            _agg_commit(u, acc, agg, lambda a: aggregates.apply_add(a, data))
+            _live_commit(u, acc, live, lambda o: o.apply_add(data))
+        elif old is not None:
+            _agg_commit(u, acc, agg, lambda a: aggregates.apply_update(a, old, {**old, **data}))
+            _live_commit(u, acc, live, lambda o: o.apply_update(old, {**old, **data}))
+        else:  # ID inexistente (p.ej. borrado en otra sesión): sin efecto
+            _agg_commit(u, acc, agg, lambda a: a)
+            _live_commit(u, acc, live, lambda o: True)
+    return trade_id or data["ID"]
 
-def delete_trade(u, acc, index):
-    fp = os.path.join(DATA_DIR, u, f"{acc}.csv".replace(" ", "_"))
-    try:
-        df = pd.read_csv(fp)
-        df = df.drop(index)
-        df.to_csv(fp, index=False)
-        get_balance_data.clear()
-        return True
-    except: return False
+def delete_trade(u, acc, trade_id):
+    """Borrado por ID: una lápida en el journal (o DELETE indexado en SQLite)."""
+    fp = _trade_file(u, acc)
+    if not _sql() and not has_data(fp): return False
+    with account_lock(u, acc):
+        agg, live = _agg_prepare(u, acc), _live_prepare(u, acc)
+        old = _old_row(u, acc, trade_id) if agg is not None or any(live) else None
+        if _sql(): ok = db.delete_trade(_sql(), u, acc, trade_id)
+        else:
+            try:
+                journal_append(fp, {"op": "del", "id": trade_id}); ok = True
+            except: return False
+        _frames.invalidate((u, acc))
+        _agg_commit(u, acc, agg, lambda a: aggregates.apply_delete(a, old) if old is not None else a)
+        _live_commit(u, acc, live, lambda o: o.apply_delete(old) if old is not None else True)
+    return ok
+
+# --- Agregados por cuenta (balance, PnL, conteos, rachas) ---
+def _agg_file(u, acc):
+    folder = os.path.join(DATA_DIR, u)
+    os.makedirs(folder, exist_ok=True)
+    return os.path.join(folder, f"{acc}.agg.json".replace(" ", "_"))
+
+def _old_row(u, acc, trade_id):
+    """Fila del trade antes de escribir; None si no existe. Del frame cacheado si sigue
+    al día; si no, solo esa fila por ID (sin montar la cuenta ni recorrer sus IDs)."""
+    if trade_id is None: return None
+    hit = _frames.get((u, acc), trades_version(u, acc))
+    if hit is not None:
+        df = hit[0]
+        hits = (df["ID"] == trade_id).to_numpy().nonzero()[0] if not df.empty else []
+        return df.iloc[hits[0]].to_dict() if len(hits) else None
+    if _sql(): row = db.get_trade_details(_sql(), u, acc, trade_id, LIGHT_COLS)
+    else:
+        fp = _trade_file(u, acc)
+        row = load_details(fp, trade_id, LIGHT_COLS) if has_data(fp) else None
+    if row is None: return None
+    return apply_schema(pd.DataFrame([row]), LIGHT_COLS).iloc[0].to_dict()
+
+def _agg_prepare(u, acc):
+    """Registro actual si está al día con los trades; None si hay que reconstruirlo."""
+    agg = load_json(_agg_file(u, acc))
+    if not agg or agg.get("dirty") or agg.get("version") != str(trades_version(u, acc)): return None
+    if "open_tail" not in agg: return None   # registro anterior a open_tail (llevaba posiciones)
+    return agg
+
+def _agg_commit(u, acc, agg, step):
+    """Aplica el paso O(1) y sella el registro con la versión posterior a la escritura."""
+    if agg is not None: step(agg)
+    else: agg = dict(aggregates.empty(), dirty=True)
+    agg["version"] = str(trades_version(u, acc))
+    save_json(_agg_file(u, acc), agg)
+
+def rebuild_aggregates(u, acc):
+    """Reconstruye el registro desde el journal completo."""
+    with account_lock(u, acc):
+        version = str(trades_version(u, acc))
+        _, _, df = get_balance_data(u, acc)
+        agg = aggregates.rebuild(df); agg["version"] = version
+        save_json(_agg_file(u, acc), agg)
+    return agg
+
+def get_aggregates(u, acc):
+    agg = _agg_prepare(u, acc)
+    return agg if agg is not None else rebuild_aggregates(u, acc)
+
+def check_aggregates(u, acc, repair=False):
+    """Estado del registro frente al journal: (estado, campos desviados).
+    "missing" / "dirty" / "stale" (versión anterior) no son desvíos: la siguiente lectura
+    lo reconstruye. Solo un registro al día se compara campo a campo ("ok" / "drift").
+    Con repair=True se reconstruye si no está "ok"."""
+    with account_lock(u, acc):
+        agg = load_json(_agg_file(u, acc))
+        if not agg: state, bad = "missing", []
+        elif agg.get("dirty"): state, bad = "dirty", []
+        elif agg.get("version") != str(trades_version(u, acc)) or "open_tail" not in agg: state, bad = "stale", []
+        else:
+            bad = aggregates.check(agg, get_balance_data(u, acc)[2])
+            state = "drift" if bad else "ok"
+    if state != "ok" and repair: rebuild_aggregates(u, acc)
+    return state, bad
+
+# --- Índices en memoria por cuenta (curva de equity, rollups, edge por confluencia, texto) ---
+# Se construyen una vez por versión y cada escritura los actualiza en O(1) con
+# apply_add / apply_update / apply_delete; si un paso devuelve False se
+# descartan y se reconstruyen en la siguiente lectura.
+_curves = VersionedLRU(sizeof=lambda c: c.nbytes)
+_rollups = VersionedLRU(sizeof=lambda r: r.nbytes)
+_edges = VersionedLRU(sizeof=lambda e: e.nbytes)
+_texts = VersionedLRU(sizeof=lambda t: t.nbytes)
+_LIVE = (_curves, _rollups, _edges, _texts)
+
+def _live_version(u, acc):
+    return (trades_version(u, acc), _initial_balance(u, acc))
+
+def _live_get(cache, u, acc, build):
+    ver = _live_version(u, acc)
+    return cache.get_or_load((u, acc), ver, lambda: build(get_balance_data(u, acc)[2], ver[1]))
+
+def get_equity_curve(u, acc):
+    """EquityCurve de la cuenta (equity, pico, drawdown por trade cerrado)."""
+    return _live_get(_curves, u, acc, equity.EquityCurve.from_frame)
+
+def get_rollups(u, acc):
+    """RollupIndex de la cuenta (PnL / trades / wins por día, semana ISO y mes)."""
+    return _live_get(_rollups, u, acc, lambda df, ini: rollups.RollupIndex.from_frame(df))
+
+def get_edge(u, acc):
+    """EdgeIndex de la cuenta (win rate / expectativa / PF por tramo de confluencia, modo y par)."""
+    return _live_get(_edges, u, acc, lambda df, ini: edge.EdgeIndex.from_frame(df))
+
+# El índice de texto necesita Notas, que no están en el frame ligero
+_TEXT_COLS = ["ID", "Notas", *fulltext.FIELDS]
+
+def _load_texts(u, acc):
+    if _sql(): return db.load_trades(_sql(), u, acc, _TEXT_COLS)
+    fp = _trade_file(u, acc)
+    return load_journaled(fp, _TEXT_COLS) if has_data(fp) else empty_frame(_TEXT_COLS)
+
+def get_text_index(u, acc):
+    """TextIndex de la cuenta (Notas + campos de cada trade)."""
+    return _texts.get_or_load((u, acc), _live_version(u, acc), lambda: fulltext.TextIndex.from_frame(_load_texts(u, acc)))
+
+def _live_prepare(u, acc):
+    """Índices cacheados al día con los trades (None los que falten o estén obsoletos)."""
+    ver = _live_version(u, acc)
+    return [cache.get((u, acc), ver) for cache in _LIVE]
+
+def _live_commit(u, acc, live, step):
+    # Copy-on-write: el paso se aplica a una copia que se publica con la versión nueva;
+    # las sesiones que ya tienen la anterior la siguen leyendo intacta. El índice de
+    # texto se actualiza en sitio: sus lecturas y escrituras van bajo su propio lock.
+    ver = _live_version(u, acc)
+    for cache, obj in zip(_LIVE, live):
+        if obj is not None and cache is not _texts: obj = obj.copy()
+        if obj is not None and step(obj): cache.put((u, acc), ver, obj)
+        else: cache.invalidate((u, acc))
+
+# --- Consultas (Historial / Dashboard) ---
+# Índice del Historial por versión del journal (posiciones sobre el frame de get_balance_data)
+_search = VersionedLRU(sizeof=lambda ix: ix.nbytes)
+
+def get_search_index(u, acc):
+    return _search.get_or_load((u, acc), trades_version(u, acc), lambda: search.SearchIndex.from_frame(get_balance_data(u, acc)[2]))
+
+def query_trades(u, acc, pair=None, results=None, status=None, date_from=None, date_to=None, newest_first=True):
+    """Filtro del Historial: posiciones de fila (df.iloc) ordenadas por fecha, ver search.SearchIndex.query."""
+    return get_search_index(u, acc).query(pair, results, status, date_from, date_to, newest_first)
+
+def search_notes(u, acc, query, limit=20):
+    """Trades que mejor casan con query en Notas / análisis IA y campos (frame ligero + columna Score)."""
+    hits = dict(get_text_index(u, acc).search(query, limit))
+    df = get_balance_data(u, acc)[2]
+    out = df[df["ID"].isin(list(hits))].copy()
+    out["Score"] = out["ID"].map(hits).astype(float)
+    return out.sort_values("Score", ascending=False)
+
+# Análisis del brain file (global): se re-indexa cuando cambia el fichero
+_brain_texts = VersionedLRU(sizeof=lambda v: v[1].nbytes)
+
+def _build_brain_index():
+    brain = load_json(BRAIN_FILE)
+    return brain, fulltext.TextIndex.from_frame(fulltext.brain_frame(brain), text_col="analysis")
+
+def search_brain(query, limit=10):
+    """[(entrada del brain file, puntuación)] para query."""
+    brain, ix = _brain_texts.get_or_load("brain", file_version(BRAIN_FILE), _build_brain_index)
+    return [(brain[int(tid.split(":")[1])], score) for tid, score in ix.search(query, limit)]
+
+def get_account_stats(u, acc):
+    """Cifras de cabecera del Dashboard y del sidebar, leídas del registro precalculado."""
+    return aggregates.to_stats(get_aggregates(u, acc))
+
+# Estadísticas completas del Dashboard PRO, memoizadas por versión del journal
+_stats = VersionedLRU(sizeof=dict_nbytes)
+
+def get_dashboard_stats(u, acc):
+    """Bloque de estadísticas del Dashboard (ver analytics.compute_stats); se recalcula solo si cambian los trades."""
+    return _stats.get_or_load((u, acc), trades_version(u, acc), lambda: analytics.compute_stats(get_balance_data(u, acc)[2]))
+
+# PnL por sesión / zona prime (ver sessions.breakdown), memoizado igual
+_sessions = VersionedLRU(sizeof=dict_nbytes)
+
+def get_session_stats(u, acc):
+    return _sessions.get_or_load((u, acc), trades_version(u, acc), lambda: sessions.breakdown(get_balance_data(u, acc)[2]))
+
+# Portafolio: todas las cuentas del usuario, cargadas en paralelo (lecturas de
+# Parquet/SQLite liberan el GIL) y cacheado por las versiones de todas ellas
+PORTFOLIO_WORKERS = int(os.environ.get("TRADING_PORTFOLIO_WORKERS", 8))
+_portfolios = VersionedLRU(sizeof=lambda p: p["curve"].nbytes + frame_nbytes(p["table"]))
+
+def _load_accounts(u, accs):
+    with ThreadPoolExecutor(max_workers=max(1, min(PORTFOLIO_WORKERS, len(accs)))) as ex:
+        loaded = list(ex.map(lambda a: get_balance_data(u, a), accs))
+    return {a: (ini, df) for a, (ini, _, df) in zip(accs, loaded)}
+
+def get_portfolio(u):
+    """Tabla por cuenta, estadísticas y curva de equity conjuntas (ver portfolio.combine)."""
+    accs = get_user_accounts(u)
+    ver = tuple((a, *_live_version(u, a)) for a in accs)
+    return _portfolios.get_or_load(u, ver, lambda: portfolio.combine(_load_accounts(u, accs)))
+
+# MAE/MFE contra el almacén OHLC: depende de los trades y de las velas de tf
+_excursions = VersionedLRU(sizeof=lambda v: frame_nbytes(v[0]) + frame_nbytes(v[1]))
+
+def _load_notes(u, acc):
+    if _sql(): return db.load_trades(_sql(), u, acc, ["ID", "Notas"])
+    fp = _trade_file(u, acc)
+    return load_journaled(fp, ["ID", "Notas"]) if has_data(fp) else empty_frame(["ID", "Notas"])
+
+def _build_excursions(u, acc, tf):
+    from modules import excursion   # importa ohlc, que depende de este módulo
+    _, _, df = get_balance_data(u, acc)
+    notas = None
+    if {"Entry", "SL", "TP"} - set(df.columns) or df[["Entry", "SL", "TP"]].isna().any(axis=None):
+        # Trades anteriores a las columnas de niveles: se leen de la línea "Entry | SL | TP" de Notas
+        notas = _load_notes(u, acc).set_index("ID")["Notas"].reindex(df["ID"]).to_numpy()
+    exc = excursion.excursions(df, tf=tf, notas=notas)
+    return exc, excursion.summary(exc, df)
+
+def get_excursions(u, acc, tf="1H"):
+    """(MAE/MFE/salida/R por trade alineado con get_balance_data, resumen por Resultado)."""
+    from modules import ohlc
+    ver = (*_live_version(u, acc), ohlc.store.version(tf))
+    return _excursions.get_or_load((u, acc, tf), ver, lambda: _build_excursions(u, acc, tf))
+
+def simulate_account(u, acc, mode="pnl", balance=None, **kw):
+    """Monte Carlo sobre los trades cerrados de la cuenta (ver montecarlo.simulate); None si no hay cerrados."""
+    _, act, df = get_balance_data(u, acc)
+    pnl, r = montecarlo.samples_from_frame(df)
+    return montecarlo.simulate(r if mode == "r" else pnl, mode=mode, balance=act if balance is None else balance, **kw)
+
+def migrate_to_sqlite():
+    """Importa usuarios, cuentas y trades de los ficheros a trading.db (una sola vez al cambiar de backend).
+    Desde la raíz del proyecto: python -m modules.data migrate; después arrancar con TRADING_BACKEND=sqlite."""
+    accounts = _accounts.snapshot()
+    def load_df(u, acc):
+        fp = _trade_file(u, acc)
+        return load_journaled(fp, TRADE_COLS) if has_data(fp) else empty_frame()
+    db.import_files(db.get_conn(DB_FILE), _users.snapshot(), accounts, load_df)
 
 def create_backup_zip():
     shutil.make_archive("backup_trading", 'zip', DATA_DIR)
     return "backup_trading.zip"
 
+if __name__ == "__main__":
+    import sys
+    if sys.argv[1:] != ["migrate"]: sys.exit("Uso: python -m modules.data migrate")
+    init_filesystem()
+    migrate_to_sqlite()
+    print(f"Migrado a {DB_FILE}")
@@ -0,0 +1,155 @@
+import sqlite3
+import threading
+import pandas as pd
+from modules.schema import TRADE_COLS as TRADE_FIELDS
+
+# --- BACKEND SQLITE ---
+# Mismas operaciones que el backend de ficheros (CSV + JSON), pero con índices
+# reales y WAL: muchas sesiones leen mientras una escribe.
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    user TEXT PRIMARY KEY,
+    password TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS accounts (
+    user TEXT NOT NULL,
+    account TEXT NOT NULL,
+    balance REAL NOT NULL DEFAULT 0,
+    version INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (user, account)
+);
+CREATE TABLE IF NOT EXISTS trades (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user TEXT NOT NULL,
+    account TEXT NOT NULL,
+    trade_id TEXT,
+    Fecha TEXT, Par TEXT, Direccion TEXT, Status TEXT, Resultado TEXT,
+    Dinero REAL DEFAULT 0, Ratio REAL, Notas TEXT,
+    Img_Antes TEXT, Img_Despues TEXT, Confluencia REAL, Modo TEXT,
+    Entry REAL, SL REAL, TP REAL
+);
+CREATE INDEX IF NOT EXISTS ix_trades_acc ON trades(user, account, id);
+CREATE INDEX IF NOT EXISTS ix_trades_par ON trades(user, account, Par);
+CREATE INDEX IF NOT EXISTS ix_trades_fecha ON trades(user, account, Fecha);
+CREATE INDEX IF NOT EXISTS ix_trades_res ON trades(user, account, Resultado);
+"""
+
+_local = threading.local()
+
+# "ID" del DataFrame = columna trade_id (SQLite no distingue "ID" de la clave "id")
+def _col(f): return "trade_id" if f == "ID" else f
+def _select(fields): return ", ".join("trade_id AS ID" if f == "ID" else f for f in fields)
+
+# Esquema y migraciones: una sola vez por proceso y fichero, no en cada conexión
+_ready = set()
+_ready_lock = threading.Lock()
+
+def _migrate(conn):
+    conn.executescript(SCHEMA)
+    try: conn.execute("ALTER TABLE accounts ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+    except sqlite3.OperationalError: pass  # ya existe
+    try: conn.execute("ALTER TABLE trades ADD COLUMN trade_id TEXT")
+    except sqlite3.OperationalError: pass
+    for col in ("Modo TEXT", "Entry REAL", "SL REAL", "TP REAL"):
+        try: conn.execute(f"ALTER TABLE trades ADD COLUMN {col}")
+        except sqlite3.OperationalError: pass
+    with conn:
+        # IDs estables para filas anteriores a la columna
+        conn.execute("UPDATE trades SET trade_id = printf('%011x', id) || lower(hex(randomblob(2))) WHERE trade_id IS NULL")
+        conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS ix_trades_tid ON trades(user, account, trade_id)")
+
+def get_conn(path):
+    """Una conexión por hilo (Streamlit ejecuta cada sesión en su propio hilo)."""
+    conns = getattr(_local, "conns", None)
+    if conns is None: conns = _local.conns = {}
+    if path not in conns:
+        conn = sqlite3.connect(path, timeout=5)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        if path not in _ready:
+            with _ready_lock:
+                if path not in _ready:
+                    _migrate(conn); _ready.add(path)
+        conns[path] = conn
+    return conns[path]
+
+# --- Usuarios y cuentas ---
+def verify_user(conn, u, p):
+    row = conn.execute("SELECT password FROM users WHERE user=?", (u,)).fetchone()
+    return row is not None and row[0] == p
+
+def register_user(conn, u, p):
+    with conn: conn.execute("INSERT OR REPLACE INTO users(user, password) VALUES (?, ?)", (u, p))
+
+def get_user_accounts(conn, u):
+    rows = conn.execute("SELECT account FROM accounts WHERE user=? ORDER BY rowid", (u,)).fetchall()
+    return [r[0] for r in rows]
+
+def get_account_balance(conn, u, acc):
+    row = conn.execute("SELECT balance FROM accounts WHERE user=? AND account=?", (u, acc)).fetchone()
+    return row[0] if row else 0.0
+
+def create_account(conn, u, name, bal):
+    with conn:
+        conn.execute("""INSERT INTO accounts(user, account, balance) VALUES (?, ?, ?)
+                        ON CONFLICT(user, account) DO UPDATE SET balance = excluded.balance""", (u, name, bal))
+
+def account_version(conn, u, acc):
+    """Contador de escrituras de la cuenta (clave de caché)."""
+    row = conn.execute("SELECT version FROM accounts WHERE user=? AND account=?", (u, acc)).fetchone()
+    return row[0] if row else 0
+
+def _bump(conn, u, acc):
+    conn.execute("""INSERT INTO accounts(user, account, version) VALUES (?, ?, 1)
+                    ON CONFLICT(user, account) DO UPDATE SET version = version + 1""", (u, acc))
+
+# --- Trades ---
+def load_trades(conn, u, acc, cols=TRADE_FIELDS):
+    """Trades de la cuenta; cols permite no leer Notas/imágenes."""
+    return pd.read_sql_query(f"SELECT {_select(cols)} FROM trades WHERE user=? AND account=? ORDER BY id", conn, params=(u, acc))
+
+def get_trade_details(conn, u, acc, trade_id, cols):
+    row = conn.execute(f"SELECT {_select(cols)} FROM trades WHERE user=? AND account=? AND trade_id=?", (u, acc, trade_id)).fetchone()
+    return dict(zip(cols, row)) if row else None
+
+def insert_trade(conn, u, acc, data):
+    keys = [k for k in data if k in TRADE_FIELDS]
+    fields = ["user", "account"] + [_col(k) for k in keys]
+    vals = [u, acc] + [data[k] for k in keys]
+    with conn:
+        conn.execute(f"INSERT INTO trades({', '.join(fields)}) VALUES ({', '.join('?' * len(fields))})", vals)
+        _bump(conn, u, acc)
+
+def update_trade(conn, u, acc, trade_id, data):
+    fields = [k for k in data if k in TRADE_FIELDS and k != "ID"]
+    if not fields: return False
+    with conn:
+        cur = conn.execute(f"UPDATE trades SET {', '.join(f + '=?' for f in fields)} WHERE user=? AND account=? AND trade_id=?",
+                           [data[f] for f in fields] + [u, acc, trade_id])
+        if cur.rowcount: _bump(conn, u, acc)
+    return cur.rowcount > 0
+
+def delete_trade(conn, u, acc, trade_id):
+    with conn:
+        cur = conn.execute("DELETE FROM trades WHERE user=? AND account=? AND trade_id=?", (u, acc, trade_id))
+        if cur.rowcount: _bump(conn, u, acc)
+    return cur.rowcount > 0
+
+# --- Migración desde ficheros ---
+def import_files(conn, users, accounts, load_df):
+    """Vuelca users.json, accounts_config.json y los CSV de cada cuenta a la base de datos."""
+    with conn:
+        conn.executemany("INSERT OR REPLACE INTO users(user, password) VALUES (?, ?)", list(users.items()))
+        for u, accs in accounts.items():
+            for acc, bal in accs.items():
+                conn.execute("""INSERT INTO accounts(user, account, balance) VALUES (?, ?, ?)
+                                ON CONFLICT(user, account) DO UPDATE SET balance = excluded.balance""", (u, acc, bal))
+                conn.execute("DELETE FROM trades WHERE user=? AND account=?", (u, acc))
+                _bump(conn, u, acc)
+                df = load_df(u, acc)
+                if df.empty: continue
+                df = df[[c for c in TRADE_FIELDS if c in df.columns]].astype(object).where(df.notna(), None)
+                cols = [_col(c) for c in df.columns]
+                conn.executemany(f"INSERT INTO trades(user, account, {', '.join(cols)}) VALUES (?, ?, {', '.join('?' for _ in cols)})",
+                                 [(u, acc, *r) for r in df.itertuples(index=False, name=None)])
@@ -0,0 +1,114 @@
+import numpy as np
+import pandas as pd
+from modules.schema import num
+
+# --- EDGE POR CONFLUENCIA ---
+# Win rate, expectativa y profit factor de los trades cerrados por tramo de
+# puntuación del checklist (0-9, 10-19, ... 90-100), en total, por modo
+# (Swing / Scalping) y por par. Son sumas por celda: cerrar, editar o borrar
+# un trade suma/resta su aportación en O(1) (mismo contrato que rollups).
+BUCKET = 10
+MIN_TRADES = 5   # muestra mínima para fiarse de una celda
+_FIELDS = ("closed", "wins", "pnl", "gross_win", "gross_loss")
+
+def bucket_of(score):
+    """Tramo de la puntuación: 0, 10, ..., 90 (100 cae en 90)."""
+    s = num(score, None)
+    return None if s is None else int(min(max(s, 0), 100 - BUCKET) // BUCKET * BUCKET)
+
+def label(b): return f"{b}-{b + BUCKET - 1}" if b < 100 - BUCKET else f"{b}-100"
+
+def _empty(): return {"closed": 0, "wins": 0, "pnl": 0.0, "gross_win": 0.0, "gross_loss": 0.0}
+
+def _stats(c):
+    c = c or _empty()
+    n = c["closed"]
+    return {"trades": n, "win_rate": c["wins"] / n * 100 if n else 0.0, "expectancy": c["pnl"] / n if n else 0.0,
+            "profit_factor": c["gross_win"] / c["gross_loss"] if c["gross_loss"] > 0 else c["gross_win"], "pnl": c["pnl"]}
+
+class EdgeIndex:
+    def __init__(self):
+        self.cells = {}  # (dimensión, clave, tramo) -> contadores; dimensión: "all" / "mode" / "pair"
+
+    @classmethod
+    def from_frame(cls, df):
+        e = cls()
+        closed = df[df["Status"] == "CLOSED"]
+        if closed.empty: return e
+        conf = pd.to_numeric(closed["Confluencia"], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+        ok = ~np.isnan(conf)
+        d = pd.to_numeric(closed["Dinero"], errors="coerce").fillna(0.0).to_numpy(dtype=np.float64)
+        win = (closed["Resultado"] == "WIN").to_numpy(dtype=bool)
+        t = pd.DataFrame({
+            "bucket": (np.clip(conf, 0, 100 - BUCKET) // BUCKET * BUCKET)[ok].astype(int),
+            "mode": closed["Modo"].astype(object).to_numpy()[ok] if "Modo" in closed else None,
+            "pair": closed["Par"].astype(object).to_numpy()[ok],
+            "closed": 1, "wins": win[ok].astype(int), "pnl": d[ok],
+            "gross_win": np.where(win, d, 0.0)[ok],
+            "gross_loss": np.where((closed["Resultado"] == "LOSS").to_numpy(dtype=bool), -d, 0.0)[ok],
+        })
+        t["all"] = None
+        for dim in ("all", "mode", "pair"):
+            g = t.groupby([dim, "bucket"], dropna=dim != "all")[list(_FIELDS)].sum()
+            for (key, b), vals in zip(g.index, zip(*(g[f].tolist() for f in _FIELDS))):
+                e.cells[(dim, None if dim == "all" else key, int(b))] = dict(zip(_FIELDS, vals))
+        return e
+
+    def copy(self):
+        """Copia para escribir (copy-on-write en data._live_commit): dict nuevo, celdas compartidas."""
+        e = EdgeIndex()
+        e.cells = dict(self.cells)
+        return e
+
+    def _contrib(self, row, sign):
+        if row.get("Status") != "CLOSED": return
+        b = bucket_of(row.get("Confluencia"))
+        if b is None: return
+        d = num(row.get("Dinero"))
+        res = row.get("Resultado")
+        delta = {"closed": sign, "wins": sign * (res == "WIN"), "pnl": sign * d,
+                 "gross_win": sign * d if res == "WIN" else 0.0, "gross_loss": -sign * d if res == "LOSS" else 0.0}
+        keys = [("all", None, b)]
+        # Par / Modo vacíos (NaN en el frame tipado) solo cuentan en el total, como en from_frame
+        keys += [(dim, row.get(col), b) for dim, col in (("pair", "Par"), ("mode", "Modo")) if isinstance(row.get(col), str) and row.get(col)]
+        for k in keys:
+            c = dict(self.cells.get(k) or _empty())
+            for f, v in delta.items(): c[f] += v
+            if c["closed"] > 0: self.cells[k] = c
+            else: self.cells.pop(k, None)
+
+    def apply_add(self, row):
+        self._contrib(row, 1); return True
+
+    def apply_update(self, old, new):
+        self._contrib(old, -1); self._contrib(new, 1); return True
+
+    def apply_delete(self, old):
+        self._contrib(old, -1); return True
+
+    @property
+    def nbytes(self):
+        return 300 * len(self.cells)
+
+    def table(self, dim="all", key=None):
+        """Tabla por tramo (filas) con trades, win rate, expectativa, PF y PnL."""
+        rows = {label(b): _stats(c) for (d, k, b), c in sorted(self.cells.items(), key=lambda kv: kv[0][2]) if d == dim and k == key}
+        return pd.DataFrame.from_dict(rows, orient="index").rename_axis("Confluencia")
+
+    def keys(self, dim):
+        return sorted({k for d, k, _ in self.cells if d == dim and k is not None})
+
+    def edge_for(self, score, mode=None, pair=None, min_trades=MIN_TRADES):
+        """Edge histórico del tramo de score: par, si hay muestra; si no, modo; si no, total."""
+        b = bucket_of(score)
+        if b is None: return None
+        for dim, key in (("pair", pair), ("mode", mode), ("all", None)):
+            if dim != "all" and not key: continue
+            st = _stats(self.cells.get((dim, key, b)))
+            if st["trades"] >= min_trades or dim == "all": return dict(st, source=dim, key=key, bucket=label(b), verdict=_verdict(st, min_trades))
+
+def _verdict(st, min_trades):
+    """Etiqueta del HUD según el histórico del tramo; None si no hay muestra suficiente."""
+    if st["trades"] < min_trades: return None
+    if st["expectancy"] > 0 and st["profit_factor"] >= 1.5: return "SNIPER"
+    return "VÁLIDO" if st["expectancy"] > 0 else "ESPERAR"
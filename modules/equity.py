@@ -0,0 +1,167 @@
+import threading
+import numpy as np
+import pandas as pd
+from modules.schema import parse_dates, num
+
+# --- CURVA DE EQUITY Y DRAWDOWN ---
+# Un punto por trade cerrado, en el orden del journal: equity (inicial + PnL
+# acumulado), pico corriente, drawdown en $ y % y tiempo bajo el agua desde el
+# último pico: días según Fecha (antes del primer máximo, desde el primer
+# trade cerrado) y nº de trades. Cerrar un trade posterior al último punto es un append O(1)
+# (buffers que doblan su capacidad); lo demás obliga a reconstruir, como en
+# aggregates. Los gráficos se sirven reducidos con LTTB.
+MAX_POINTS = 1500
+_FIELDS = {"Fecha": "datetime64[ns]", "pnl": "float64", "equity": "float64", "peak": "float64",
+           "dd": "float64", "dd_pct": "float64", "underwater_days": "float64", "underwater_trades": "int64"}
+_DAY = np.timedelta64(1, "D")
+
+def _date(v):
+    try: return np.datetime64(pd.to_datetime(v, format="ISO8601"), "ns")
+    except: return np.datetime64("NaT", "ns")
+
+class EquityCurve:
+    def __init__(self, ini=0.0, capacity=64):
+        self.ini = float(ini)
+        self.n = 0            # puntos (trades cerrados)
+        self.open_tail = []   # IDs de los trades posteriores al último cerrado (abiertos), en orden
+        self.max_dd = self.max_dd_pct = 0.0
+        self.max_underwater_days, self.max_underwater_trades = 0.0, 0
+        self._peak_at = np.datetime64("NaT", "ns")   # Fecha del último máximo (referencia de los días)
+        self._buf = {k: np.empty(capacity, t) for k, t in _FIELDS.items()}
+        self._plot = None     # (n, max_points, frame) del último plot_frame
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_frame(cls, df, ini=0.0):
+        """Construcción vectorizada desde el DataFrame de trades de la cuenta."""
+        closed = (df["Status"] == "CLOSED").to_numpy(dtype=bool)
+        pnl = pd.to_numeric(df["Dinero"], errors="coerce").to_numpy(dtype=np.float64, na_value=0.0)[closed]
+        c = cls(ini, capacity=max(64, 2 * len(pnl)))
+        n = len(pnl)
+        eq = c.ini + np.cumsum(pnl)
+        peak = np.maximum.accumulate(np.concatenate(([c.ini], eq)))[1:]
+        dd = eq - peak
+        # Trades desde el último punto en máximos (el balance inicial cuenta como pico)
+        i = np.arange(n)
+        uw = i - np.maximum.accumulate(np.where(dd >= 0, i, -1))
+        # Días desde la Fecha del último máximo (sin máximo aún: la del primer trade; NaT -> NaN)
+        fechas = parse_dates(df["Fecha"]).to_numpy(dtype="datetime64[ns]")[closed]
+        anchor = np.maximum.accumulate(np.where(dd >= 0, i, 0))
+        days = np.maximum((fechas - fechas[anchor]) / _DAY, 0.0) if n else np.zeros(0)
+        cols = {"Fecha": fechas, "pnl": pnl, "equity": eq, "peak": peak, "dd": dd, "dd_pct": _pct(dd, peak),
+                "underwater_days": days, "underwater_trades": uw}
+        for k, v in cols.items(): c._buf[k][:n] = v
+        c.n = n
+        if "ID" in df: c.open_tail = df["ID"].iloc[closed.nonzero()[0][-1] + 1 if n else 0:].tolist()
+        if n:
+            c.max_dd, c.max_dd_pct, c.max_underwater_trades = float(dd.min()), float(cols["dd_pct"].min()), int(uw.max())
+            c.max_underwater_days = float(np.nanmax(days)) if np.isfinite(days).any() else 0.0
+            c._peak_at = fechas[anchor[-1]]
+        return c
+
+    def copy(self):
+        """Copia para escribir (copy-on-write en data._live_commit). Comparte los buffers:
+        la copia solo escribe a partir de n, fuera de lo que ve el original."""
+        c = EquityCurve(self.ini, capacity=0)
+        c.__dict__.update(self.__dict__)
+        c._buf, c._plot, c._lock = dict(self._buf), None, threading.Lock()
+        c.open_tail = list(self.open_tail)
+        return c
+
+    def _append(self, fecha, pnl):
+        with self._lock:
+            if self.n == len(self._buf["equity"]):
+                for k, v in self._buf.items():
+                    grown = np.empty(2 * len(v), v.dtype); grown[:self.n] = v[:self.n]; self._buf[k] = grown
+            b, j = self._buf, self.n
+            prev_eq, prev_peak = (b["equity"][j - 1], b["peak"][j - 1]) if j else (self.ini, self.ini)
+            eq = float(prev_eq) + pnl; peak = max(float(prev_peak), eq); dd = eq - peak
+            uw = 0 if dd >= 0 else (b["underwater_trades"][j - 1] if j else 0) + 1
+            if dd >= 0 or not j: self._peak_at = fecha
+            days = float(np.maximum((fecha - self._peak_at) / _DAY, 0.0))
+            dd_pct = float(_pct(np.array([dd]), np.array([peak]))[0])
+            for k, v in (("Fecha", fecha), ("pnl", pnl), ("equity", eq), ("peak", peak), ("dd", dd), ("dd_pct", dd_pct),
+                         ("underwater_days", days), ("underwater_trades", uw)):
+                b[k][j] = v
+            self.n += 1
+            self.max_dd, self.max_dd_pct = min(self.max_dd, dd), min(self.max_dd_pct, dd_pct)
+            self.max_underwater_trades = max(self.max_underwater_trades, int(uw))
+            if days > self.max_underwater_days: self.max_underwater_days = days   # NaN (sin Fecha) no cuenta
+
+    # Pasos incrementales (mismo contrato que aggregates.apply_*): devuelven
+    # False si la curva ya no se puede actualizar en O(1) y hay que reconstruirla.
+    def apply_add(self, row):
+        if row.get("Status") != "CLOSED": self.open_tail.append(row.get("ID")); return True
+        self._append(_date(row.get("Fecha")), num(row.get("Dinero"))); self.open_tail = []
+        return True
+
+    def apply_update(self, old, new):
+        was, now = old.get("Status") == "CLOSED", new.get("Status") == "CLOSED"
+        if not was and not now: return True
+        tid = old.get("ID")
+        if not was and now and tid in self.open_tail:
+            # Posterior al último cerrado: append; los abiertos anteriores a él quedan atrás
+            self._append(_date(new.get("Fecha")), num(new.get("Dinero")))
+            self.open_tail = self.open_tail[self.open_tail.index(tid) + 1:]; return True
+        return was and now and num(old.get("Dinero")) == num(new.get("Dinero")) and _date(old.get("Fecha")) == _date(new.get("Fecha"))
+
+    def apply_delete(self, old):
+        if old.get("Status") == "CLOSED": return False
+        if old.get("ID") in self.open_tail: self.open_tail.remove(old.get("ID"))
+        return True
+
+    @property
+    def nbytes(self):
+        return sum(v.nbytes for v in self._buf.values())
+
+    def frame(self, idx=None):
+        """Serie completa (o solo las posiciones idx) como DataFrame; incluye el nº de trade."""
+        with self._lock:
+            sel = slice(0, self.n) if idx is None else idx
+            out = pd.DataFrame({k: v[sel].copy() for k, v in self._buf.items()})
+        out.insert(0, "Trade", np.arange(1, self.n + 1)[sel])
+        return out
+
+    def summary(self):
+        with self._lock:
+            b, j = self._buf, self.n - 1
+            cur = {k: float(b[k][j]) for k in ("equity", "peak", "dd", "dd_pct")} if self.n else \
+                  {"equity": self.ini, "peak": self.ini, "dd": 0.0, "dd_pct": 0.0}
+            return dict(cur, underwater_days=float(b["underwater_days"][j]) if self.n else 0.0,
+                        underwater_trades=int(b["underwater_trades"][j]) if self.n else 0,
+                        max_dd=self.max_dd, max_dd_pct=self.max_dd_pct, max_underwater_days=self.max_underwater_days,
+                        max_underwater_trades=self.max_underwater_trades, points=self.n)
+
+    def plot_frame(self, max_points=MAX_POINTS):
+        """Serie reducida para el gráfico: LTTB sobre la equity y sobre el drawdown, más el máximo y el peor valle."""
+        with self._lock:
+            n = self.n
+            if self._plot and self._plot[:2] == (n, max_points): return self._plot[2]
+            eq, dd = self._buf["equity"][:n], self._buf["dd"][:n]
+            if n <= max_points: idx = np.arange(n)
+            else:
+                x = np.arange(n, dtype=np.float64)
+                idx = np.union1d(np.union1d(lttb(x, eq, max_points // 2), lttb(x, dd, max_points // 2)), [eq.argmax(), dd.argmin()])
+        out = self.frame(idx)
+        self._plot = (n, max_points, out)
+        return out
+
+def _pct(dd, peak):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(peak > 0, dd / peak * 100, 0.0)
+
+def lttb(x, y, n_out):
+    """Largest-Triangle-Three-Buckets: índices de los n_out puntos que mejor conservan la forma de (x, y)."""
+    n = len(x)
+    if n_out >= n or n_out < 3: return np.arange(n)
+    idx = np.empty(n_out, np.int64); idx[0], idx[-1] = 0, n - 1
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], max(edges[i + 1], edges[i] + 1)
+        nlo, nhi = edges[i + 1], (edges[i + 2] if i + 2 < len(edges) else n)
+        ax, ay = x[nlo:max(nhi, nlo + 1)].mean(), y[nlo:max(nhi, nlo + 1)].mean()
+        # Área del triángulo (punto elegido anterior, candidato, media del siguiente bucket)
+        area = np.abs((x[a] - ax) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (ay - y[a]))
+        a = lo + int(area.argmax()); idx[i + 1] = a
+    return idx
@@ -0,0 +1,124 @@
+import numpy as np
+import pandas as pd
+from modules import ohlc
+from modules.instruments import TABLE
+from modules.schema import parse_dates
+
+# --- MAE / MFE CONTRA VELAS LOCALES ---
+# Para cada trade cerrado se recorren las velas del almacén OHLC desde la vela
+# de entrada hasta que toca SL o TP (o se acaba el horizonte / los datos):
+#   - MAE / MFE: máxima excursión adversa / favorable hasta la salida, en R
+#     (distancia Entry-SL) y en pips;
+#   - Salida (SL / TP / ABIERTO), horas hasta ella y R realizado (TP -> R:R del
+#     trade, SL -> -1, sin tocar ninguno -> cierre de la última vela).
+# Si una misma vela toca SL y TP se cuenta SL (no se sabe el orden dentro de la vela).
+# Todo en bloque por símbolo: una ventana (trades x velas) sacada del memmap
+# con índices, en lotes para acotar la memoria.
+HORIZON_BARS = 24 * 30          # un mes de velas de 1H
+_BLOCK_CELLS = 2_000_000        # celdas por lote (trades x velas)
+_LEVELS = r"Entry:\s*([-+0-9.eE]+)\s*\|\s*SL:\s*([-+0-9.eE]+)\s*\|\s*TP:\s*([-+0-9.eE]+)"
+OUT_COLS = ["MAE_R", "MFE_R", "MAE_pips", "MFE_pips", "Salida", "Horas", "R"]
+
+def parse_levels(notas):
+    """Entry/SL/TP desde la primera línea de Notas ("Entry: x | SL: y | TP: z") -> DataFrame float."""
+    lv = pd.Series(notas, dtype=object).astype(str).str.extract(_LEVELS)
+    lv.columns = ["Entry", "SL", "TP"]
+    return lv.apply(pd.to_numeric, errors="coerce")
+
+def levels(df, notas=None):
+    """Entry/SL/TP de df; los vacíos (trades anteriores a las columnas) se leen de notas."""
+    lv = pd.DataFrame({c: pd.to_numeric(df[c], errors="coerce") if c in df else np.nan for c in ("Entry", "SL", "TP")}, index=df.index)
+    if notas is not None:
+        miss = lv.isna().any(axis=1).to_numpy()
+        if miss.any(): lv.loc[miss] = lv.loc[miss].fillna(parse_levels(np.asarray(notas, dtype=object)[miss]).set_axis(lv.index[miss]))
+    return lv
+
+def scan_exits(bars, tf, entry_s, entry, sl, tp, long, horizon):
+    """Trades de un símbolo contra sus velas. Devuelve arrays (mae, mfe, salida, horas, precio de salida)."""
+    n = len(entry)
+    mae, mfe, hours, exit_px = (np.full(n, np.nan) for _ in range(4))
+    exit_code = np.full(n, -1, np.int8)                       # -1 sin datos, 0 abierto, 1 SL, 2 TP
+    t = bars["t"]
+    first = np.searchsorted(t, entry_s, side="right") - 1     # vela que contiene la entrada
+    ok = (first >= 0) & (entry_s < t[-1] + ohlc.TIMEFRAMES[tf]) if len(t) else np.zeros(n, bool)
+    width = np.arange(horizon)
+    step = max(1, _BLOCK_CELLS // horizon)
+    for lo in range(0, n, step):
+        rows = np.arange(lo, min(n, lo + step))
+        rows = rows[ok[rows]]
+        if not len(rows): continue
+        idx = first[rows, None] + width
+        inside = idx < len(t)
+        idx = np.minimum(idx, len(t) - 1)
+        hi, lw = bars["high"][idx], bars["low"][idx]
+        e, s, p, lg = entry[rows, None], sl[rows, None], tp[rows, None], long[rows, None]
+        adverse = np.where(lg, e - lw, hi - e)
+        favor = np.where(lg, hi - e, e - lw)
+        hit_sl = inside & np.where(lg, lw <= s, hi >= s)
+        hit_tp = inside & np.where(lg, hi >= p, lw <= p)
+        # Primera vela con SL / TP (horizon si no toca)
+        j_sl = np.where(hit_sl.any(1), hit_sl.argmax(1), horizon)
+        j_tp = np.where(hit_tp.any(1), hit_tp.argmax(1), horizon)
+        last = inside.sum(1) - 1
+        j = np.minimum(np.minimum(j_sl, j_tp), last)
+        code = np.where(j_sl <= j, 1, np.where(j_tp <= j, 2, 0))
+        # Hasta la salida; en la vela del SL solo cuenta el SL y en la del TP la favorable es el TP
+        upto = width <= j[:, None]
+        before = width < j[:, None]
+        stop_d, tp_d = np.abs(e - s)[:, 0], np.abs(p - e)[:, 0]
+        worst = np.maximum(np.where(upto, adverse, -np.inf).max(1), 0)
+        best = np.maximum(np.where(np.where(code[:, None] == 0, upto, before), favor, -np.inf).max(1), 0)
+        mae[rows] = np.where(code == 1, stop_d, worst)
+        mfe[rows] = np.where(code == 2, np.maximum(best, tp_d), best)
+        close_j = bars["close"][idx[np.arange(len(rows)), j]]
+        exit_px[rows] = np.where(code == 1, s[:, 0], np.where(code == 2, p[:, 0], close_j))
+        exit_code[rows] = code
+        bar_t = t[idx[np.arange(len(rows)), j]]
+        hours[rows] = np.where(code > 0, np.maximum(bar_t - entry_s[rows], 0) / 3600, np.nan)
+    return mae, mfe, exit_code, hours, exit_px
+
+def excursions(df, store=None, tf="1H", notas=None, horizon=HORIZON_BARS):
+    """DataFrame (índice de df) con OUT_COLS para los trades cerrados con niveles válidos.
+
+    df: frame de trades (Fecha en UTC, Par, Direccion, Status, Entry/SL/TP);
+    notas: Notas alineadas con df para los trades sin niveles guardados."""
+    store = store or ohlc.store
+    out = pd.DataFrame(index=df.index, columns=OUT_COLS, dtype=float)
+    out["Salida"] = None
+    if df.empty: return out
+    lv = levels(df, notas)
+    entry, sl, tp = (lv[c].to_numpy(np.float64) for c in ("Entry", "SL", "TP"))
+    # Dirección: la guardada; si falta, la que implica el SL
+    dir_txt = df["Direccion"].astype(str).str.upper()
+    long = np.where(dir_txt.str.startswith("LONG"), True, np.where(dir_txt.str.startswith("SHORT"), False, sl < entry))
+    fecha = parse_dates(df["Fecha"]).to_numpy(dtype="datetime64[s]")
+    valid = ((df["Status"].astype(object) == "CLOSED").to_numpy() & ~np.isnat(fecha)
+             & np.isfinite(entry) & np.isfinite(sl) & np.isfinite(tp) & (np.where(long, sl < entry, sl > entry)))
+    entry_s = fecha.astype(np.int64)
+    pip = TABLE["pip"].reindex(df["Par"].astype(object)).to_numpy(np.float64)
+    par = df["Par"].astype(object).to_numpy()
+    res = {k: np.full(len(df), np.nan) for k in ("mae", "mfe", "hours", "px")}
+    code = np.full(len(df), -1, np.int8)
+    for sym in pd.unique(par[valid]):
+        rows = np.flatnonzero(valid & (par == sym))
+        bars = store.bars(sym, tf)
+        if not len(bars): continue
+        mae, mfe, c, h, px = scan_exits(bars, tf, entry_s[rows], entry[rows], sl[rows], tp[rows], long[rows], horizon)
+        res["mae"][rows], res["mfe"][rows], res["hours"][rows], res["px"][rows], code[rows] = mae, mfe, h, px, c
+    risk = np.abs(entry - sl)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out["MAE_R"], out["MFE_R"] = res["mae"] / risk, res["mfe"] / risk
+        out["MAE_pips"], out["MFE_pips"] = res["mae"] / pip, res["mfe"] / pip
+        out["R"] = np.where(long, res["px"] - entry, entry - res["px"]) / risk
+    out["Horas"] = res["hours"]
+    out["Salida"] = np.array([None, "ABIERTO", "SL", "TP"], dtype=object)[code + 1]
+    return out
+
+def summary(exc, df):
+    """Medias por Resultado del journal (WIN/LOSS/BE) de lo calculado."""
+    ok = exc["Salida"].notna()
+    if not ok.any(): return pd.DataFrame(columns=["Trades", "MAE_R", "MFE_R", "R", "Horas", "% SL", "% TP"])
+    g = exc[ok].assign(Resultado=df.loc[ok, "Resultado"].astype(object),
+                       **{"% SL": (exc["Salida"] == "SL") * 100.0, "% TP": (exc["Salida"] == "TP") * 100.0})
+    return g.groupby("Resultado").agg(**{"Trades": ("R", "size"), "MAE_R": ("MAE_R", "mean"), "MFE_R": ("MFE_R", "mean"),
+                                         "R": ("R", "mean"), "Horas": ("Horas", "median"), "% SL": ("% SL", "mean"), "% TP": ("% TP", "mean")})
@@ -0,0 +1,172 @@
+import re
+import threading
+import unicodedata
+from array import array
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+
+# --- BÚSQUEDA DE TEXTO (NOTAS Y ANÁLISIS IA) ---
+# Índice invertido con ranking BM25. Tokens: minúsculas sin acentos, sin
+# stopwords ES/EN ni números sueltos (precios) y con el plural simple quitado
+# ("velas" = "vela", "trades" = "trade").
+# Cada trade son dos documentos internos que puntúan juntos: sus Notas y sus
+# campos (par, resultado, dirección, estado, modo), así "GBPJPY LOSS" también
+# encuentra trades y cambiar el resultado no obliga a re-tokenizar las notas.
+# Las altas añaden al final de los postings (array por término); cambios y
+# borrados marcan el documento viejo como muerto. Con demasiados muertos el
+# índice pide reconstrucción (apply_* devuelve False, como EquityCurve).
+K1, B = 1.2, 0.75
+FIELDS = ("Par", "Resultado", "Direccion", "Status", "Modo")
+_WORD = re.compile(r"[0-9]*[a-z][a-z0-9]*")   # palabras con alguna letra: los números sueltos (precios) no entran
+STOPWORDS = frozenset("""
+a al algo ante antes como con contra cual cuando de del desde donde durante e el ella ellas ellos en entre era es esa
+ese eso esta este esto estos hay la las le les lo los mas me mi mientras muy ni no nos o os otra otro para pero por
+porque que se sea ser si sin sobre solo su sus tambien te tiene toda todo tras tu un una uno unos y ya
+an and are as at be been but by can do for from had has have if in into is it its no not of on or so than that the
+their then there these they this to was were will with you your
+""".split())
+
+@lru_cache(maxsize=1 << 18)
+def _term(w):
+    """Término de una palabra ya normalizada; "" si se descarta. Memoizado: el vocabulario se repite."""
+    if len(w) < 2 or w in STOPWORDS: return ""
+    return w[:-1] if len(w) > 3 and w[-1] == "s" and w[-2] not in "su" else w
+
+def tokenize(text):
+    if not isinstance(text, str) or not text: return []
+    text = unicodedata.normalize("NFKD", text.lower()).encode("ascii", "ignore").decode()
+    return [t for t in map(_term, _WORD.findall(text)) if t]
+
+class TextIndex:
+    def __init__(self):
+        self.postings = {}              # término -> (docs array('i'), tf array('i'))
+        self.doc_len = array("i")       # por documento interno
+        self.owner = array("i")         # documento interno -> hueco del ID externo
+        self.alive = bytearray()        # documento interno vivo (1) / reemplazado o borrado (0)
+        self.ids, self.slot = [], {}    # hueco -> ID externo, ID externo -> hueco
+        self.docs = {}                  # ID externo -> [doc notas, doc campos]
+        self.live_docs = self.live_len = 0
+        # Las vistas NumPy de búsqueda bloquean el crecimiento de los array: lecturas y escrituras, en serie
+        self._lock = threading.RLock()
+
+    @classmethod
+    def from_frame(cls, df, text_col="Notas", fields=FIELDS):
+        """Construcción por lotes: se tokeniza fila a fila (textos repetidos, una vez) y
+        los postings salen de un único np.unique sobre (término, documento)."""
+        ix = cls()
+        cols = [f for f in fields if f in df]
+        seen, toks, lens = {}, [], []
+        for note, *vals in zip(*(df[c].tolist() for c in [text_col] + cols)):
+            for text in (note, " ".join(v for v in vals if isinstance(v, str))):
+                t = seen.get(text) if isinstance(text, str) else None
+                if t is None: t = seen[text] = tokenize(text) if isinstance(text, str) else []
+                toks += t; lens.append(len(t))
+        n_docs = len(lens)
+        ix.ids = df["ID"].tolist()
+        ix.slot = {tid: i for i, tid in enumerate(ix.ids)}
+        ix.docs = {tid: [2 * i, 2 * i + 1] for i, tid in enumerate(ix.ids)}
+        ix.doc_len = array("i", lens)
+        ix.owner = array("i", np.arange(n_docs, dtype=np.int32) // 2)
+        ix.alive = bytearray(b"\x01" * n_docs)
+        ix.live_docs, ix.live_len = n_docs, sum(lens)
+        if toks:
+            codes, terms = pd.factorize(pd.Series(toks, dtype=object))
+            docs = np.repeat(np.arange(n_docs, dtype=np.int64), lens)
+            keys, tf = np.unique(codes.astype(np.int64) * n_docs + docs, return_counts=True)
+            code, doc = keys // n_docs, (keys % n_docs).astype(np.int32)
+            bounds = np.searchsorted(code, np.arange(len(terms) + 1))
+            tf = tf.astype(np.int32)
+            for i, t in enumerate(terms):
+                p = ix.postings[t] = (array("i"), array("i"))
+                p[0].frombytes(doc[bounds[i]:bounds[i + 1]].tobytes()); p[1].frombytes(tf[bounds[i]:bounds[i + 1]].tobytes())
+        return ix
+
+    def _new_doc(self, slot, text):
+        terms = {}
+        for t in tokenize(text): terms[t] = terms.get(t, 0) + 1
+        d = len(self.doc_len)
+        for t, tf in terms.items():
+            p = self.postings.get(t)
+            if p is None: p = self.postings[t] = (array("i"), array("i"))
+            p[0].append(d); p[1].append(tf)
+        n = sum(terms.values())
+        self.doc_len.append(n); self.owner.append(slot); self.alive.append(1)
+        self.live_docs += 1; self.live_len += n
+        return d
+
+    def _kill(self, d):
+        if self.alive[d]:
+            self.alive[d] = 0; self.live_docs -= 1; self.live_len -= self.doc_len[d]
+
+    def add(self, tid, text, fields_text=""):
+        with self._lock:
+            if tid in self.slot: self.remove(tid)
+            s = self.slot[tid] = len(self.ids); self.ids.append(tid)
+            self.docs[tid] = [self._new_doc(s, text), self._new_doc(s, fields_text)]
+
+    def remove(self, tid):
+        with self._lock:
+            for d in self.docs.pop(tid, ()): self._kill(d)
+            self.slot.pop(tid, None)
+
+    def _fields(self, row):
+        return " ".join(row.get(f) for f in FIELDS if isinstance(row.get(f), str))
+
+    @property
+    def healthy(self):
+        return len(self.doc_len) - self.live_docs <= max(1000, self.live_docs)
+
+    # Mismo contrato que los índices de data._LIVE (filas = dicts de trade)
+    def apply_add(self, row):
+        self.add(row.get("ID"), row.get("Notas"), self._fields(row)); return self.healthy
+
+    def apply_update(self, old, new):
+        tid = old.get("ID")
+        with self._lock:
+            if tid not in self.docs: return False
+            notes, flds = self.docs[tid]
+            if "Notas" in new:   # las filas del frame ligero no traen Notas: sin ellas se conservan las indexadas
+                self._kill(notes); notes = self._new_doc(self.slot[tid], new.get("Notas"))
+            self._kill(flds); self.docs[tid] = [notes, self._new_doc(self.slot[tid], self._fields(new))]
+            return self.healthy
+
+    def apply_delete(self, old):
+        self.remove(old.get("ID")); return self.healthy
+
+    @property
+    def nbytes(self):
+        post = sum(len(d) * 8 + 100 for d, _ in self.postings.values())
+        return post + 13 * len(self.doc_len) + 150 * len(self.ids)
+
+    def search(self, query, limit=20):
+        """[(ID, puntuación)] de los mejores resultados para query (BM25, suma de términos)."""
+        with self._lock: return self._search(query, limit)
+
+    def _search(self, query, limit):
+        terms = [t for t in dict.fromkeys(tokenize(query)) if t in self.postings]
+        if not terms or not self.live_docs: return []
+        alive = np.frombuffer(self.alive, np.uint8).astype(bool)
+        dl = np.frombuffer(self.doc_len, np.int32)
+        owner = np.frombuffer(self.owner, np.int32)
+        avgdl = self.live_len / self.live_docs or 1.0
+        scores = np.zeros(len(self.ids))
+        for t in terms:
+            docs, tf = (np.frombuffer(a, np.int32) for a in self.postings[t])
+            keep = alive[docs]
+            docs, tf = docs[keep], tf[keep].astype(np.float64)
+            if not len(docs): continue
+            idf = np.log(1 + (self.live_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+            w = idf * tf * (K1 + 1) / (tf + K1 * (1 - B + B * dl[docs] / avgdl))
+            scores += np.bincount(owner[docs], weights=w, minlength=len(scores))
+        hit = np.flatnonzero(scores)
+        if len(hit) > limit: hit = hit[np.argpartition(-scores[hit], limit)[:limit]]
+        hit = hit[np.argsort(-scores[hit], kind="stable")]
+        return [(self.ids[i], float(scores[i])) for i in hit]
+
+def brain_frame(brain):
+    """Entradas del brain file (análisis guardados) como filas indexables, ID = posición."""
+    brain = [b if isinstance(b, dict) else {} for b in brain or []]
+    return pd.DataFrame({"ID": [f"brain:{i}" for i in range(len(brain))],
+                         "analysis": [b.get("analysis") for b in brain],
+                         "Par": [b.get("pair") for b in brain], "Resultado": [b.get("result") for b in brain]})
@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+from modules.instruments import spec
+
+# --- INDICADORES DEL CHECKLIST (VECTORIZADOS) ---
+# Versión mecánica de las casillas de la pestaña Operativa, calculada sobre
+# arrays de barras (ohlc.BAR) de una temporalidad. Cada señal es un array int8
+# alineado con las barras y con signo: +1 alcista, -1 bajista, 0 nada; una
+# casilla "cuenta" cuando la señal coincide con la dirección del trade.
+# Las definiciones son aproximaciones fijas de criterios discrecionales:
+#   trend      cierre por encima / debajo de la EMA 50
+#   ema        la vela toca la EMA 50 (signo: lado del cierre)
+#   candle     vela de rechazo: mecha >= 2x cuerpo y >= media vela
+#   engulfing  envolvente de cuerpos con la vela anterior
+#   sos        cierre que rompe el máximo / mínimo de las STRUCT_BARS anteriores
+#   structure  la vela prueba el mínimo / máximo de las STRUCT_BARS anteriores
+#              (± 0.25 ATR) y cierra de vuelta dentro
+#   aoi        lo mismo sobre AOI_BARS barras y con ± 0.5 ATR de zona
+#   pattern    estructura de mercado: máximo y mínimo recientes (PATTERN_BARS)
+#              por encima (HH + HL) o por debajo (LH + LL) de los anteriores
+#   psych      cierre a <= 0.25 ATR de un nivel redondo (100 pips; signo: lado del nivel)
+EMA_LEN, ATR_LEN = 50, 14
+STRUCT_BARS, AOI_BARS, PATTERN_BARS = 20, 50, 5
+SIGNALS = ("trend", "ema", "candle", "engulfing", "sos", "structure", "aoi", "pattern", "psych")
+
+def _ewm(x, alpha, n, seed):
+    """Media exponencial (adjust=False). Con seed (valor en la barra anterior a x) continúa
+    una serie ya calculada: mismo resultado que recalcular desde el principio."""
+    if seed is None: return pd.Series(x).ewm(alpha=alpha, adjust=False, min_periods=n).mean().to_numpy()
+    return pd.Series(np.r_[seed, x]).ewm(alpha=alpha, adjust=False).mean().to_numpy()[1:]
+
+def ema(x, n=EMA_LEN, seed=None):
+    return _ewm(x, 2 / (n + 1), n, seed)
+
+def atr(high, low, close, n=ATR_LEN, seed=None, prev_close=np.nan):
+    prev = np.r_[prev_close, close[:-1]]
+    tr = np.fmax(high - low, np.fmax(np.abs(high - prev), np.abs(low - prev)))
+    return _ewm(tr, 1 / n, n, seed)   # Wilder
+
+def _rolling(a, n, fn):
+    """out[i] = fn(a[i-n+1:i+1]) (n barras hasta la actual incluida); NaN si no hay n."""
+    out = np.full(len(a), np.nan)
+    if len(a) >= n: out[n - 1:] = fn(sliding_window_view(a, n), axis=1)
+    return out
+
+def _shift(a, k):
+    """a retrasado k barras (NaN delante)."""
+    out = np.full(len(a), np.nan)
+    if k < len(a): out[k:] = a[:len(a) - k]
+    return out
+
+def _signed(bull, bear):
+    return np.where(bull, 1, np.where(bear, -1, 0)).astype(np.int8)
+
+def round_step(symbol):
+    """Paso de los niveles psicológicos: 100 pips del instrumento."""
+    pip = spec(symbol)[0]
+    return pip * 100 if np.isfinite(pip) else np.nan
+
+def features(bars, symbol=None, ema50=None, atr14=None):
+    """dict señal -> array int8 (más "ema50" y "atr" en float) para las barras dadas.
+    ema50 / atr14: ya calculadas para estas barras (continuación incremental, ver scanner)."""
+    o, h, l, c = (np.asarray(bars[f], dtype=np.float64) for f in ("open", "high", "low", "close"))
+    e = ema(c) if ema50 is None else ema50
+    a = atr(h, l, c) if atr14 is None else atr14
+    po, pc = np.r_[np.nan, o[:-1]], np.r_[np.nan, c[:-1]]
+    body, rng = np.abs(c - o), h - l
+    lower, upper = np.minimum(o, c) - l, h - np.maximum(o, c)
+    with np.errstate(invalid="ignore"):
+        out = {
+            "trend": _signed(c > e, c < e),
+            "ema": _signed((l <= e) & (h >= e) & (c >= e), (l <= e) & (h >= e) & (c < e)),
+            "candle": _signed((lower >= 2 * body) & (lower >= rng / 2) & (rng > 0), (upper >= 2 * body) & (upper >= rng / 2) & (rng > 0)),
+            "engulfing": _signed((c > o) & (pc < po) & (c >= po) & (o <= pc), (c < o) & (pc > po) & (c <= po) & (o >= pc)),
+        }
+        hi_s, lo_s = _shift(_rolling(h, STRUCT_BARS, np.max), 1), _shift(_rolling(l, STRUCT_BARS, np.min), 1)
+        out["sos"] = _signed(c > hi_s, c < lo_s)
+        out["structure"] = _signed((l <= lo_s + a / 4) & (c > lo_s), (h >= hi_s - a / 4) & (c < hi_s))
+        hi_a, lo_a = _shift(_rolling(h, AOI_BARS, np.max), 1), _shift(_rolling(l, AOI_BARS, np.min), 1)
+        out["aoi"] = _signed((l <= lo_a + a / 2) & (c > lo_a), (h >= hi_a - a / 2) & (c < hi_a))
+        # HH + HL / LH + LL: últimas PATTERN_BARS (con la actual) frente a las STRUCT_BARS anteriores
+        rec_hi, rec_lo = _rolling(h, PATTERN_BARS, np.max), _rolling(l, PATTERN_BARS, np.min)
+        old_hi, old_lo = _shift(hi_s, PATTERN_BARS - 1), _shift(lo_s, PATTERN_BARS - 1)
+        out["pattern"] = _signed((rec_hi > old_hi) & (rec_lo > old_lo), (rec_hi < old_hi) & (rec_lo < old_lo))
+        step = round_step(symbol) if symbol else np.nan
+        level = np.round(c / step) * step
+        out["psych"] = _signed((np.abs(c - level) <= a / 4) & (c >= level), (np.abs(c - level) <= a / 4) & (c < level))
+    out["ema50"], out["atr"] = e, a
+    return out
@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+from modules.data import OFFICIAL_PAIRS
+
+# --- INSTRUMENTOS Y CÁLCULO DE LOTAJE ---
+# Tabla por símbolo: tamaño del pip, tamaño del contrato (unidades por lote),
+# divisa de cotización y paso mínimo de lote. El valor de un pip por lote es
+# pip * contrato en la divisa de cotización; para pasarlo a USD:
+#   - cotiza en USD -> 1;
+#   - base USD (USDJPY, USDMXN...) -> 1 / precio de entrada (exacto);
+#   - resto (cruces, índices no USD) -> quote_usd si se pasa, si no QUOTE_USD
+#     (cambios de referencia, no de mercado).
+# size_positions trabaja con arrays: una llamada calcula toda una watchlist o
+# un histórico completo.
+QUOTE_USD = {"USD": 1.0, "EUR": 1.08, "GBP": 1.27, "JPY": 1 / 150, "CHF": 1.12, "CAD": 0.73, "AUD": 0.66, "NZD": 0.60,
+             "MXN": 1 / 17.5, "ZAR": 1 / 18.5, "TRY": 1 / 32, "SEK": 1 / 10.5, "NOK": 1 / 10.7, "DKK": 1 / 6.9,
+             "HKD": 1 / 7.8, "SGD": 1 / 1.35, "CNH": 1 / 7.2, "PLN": 1 / 4.0, "CZK": 1 / 23, "HUF": 1 / 360,
+             "THB": 1 / 36, "INR": 1 / 83}
+_PIP_001 = {"JPY", "HUF", "THB", "INR", "CZK"}   # divisas cotizadas con 2 decimales de pip
+
+# símbolo -> (pip, contrato, divisa de cotización)
+_SPECIAL = {
+    "XAUUSD": (0.1, 100, "USD"), "XAGUSD": (0.01, 5000, "USD"), "XPTUSD": (0.1, 100, "USD"), "XPDUSD": (0.1, 100, "USD"),
+    "WTIUSD": (0.01, 1000, "USD"), "BCOUSD": (0.01, 1000, "USD"),
+    "US30": (1.0, 1, "USD"), "NAS100": (1.0, 1, "USD"), "SPX500": (1.0, 1, "USD"),
+    "GER30": (1.0, 1, "EUR"), "UK100": (1.0, 1, "GBP"), "JPN225": (1.0, 1, "JPY"),
+    "BTCUSD": (1.0, 1, "USD"), "ETHUSD": (0.1, 1, "USD"), "LTCUSD": (0.01, 1, "USD"),
+}
+
+def spec(symbol):
+    """(pip, contrato, cotización, paso de lote) del símbolo; FX de 6 letras se deduce del código."""
+    if symbol in _SPECIAL: return (*_SPECIAL[symbol], 0.01)
+    if len(symbol) == 6 and symbol.isalpha():
+        quote = symbol[3:]
+        return (0.01 if quote in _PIP_001 else 0.0001, 100_000, quote, 0.01)
+    return (np.nan, np.nan, None, 0.01)
+
+def build_table(symbols):
+    return pd.DataFrame([spec(s) for s in symbols], index=pd.Index(symbols, name="symbol"), columns=["pip", "contract", "quote", "lot_step"])
+
+TABLE = build_table(OFFICIAL_PAIRS)
+_ROWS = {s: tuple(r) for s, r in zip(TABLE.index, TABLE.itertuples(index=False, name=None))}
+
+def _meta(symbols):
+    """Columnas de la tabla con la forma de symbols (factorize: una búsqueda por símbolo distinto).
+    rate = USD por unidad de cotización de referencia; base_usd marca los pares USDxxx."""
+    symbols = np.asarray(symbols, dtype=object)
+    codes, uniq = pd.factorize(pd.Series(symbols.ravel()))
+    rows = [_ROWS.get(s) or spec(s) for s in uniq]
+    cols = {"pip": [r[0] for r in rows], "contract": [r[1] for r in rows], "step": [r[3] for r in rows],
+            "rate": [QUOTE_USD.get(r[2], np.nan) for r in rows],
+            "base_usd": [s[:3] == "USD" and r[2] != "USD" for s, r in zip(uniq, rows)]}
+    return {k: np.asarray(v, dtype=bool if k == "base_usd" else np.float64)[codes].reshape(symbols.shape) for k, v in cols.items()}
+
+def size_positions(symbols, entries, stops, risk_pct, balances, quote_usd=None):
+    """Lotaje por escenario (arrays o escalares, con broadcasting).
+
+    Devuelve dict de arrays: lots (redondeado hacia abajo al paso de lote),
+    pips (distancia entrada-stop), risk_usd (balance * riesgo %), pip_value
+    (USD por pip y lote) y actual_risk_usd (riesgo real con el lote redondeado).
+    quote_usd: USD por unidad de la divisa de cotización, para no usar QUOTE_USD."""
+    m = _meta(symbols)
+    args = [np.asarray(a, dtype=np.float64) for a in (entries, stops, risk_pct, balances)]
+    if quote_usd is not None: args.append(np.asarray(quote_usd, dtype=np.float64))
+    # Forma común de todas las entradas: un símbolo escalar con arrays de precios también vale
+    shape = np.broadcast_shapes(m["pip"].shape, *(a.shape for a in args))
+    pip, contract, step, base_usd, ref_rate = (np.broadcast_to(m[k], shape) for k in ("pip", "contract", "step", "base_usd", "rate"))
+    entries, stops, risk_pct, balances = (np.broadcast_to(a, shape) for a in args[:4])
+    risk_usd = balances * risk_pct / 100
+    with np.errstate(divide="ignore", invalid="ignore"):
+        if quote_usd is not None: rate = np.broadcast_to(args[4], shape)
+        else: rate = np.where(base_usd, 1 / entries, ref_rate)
+        pips = np.round(np.abs(entries - stops) / pip, 6)   # sin ruido de coma flotante (10.000000000001)
+        pip_value = pip * contract * rate
+        ok = (entries > 0) & (stops > 0) & (pips > 0) & np.isfinite(pip_value)
+        raw = np.where(ok, risk_usd / (pips * pip_value), 0.0)
+        # Hacia abajo al paso de lote (con tolerancia de coma flotante) para no pasarse del riesgo
+        lots = np.floor(raw / step + 1e-9) * step
+    return {"lots": lots, "pips": np.where(ok, pips, 0.0), "risk_usd": risk_usd, "pip_value": np.where(ok, pip_value, 0.0),
+            "actual_risk_usd": np.where(ok, lots * pips * pip_value, 0.0)}
+
+def size_position(symbol, entry, stop, risk_pct, balance, quote_usd=None):
+    """Un solo escenario (calculadora del modal): dict de floats."""
+    out = size_positions([symbol], entry, stop, risk_pct, balance, quote_usd)
+    return {k: float(v[0]) for k, v in out.items()}
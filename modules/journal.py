@@ -0,0 +1,240 @@
+import os
+import json
+import time
+import secrets
+import threading
+import pandas as pd
+try:
+    import pyarrow.parquet as pq_meta  # snapshot columnar
+    HAS_ARROW = True
+except ImportError:
+    HAS_ARROW = False
+from modules.schema import TRADE_COLS, TEXT_COLS, NUMERIC_COLS
+from modules.locks import file_lock, try_file_lock, write_temp, atomic_write
+
+# --- JOURNAL APPEND-ONLY ---
+# Cada cuenta = snapshot + cola de registros ({acc}.journal). El snapshot es
+# Parquet ({acc}.parquet, columnar: se leen solo las columnas pedidas) o el CSV
+# histórico ({acc}.csv), que se migra a Parquet la primera vez que se lee (sin
+# pyarrow se queda en CSV).
+# Guardar un trade solo añade una línea; la compactación pliega la cola en el
+# snapshot en segundo plano cuando crece demasiado. Cada trade tiene un ID
+# estable: las actualizaciones son registros por ID y los borrados, lápidas.
+# {acc}.seq cuenta las escrituras lógicas (altas, cambios, borrados, snapshots
+# importados): es la versión de las cachés y no cambia al compactar.
+JOURNAL_MAX_BYTES = 256 * 1024
+# Grupos de filas del Parquet: los IDs crecen con la creación, así que un filtro
+# por ID solo descomprime el grupo que lo contiene (load_details)
+SNAPSHOT_ROW_GROUP = 16384
+
+def new_trade_id():
+    """ID estable y ordenable por creación (ms en hex + sufijo aleatorio)."""
+    return f"{time.time_ns() // 1_000_000:011x}{secrets.token_hex(2)}"
+
+def journal_path(fp): return os.path.splitext(fp)[0] + ".journal"
+def snapshot_path(fp): return os.path.splitext(fp)[0] + ".parquet"
+def sealed_path(fp): return os.path.splitext(fp)[0] + ".journal.sealed"
+
+def seq_path(fp): return os.path.splitext(fp)[0] + ".seq"
+
+def data_paths(fp):
+    """Ficheros que componen el estado de la cuenta."""
+    return fp, snapshot_path(fp), sealed_path(fp), journal_path(fp)
+
+def has_data(fp):
+    return any(os.path.exists(p) for p in data_paths(fp))
+
+def read_seq(fp):
+    """Nº de escrituras lógicas de la cuenta (0 si nunca se ha escrito)."""
+    try:
+        with open(seq_path(fp)) as f: return int(f.read())
+    except (OSError, ValueError): return 0
+
+def _bump_seq(fp):
+    # Con file_lock(fp) tomado y después de escribir: quien lea entre medias ve
+    # los datos nuevos con la versión vieja y vuelve a cargar al ver la nueva
+    n = read_seq(fp) + 1
+    atomic_write(seq_path(fp), lambda f: f.write(str(n)))
+
+def journal_append(fp, rec):
+    """Añade un registro (add / upd / del por ID) al final del journal. Coste O(1)."""
+    line = json.dumps(rec, default=str) + "\n"
+    with file_lock(fp):
+        with open(journal_path(fp), "a") as f: f.write(line)
+        _bump_seq(fp)
+    maybe_compact(fp)
+
+def _read_records(jp):
+    if not os.path.exists(jp): return []
+    recs = []
+    with open(jp, "r") as f:
+        for line in f:
+            try: recs.append(json.loads(line))
+            except: pass  # línea truncada por un corte a mitad de escritura
+    return recs
+
+def _read_snapshot(fp, cols):
+    pq = snapshot_path(fp)
+    if HAS_ARROW and os.path.exists(pq):
+        # Proyección de columnas: Notas/imágenes ni se leen si no se piden.
+        # Columnas añadidas al esquema después del snapshot llegan vacías.
+        try:
+            have = set(pq_meta.read_schema(pq).names)
+            df = pd.read_parquet(pq, columns=[c for c in cols if c in have])
+            for c in cols:
+                if c not in df.columns: df[c] = None
+            return df[list(cols)]
+        except Exception as e: print(f"Error leyendo {pq}: {e}")
+    if not os.path.exists(fp): return pd.DataFrame(columns=cols)
+    try: df = pd.read_csv(fp, dtype={c: object for c in TEXT_COLS})
+    except: return pd.DataFrame(columns=cols)
+    for c in TRADE_COLS:
+        if c not in df.columns: df[c] = None
+    missing = not df.empty and df["ID"].isna().any()
+    # Snapshot anterior a los IDs: se asignan una sola vez y se persisten
+    if missing: df.loc[df["ID"].isna(), "ID"] = [new_trade_id() for _ in range(int(df["ID"].isna().sum()))]
+    if HAS_ARROW and not os.path.exists(pq):
+        # Cuenta CSV: se migra ya al Parquet, sin esperar a que el journal llegue a compactarse
+        try:
+            df = _normalized(df)
+            with file_lock(fp):
+                atomic_write(pq, lambda f: df.to_parquet(f, index=False, row_group_size=SNAPSHOT_ROW_GROUP), mode="wb")
+                os.remove(fp)
+            return df[list(cols)]
+        except Exception as e: print(f"Error migrando {fp} a Parquet: {e}")
+    if missing:
+        with file_lock(fp): atomic_write(fp, lambda f: df.to_csv(f, index=False))
+    return df[list(cols)]
+
+def _set(df, i, col, val):
+    if col not in df.columns: df[col] = None
+    if isinstance(val, str) and df[col].dtype != object: df[col] = df[col].astype(object)
+    df.at[i, col] = val
+
+def _apply(df, adds, upds, dels, cols):
+    """Aplica de una vez el estado acumulado: lápidas, actualizaciones por ID y altas."""
+    if dels: df = df[~df["ID"].isin(dels)].reset_index(drop=True)
+    if upds and not df.empty:
+        pos = pd.Index(df["ID"]).get_indexer(list(upds))
+        for p, data in zip(pos, upds.values()):
+            if p < 0: continue  # trade borrado o inexistente: se ignora
+            for k, v in data.items():
+                if k in cols: _set(df, p, k, v)
+    if adds:
+        new = pd.DataFrame(list(adds.values()))
+        for c in cols:
+            if c not in new.columns: new[c] = None
+        df = pd.concat([df, new[cols]], ignore_index=True) if not df.empty else new[cols].reset_index(drop=True)
+    return df
+
+def replay(df, recs, cols):
+    """Pliega los registros del journal (add / upd / del por ID) sobre el snapshot.
+    Coste lineal en la cola, no en el snapshot."""
+    adds, upds, dels = {}, {}, set()
+    for r in recs:
+        op = r.get("op")
+        tid = r["row"].get("ID") if op == "add" else r.get("id")
+        if tid is None: continue
+        if op == "add": adds[tid] = dict(r["row"])
+        elif op == "upd":
+            if tid in dels: continue
+            if tid in adds: adds[tid].update(r["data"])
+            else: upds.setdefault(tid, {}).update(r["data"])
+        elif op == "del":
+            if adds.pop(tid, None) is None: dels.add(tid)
+            upds.pop(tid, None)
+    return _apply(df, adds, upds, dels, cols)
+
+def load_journaled(fp, cols):
+    """Snapshot + cola sellada + cola activa -> DataFrame actual."""
+    with file_lock(fp):
+        df = _read_snapshot(fp, cols)
+        recs = _read_records(sealed_path(fp)) + _read_records(journal_path(fp))
+    return replay(df, recs, cols)
+
+def _normalized(df):
+    # Tipos homogéneos por columna para poder escribir Parquet
+    df = df[TRADE_COLS].copy()
+    for c in NUMERIC_COLS: df[c] = pd.to_numeric(df[c], errors="coerce").astype("float64")
+    for c in TEXT_COLS: df[c] = df[c].map(lambda v: None if v is None or v != v else str(v)).astype(object)
+    return df
+
+def write_snapshot(fp, df):
+    """Sustituye el snapshot de la cuenta por df (importaciones, generadores de datos)."""
+    df = _normalized(df)
+    with file_lock(fp):
+        if HAS_ARROW: atomic_write(snapshot_path(fp), lambda f: df.to_parquet(f, index=False, row_group_size=SNAPSHOT_ROW_GROUP), mode="wb")
+        else: atomic_write(fp, lambda f: df.to_csv(f, index=False))
+        _bump_seq(fp)
+
+def compact(fp):
+    """Pliega el journal en el snapshot. Las escrituras nunca esperan al plegado.
+    Un solo compactador por cuenta entre todos los procesos (lock "<fp>.compact").
+    No toca {acc}.seq: el contenido no cambia y las cachés siguen valiendo."""
+    with try_file_lock(fp + ".compact") as ok:
+        if not ok: return False
+        jp, sp = journal_path(fp), sealed_path(fp)
+        with file_lock(fp):
+            if os.path.exists(jp) and not os.path.exists(sp): os.replace(jp, sp)
+            if not os.path.exists(sp): return False
+            df = _read_snapshot(fp, TRADE_COLS)
+        df = _normalized(replay(df, _read_records(sp), TRADE_COLS))
+        if HAS_ARROW:
+            pq = snapshot_path(fp)
+            tmp = write_temp(pq, lambda f: df.to_parquet(f, index=False, row_group_size=SNAPSHOT_ROW_GROUP), mode="wb")
+            with file_lock(fp):
+                os.replace(tmp, pq)
+                os.remove(sp)
+                if os.path.exists(fp): os.remove(fp)  # el CSV histórico queda sustituido
+        else:
+            tmp = write_temp(fp, lambda f: df.to_csv(f, index=False))
+            with file_lock(fp):
+                os.replace(tmp, fp)
+                os.remove(sp)
+        return True
+
+def _row(fp, recs, trade_id, cols):
+    # Cola primero: si el trade nació en ella el snapshot ni se abre
+    if any(r.get("op") == "add" and r["row"].get("ID") == trade_id for r in recs): out = None
+    else:
+        pq = snapshot_path(fp)
+        if HAS_ARROW and os.path.exists(pq):
+            have = set(pq_meta.read_schema(pq).names)
+            snap = pd.read_parquet(pq, columns=["ID"] + [c for c in cols if c in have and c != "ID"], filters=[("ID", "==", trade_id)])
+        else:
+            snap = _read_snapshot(fp, ["ID"] + [c for c in cols if c != "ID"])
+            snap = snap[snap["ID"] == trade_id]
+        out = None if snap.empty else {c: snap.iloc[0].get(c) for c in cols}
+    for r in recs:
+        op = r.get("op")
+        if op == "add" and r["row"].get("ID") == trade_id: out = {c: r["row"].get(c) for c in cols}
+        elif op == "upd" and r.get("id") == trade_id and out is not None: out.update({c: v for c, v in r["data"].items() if c in cols})
+        elif op == "del" and r.get("id") == trade_id: out = None
+    return out
+
+def load_details(fp, trade_id, cols):
+    """Columnas de un solo trade (Notas, imágenes o la fila previa a una escritura):
+    snapshot filtrado por ID + cola."""
+    with file_lock(fp):
+        return _row(fp, _read_records(sealed_path(fp)) + _read_records(journal_path(fp)), trade_id, cols)
+
+# Cuentas con una compactación ya lanzada en este proceso: un hilo por cuenta, no uno por append
+_compacting = set()
+_compacting_lock = threading.Lock()
+
+def _compact_bg(fp):
+    try: compact(fp)
+    except Exception as e: print(f"Error compactando {fp}: {e}")
+    finally:
+        with _compacting_lock: _compacting.discard(fp)
+
+def maybe_compact(fp):
+    """Lanza la compactación en un hilo cuando la cola supera JOURNAL_MAX_BYTES."""
+    try:
+        if os.path.getsize(journal_path(fp)) < JOURNAL_MAX_BYTES: return False
+    except OSError: return False
+    with _compacting_lock:
+        if fp in _compacting: return False
+        _compacting.add(fp)
+    threading.Thread(target=_compact_bg, args=(fp,), daemon=True).start()
+    return True
@@ -0,0 +1,96 @@
+import os
+import time
+import tempfile
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# --- LOCKS POR FICHERO (HILOS + PROCESOS) ---
+# Cada ruta protegida tiene un RLock (hilos del mismo proceso) y un lock de
+# sistema sobre "<ruta>.lock" (otros workers que comparten user_data/).
+# Reentrante en el mismo hilo: save_trade puede tomar el lock de la cuenta y
+# el journal volver a pedirlo sin bloquearse.
+_guard = threading.Lock()
+_rlocks = {}
+_held = {}  # ruta -> [fd, profundidad]
+
+def _os_lock(fd, blocking=True):
+    if fcntl:
+        fcntl.flock(fd, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+        return
+    while True:
+        try:
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1); return
+        except OSError:
+            if not blocking: raise
+            time.sleep(0.01)
+
+def _os_unlock(fd):
+    if fcntl: fcntl.flock(fd, fcntl.LOCK_UN)
+    else:
+        os.lseek(fd, 0, os.SEEK_SET); msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+def _acquire(path, blocking):
+    path = os.path.abspath(path)
+    with _guard: rl = _rlocks.setdefault(path, threading.RLock())
+    if not rl.acquire(blocking=blocking): return None
+    held = _held.get(path)
+    if held: held[1] += 1; return path
+    try:
+        fd = os.open(path + ".lock", os.O_RDWR | os.O_CREAT, 0o644)
+    except OSError:
+        rl.release(); raise
+    try: _os_lock(fd, blocking)
+    except OSError:
+        os.close(fd); rl.release()
+        if blocking: raise
+        return None
+    _held[path] = [fd, 1]
+    return path
+
+def _release(path):
+    held = _held[path]
+    held[1] -= 1
+    if held[1] == 0:
+        del _held[path]
+        _os_unlock(held[0]); os.close(held[0])
+    _rlocks[path].release()
+
+@contextmanager
+def file_lock(path):
+    """Lock exclusivo sobre path entre hilos y procesos."""
+    key = _acquire(path, True)
+    try: yield
+    finally: _release(key)
+
+@contextmanager
+def try_file_lock(path):
+    """Como file_lock pero sin esperar: devuelve False si otro lo tiene."""
+    key = _acquire(path, False)
+    try: yield key is not None
+    finally:
+        if key is not None: _release(key)
+
+def write_temp(path, write_fn, mode="w"):
+    """Escribe el contenido en un temporal junto a path (fsync incluido) y devuelve su ruta."""
+    folder = os.path.dirname(path) or "."
+    fd, tmp = tempfile.mkstemp(dir=folder, prefix=os.path.basename(path) + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, mode) as f:
+            write_fn(f)
+            f.flush(); os.fsync(f.fileno())
+    except:
+        os.remove(tmp); raise
+    return tmp
+
+def atomic_write(path, write_fn, mode="w"):
+    """Temporal + rename: ningún lector ve nunca un fichero a medio escribir."""
+    tmp = write_temp(path, write_fn, mode)
+    try: os.replace(tmp, path)
+    except:
+        os.remove(tmp); raise
@@ -0,0 +1,87 @@
+import os
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+# --- MONTE CARLO: RIESGO DE RUINA / DRAWDOWN / TIEMPO AL OBJETIVO ---
+# Bootstrap de los trades cerrados de la cuenta: cada camino remuestrea n_trades
+# resultados con reemplazo. Se simula por lotes (matrices caminos x trades) y
+# los lotes se reparten en un pool de procesos. Cada lote tiene su propia
+# semilla derivada de SeedSequence(seed), así que el resultado es el mismo con
+# 1 o con N procesos. Sin pandas: los workers arrancan solo con NumPy.
+CHUNK_PATHS = 50_000   # caminos por tarea del pool (fija: define la semilla de cada lote)
+BATCH_CELLS = 1_000_000   # celdas (caminos x trades) por matriz dentro de una tarea: ~8 MB por matriz float64
+PERCENTILES = [5, 25, 50, 75, 95, 99]
+
+def samples_from_frame(df):
+    """PnL ($) y múltiplos de R de los trades cerrados.
+    1R = pérdida media (el journal no guarda el riesgo de cada trade)."""
+    pnl = df.loc[df["Status"] == "CLOSED", "Dinero"].to_numpy(dtype=np.float64, na_value=np.nan)
+    pnl = pnl[~np.isnan(pnl)]
+    losses = pnl[pnl < 0]
+    r = pnl / abs(losses.mean()) if len(losses) else np.zeros(0)
+    return pnl, r
+
+def _first(mask):
+    """Índice del primer True por fila; -1 si no hay."""
+    hit = mask.any(axis=1)
+    return np.where(hit, mask.argmax(axis=1), -1)
+
+def _simulate_chunk(sample, n_paths, n_trades, balance, mode, risk_pct, max_dd_pct, trailing, target_pct, seed):
+    """Métricas por camino de un lote: (dd máximo %, índice de ruina, índice de objetivo, balance final)."""
+    rng = np.random.default_rng(seed)
+    out = {k: [] for k in ("max_dd", "ruin", "target", "final")}
+    batch = max(1, BATCH_CELLS // n_trades)
+    for start in range(0, n_paths, batch):
+        steps = sample[rng.integers(0, len(sample), (min(batch, n_paths - start), n_trades))]
+        if mode == "r": eq = balance * np.cumprod(1 + steps * (risk_pct / 100), axis=1)
+        else: eq = balance + np.cumsum(steps, axis=1)
+        peak = np.maximum(np.maximum.accumulate(eq, axis=1), balance)
+        dd = (eq - peak) / peak * 100
+        floor = dd if trailing else (eq - balance) / balance * 100
+        out["max_dd"].append(dd.min(axis=1))
+        out["ruin"].append(_first(floor <= -max_dd_pct) if max_dd_pct else np.full(len(eq), -1))
+        out["target"].append(_first(eq >= balance * (1 + target_pct / 100)) if target_pct else np.full(len(eq), -1))
+        out["final"].append(eq[:, -1].copy())  # copia: la vista retendría la matriz entera del lote
+    return {k: np.concatenate(v) for k, v in out.items()}
+
+def simulate(sample, n_paths=100_000, n_trades=100, balance=10_000.0, mode="pnl", risk_pct=1.0,
+             max_dd_pct=10.0, trailing=False, target_pct=None, seed=0, workers=None):
+    """Simula n_paths caminos de n_trades trades remuestreados de sample.
+
+    mode="pnl": sample en $ y se suma al balance. mode="r": sample en R y cada
+    trade arriesga risk_pct % del balance (interés compuesto).
+    Ruina = tocar -max_dd_pct % (desde el balance inicial, o desde el pico si
+    trailing=True) antes que el objetivo (+target_pct %), como en una prueba de
+    fondeo. Drawdown y balance final se miden sobre el horizonte completo."""
+    sample = np.asarray(sample, dtype=np.float64)
+    if not len(sample) or n_paths <= 0 or n_trades <= 0: return None
+    chunks = [min(CHUNK_PATHS, n_paths - s) for s in range(0, n_paths, CHUNK_PATHS)]
+    seeds = np.random.SeedSequence(seed).spawn(len(chunks))
+    args = [(sample, n, n_trades, float(balance), mode, risk_pct, max_dd_pct, trailing, target_pct, s) for n, s in zip(chunks, seeds)]
+    workers = min(workers or os.cpu_count() or 1, len(chunks))
+    if workers > 1:
+        # spawn: el proceso de Streamlit tiene hilos y fork no es seguro
+        with ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context("spawn")) as ex:
+            parts = list(ex.map(_simulate_chunk, *zip(*args)))
+    else: parts = [_simulate_chunk(*a) for a in args]
+    res = {k: np.concatenate([p[k] for p in parts]) for k in parts[0]}
+    return summarize(res, n_trades, balance)
+
+def summarize(res, n_trades, balance):
+    ruin, target = res["ruin"], res["target"]
+    ruined = (ruin >= 0) & ((target < 0) | (ruin < target))
+    passed = (target >= 0) & ~ruined
+    ttt = target[passed] + 1
+    pct = lambda a: dict(zip(PERCENTILES, np.percentile(a, PERCENTILES).tolist())) if len(a) else {}
+    return {
+        "paths": len(ruin), "n_trades": n_trades,
+        "risk_of_ruin": float(ruined.mean() * 100),
+        "pass_rate": float(passed.mean() * 100),
+        "open_rate": float((~ruined & ~passed).mean() * 100),
+        # Peor drawdown en el horizonte completo (sin cortar en ruina/objetivo): percentil 95 = "1 de cada 20"
+        "max_dd_pct": pct(-res["max_dd"]),
+        "trades_to_target": pct(ttt),
+        "final_balance": pct(res["final"]),
+        "median_return_pct": float((np.median(res["final"]) - balance) / balance * 100),
+    }
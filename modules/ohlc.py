@@ -0,0 +1,203 @@
+import io
+import os
+import threading
+import numpy as np
+import pandas as pd
+from modules.data import DATA_DIR, OFFICIAL_PAIRS
+from modules.locks import file_lock, atomic_write
+from modules.cache import file_version
+
+# --- ALMACÉN OHLC LOCAL ---
+# Un fichero binario por símbolo y temporalidad ({SYMBOL}_{TF}.bin) con
+# registros de ancho fijo (BAR: t en segundos UTC + OHLC + volumen), ordenados
+# por t y sin duplicados. Se leen con np.memmap: abrir décadas de 1H no lee
+# nada del disco, el campo t es el índice (búsqueda binaria) y un rango es una
+# vista del mapa, sin copia.
+# Ingesta desde exportaciones CSV (MT4/MT5, TradingView...): si las barras son
+# posteriores a la última guardada se añaden al final; si no, se fusiona y se
+# reescribe el fichero (temporal + rename) y se incrementa su generación
+# ({SYMBOL}_{TF}.gen): las cachés incrementales (scanner) distinguen así una
+# reescritura por detrás de un simple append.
+# Temporalidades sin fichero propio se agregan de la menor disponible (series).
+OHLC_DIR = os.path.join(DATA_DIR, "ohlc")
+TIMEFRAMES = {"W": 7 * 86_400, "D": 86_400, "4H": 4 * 3_600, "2H": 2 * 3_600, "1H": 3_600}   # segundos por barra
+MODE_TIMEFRAMES = {"Swing": ["W", "D", "4H"], "Scalping": ["4H", "2H", "1H"]}
+BAR = np.dtype([("t", "<i8"), ("open", "<f8"), ("high", "<f8"), ("low", "<f8"), ("close", "<f8"), ("volume", "<f8")])
+
+# Nombres de columna habituales en exportaciones -> campo de BAR
+_ALIASES = {"time": "t", "date": "t", "datetime": "t", "timestamp": "t", "<date>": "t", "gmt time": "t", "local time": "t",
+            "open": "open", "<open>": "open", "o": "open", "high": "high", "<high>": "high", "h": "high",
+            "low": "low", "<low>": "low", "l": "low", "close": "close", "<close>": "close", "c": "close",
+            "volume": "volume", "<vol>": "volume", "<tickvol>": "volume", "tick_volume": "volume", "tickvol": "volume", "vol": "volume", "v": "volume"}
+
+def bar_path(symbol, tf, root=None):
+    if tf not in TIMEFRAMES: raise ValueError(f"Temporalidad no soportada: {tf}")
+    return os.path.join(root or OHLC_DIR, f"{symbol.upper()}_{tf}.bin")
+
+def _read_table(src):
+    """CSV (ruta, bytes o fichero subido) -> DataFrame con nombres en minúsculas. Separador por la
+    primera línea; sin cabecera (exportación de historial de MT4) se asumen las columnas estándar."""
+    data = src if isinstance(src, bytes) else src.read() if hasattr(src, "read") else open(src, "rb").read()
+    first = data[:data.find(b"\n")].decode(errors="ignore")
+    sep = ";" if ";" in first else "\t" if "\t" in first else ","
+    header = any(ch.isalpha() for ch in first.replace("e+", "").replace("E+", ""))
+    raw = pd.read_csv(io.BytesIO(data), sep=sep, header=0 if header else None)
+    if not header:
+        names = {7: ["date", "time", "open", "high", "low", "close", "volume"], 6: ["date", "open", "high", "low", "close", "volume"],
+                 5: ["date", "open", "high", "low", "close"]}.get(raw.shape[1])
+        if names is None: raise ValueError("CSV sin cabecera con un nº de columnas desconocido")
+        raw.columns = names
+    return raw.rename(columns=lambda c: str(c).strip().lower())
+
+def parse_csv(src):
+    """CSV de barras -> array BAR ordenado. Acepta fecha y hora en columnas separadas
+    (MT4/MT5), fechas 2020.01.31 y epoch (s/ms). Las fechas sin zona se toman como UTC."""
+    raw = _read_table(src)
+    for d, h in (("<date>", "<time>"), ("date", "time")):
+        if d in raw.columns and h in raw.columns: raw[d] = raw[d].astype(str) + " " + raw.pop(h).astype(str)
+    raw = raw.rename(columns={c: _ALIASES[c] for c in raw.columns if c in _ALIASES})
+    raw = raw.loc[:, ~raw.columns.duplicated()]
+    missing = [f for f in ("t", "open", "high", "low", "close") if f not in raw.columns]
+    if missing: raise ValueError(f"Faltan columnas en el CSV: {', '.join(missing)}")
+    if pd.api.types.is_numeric_dtype(raw["t"]):
+        secs = raw["t"].to_numpy(dtype=np.int64)
+        if len(secs) and np.abs(secs).max() > 10**11: secs = secs // 1000   # epoch en ms
+    else:
+        txt = raw["t"].astype(str).str.replace(r"^(\d{4})\.(\d{2})\.(\d{2})", r"\1-\2-\3", regex=True)
+        ts = pd.to_datetime(txt, errors="coerce", utc=True)
+        ok = ts.notna().to_numpy()
+        raw = raw[ok]
+        secs = ts[ok].dt.tz_localize(None).to_numpy(dtype="datetime64[s]").astype(np.int64)
+    out = np.empty(len(raw), BAR)
+    out["t"] = secs
+    for f in ("open", "high", "low", "close"): out[f] = pd.to_numeric(raw[f], errors="coerce").to_numpy(dtype=np.float64)
+    out["volume"] = pd.to_numeric(raw["volume"], errors="coerce").fillna(0).to_numpy(dtype=np.float64) if "volume" in raw else 0.0
+    return _normalize(out)
+
+def _normalize(bars):
+    """Ordena por t y deja la última barra de cada t (la más reciente gana)."""
+    bars = bars[~np.isnan(bars["close"])]
+    order = np.argsort(bars["t"], kind="stable")
+    bars = bars[order]
+    last = np.append(bars["t"][1:] != bars["t"][:-1], True) if len(bars) else np.zeros(0, bool)
+    return bars[last]
+
+class OHLCStore:
+    def __init__(self, root=None):
+        self.root = root or OHLC_DIR
+        self._maps = {}   # ruta -> (versión, memmap)
+        self._lock = threading.Lock()
+
+    def path(self, symbol, tf): return bar_path(symbol, tf, self.root)
+    def gen_path(self, symbol, tf): return os.path.splitext(self.path(symbol, tf))[0] + ".gen"
+
+    def generation(self, symbol, tf):
+        """Nº de reescrituras (fusiones) del fichero; los appends no la cambian."""
+        try:
+            with open(self.gen_path(symbol, tf)) as f: return int(f.read() or 0)
+        except (OSError, ValueError): return 0
+
+    def bars(self, symbol, tf):
+        """Todas las barras como memmap de solo lectura (vacío si no hay datos)."""
+        p = self.path(symbol, tf)
+        ver = file_version(p)[0]
+        if ver is None or ver[1] < BAR.itemsize: return np.zeros(0, BAR)
+        with self._lock:
+            hit = self._maps.get(p)
+            if hit and hit[0] == ver: return hit[1]
+            # Solo registros completos (un append en curso puede dejar la cola a medias)
+            m = np.memmap(p, dtype=BAR, mode="r", shape=(ver[1] // BAR.itemsize,))
+            self._maps[p] = (ver, m)
+            return m
+
+    def version(self, tf, symbols=OFFICIAL_PAIRS):
+        """Versión conjunta de los ficheros de tf (para cachés derivadas de las velas)."""
+        return file_version(*(self.path(s, tf) for s in symbols))
+
+    def source(self, symbol, tf):
+        """Temporalidad guardada de la que sale series(symbol, tf): tf, la menor disponible que
+        la divide, o None sin datos."""
+        for low in sorted(TIMEFRAMES, key=TIMEFRAMES.get, reverse=True):
+            if TIMEFRAMES[low] <= TIMEFRAMES[tf] and TIMEFRAMES[tf] % TIMEFRAMES[low] == 0 and len(self.bars(symbol, low)):
+                return low
+        return None
+
+    def series(self, symbol, tf):
+        """Barras de tf: las guardadas o, si no hay, agregadas de la temporalidad menor disponible."""
+        src = self.source(symbol, tf)
+        if src is None: return np.zeros(0, BAR)
+        return self.bars(symbol, src) if src == tf else resample(self.bars(symbol, src), tf)
+
+    def range(self, symbol, tf, start=None, end=None):
+        """Barras con start <= t < end (fechas o segundos UTC): vista del memmap, sin copia."""
+        b = self.bars(symbol, tf)
+        lo = np.searchsorted(b["t"], _secs(start)) if start is not None else 0
+        hi = np.searchsorted(b["t"], _secs(end)) if end is not None else len(b)
+        return b[lo:hi]
+
+    def at(self, symbol, tf, when):
+        """Índice de la barra vigente en when (la última con t <= when); -1 si no hay."""
+        return int(np.searchsorted(self.bars(symbol, tf)["t"], _secs(when), side="right")) - 1
+
+    def ingest(self, symbol, tf, bars):
+        """Añade/fusiona un array BAR. Devuelve el nº de barras del fichero."""
+        bars = _normalize(np.asarray(bars, dtype=BAR))
+        p = self.path(symbol, tf)
+        os.makedirs(os.path.dirname(p), exist_ok=True)
+        with file_lock(p):
+            cur = self.bars(symbol, tf)
+            if not len(bars): return len(cur)
+            if not len(cur) or bars["t"][0] > cur["t"][-1]:
+                with open(p, "ab") as f:
+                    f.truncate(len(cur) * BAR.itemsize)   # descarta una cola incompleta de un fallo anterior
+                    f.write(bars.tobytes())
+                return len(cur) + len(bars)
+            merged = _normalize(np.concatenate([np.asarray(cur), bars]))
+            atomic_write(p, lambda f: f.write(merged.tobytes()), mode="wb")
+            # Después de reescribir: quien lea entre medias ve la generación vieja y recalcula al verla cambiar
+            gen = self.generation(symbol, tf) + 1
+            atomic_write(self.gen_path(symbol, tf), lambda f: f.write(str(gen)))
+            return len(merged)
+
+    def ingest_csv(self, symbol, tf, src):
+        return self.ingest(symbol, tf, parse_csv(src))
+
+    def inventory(self):
+        """DataFrame con símbolo, temporalidad, nº de barras y rango de fechas de lo almacenado."""
+        rows = []
+        for sym in OFFICIAL_PAIRS:
+            for tf in TIMEFRAMES:
+                b = self.bars(sym, tf)
+                if len(b): rows.append((sym, tf, len(b), pd.Timestamp(int(b["t"][0]), unit="s"), pd.Timestamp(int(b["t"][-1]), unit="s")))
+        return pd.DataFrame(rows, columns=["Par", "TF", "Barras", "Desde", "Hasta"])
+
+def _secs(v):
+    if isinstance(v, (int, np.integer)): return int(v)
+    ts = pd.Timestamp(v)
+    if ts.tzinfo is not None: ts = ts.tz_convert("UTC").tz_localize(None)
+    return int(ts.value // 10**9)   # .value siempre en ns
+
+def resample(bars, tf):
+    """Agrega barras a tf (copia). Semanas desde el lunes 00:00 UTC; el resto, múltiplos de tf desde 00:00 UTC.
+    La última barra puede estar incompleta: cierra en t + TIMEFRAMES[tf]."""
+    step = TIMEFRAMES[tf]
+    anchor = 4 * 86_400 if tf == "W" else 0   # 1970-01-05 fue lunes
+    if not len(bars): return np.zeros(0, BAR)
+    key = (bars["t"] - anchor) // step
+    starts = np.flatnonzero(np.r_[True, key[1:] != key[:-1]])
+    out = np.empty(len(starts), BAR)
+    out["t"] = key[starts] * step + anchor
+    out["open"] = bars["open"][starts]
+    out["close"] = bars["close"][np.r_[starts[1:] - 1, len(bars) - 1]]
+    out["high"] = np.maximum.reduceat(bars["high"], starts)
+    out["low"] = np.minimum.reduceat(bars["low"], starts)
+    out["volume"] = np.add.reduceat(bars["volume"], starts)
+    return out
+
+def to_frame(bars):
+    """Barras -> DataFrame con Fecha (copia: para mostrar o exportar, no para cálculos en bloque)."""
+    df = pd.DataFrame(np.asarray(bars))
+    df.insert(0, "Fecha", pd.to_datetime(df.pop("t"), unit="s"))
+    return df
+
+store = OHLCStore()
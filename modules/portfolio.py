@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+from modules import analytics, equity
+from modules.schema import parse_dates
+
+# --- PORTAFOLIO (TODAS LAS CUENTAS DEL USUARIO) ---
+# Une los trades de cada cuenta en un solo frame (columna Cuenta) y saca de
+# una pasada: la tabla por cuenta (groupby), las estadísticas globales
+# (analytics.compute_stats) y la curva de equity conjunta en orden de fecha.
+# La carga en paralelo y la caché por versiones están en data.get_portfolio.
+_COLS = ["Fecha", "Par", "Status", "Resultado", "Dinero", "Confluencia"]
+
+def combine(accounts):
+    """accounts: {cuenta: (balance inicial, DataFrame de trades)} -> dict con tabla, totales y curva."""
+    names = list(accounts)
+    frames = [accounts[a][1][_COLS] for a in names]
+    df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=_COLS)
+    df["Cuenta"] = pd.Categorical.from_codes(np.repeat(np.arange(len(names)), [len(f) for f in frames]), categories=names)
+    # Orden temporal global (estable: dentro de una fecha se respeta el orden de cada journal)
+    df = df.iloc[np.argsort(parse_dates(df["Fecha"]).to_numpy(dtype="datetime64[ns]"), kind="stable")].reset_index(drop=True)
+
+    ini = pd.Series({a: float(accounts[a][0]) for a in names}, dtype=float)
+    d = pd.to_numeric(df["Dinero"], errors="coerce").fillna(0.0)
+    closed = df["Status"] == "CLOSED"
+    res = df["Resultado"].astype(object)
+    t = pd.DataFrame({"Cuenta": df["Cuenta"], "pnl": d, "closed": closed, "win": closed & (res == "WIN"),
+                      "gross_win": d.where(closed & (res == "WIN"), 0.0), "gross_loss": -d.where(closed & (res == "LOSS"), 0.0),
+                      "closed_pnl": d.where(closed, 0.0)})
+    g = t.groupby("Cuenta", observed=False).sum().reindex(names)
+    n = g["closed"].to_numpy()
+    table = pd.DataFrame({
+        "Balance inicial": ini, "Balance": ini + g["pnl"], "PnL": g["pnl"],
+        "PnL %": np.where(ini > 0, g["pnl"] / ini.where(ini > 0, 1) * 100, 0.0),
+        "Trades": n.astype(int),
+        "Win Rate %": np.divide(g["win"], n, out=np.zeros(len(n)), where=n > 0) * 100,
+        "Profit Factor": np.where(g["gross_loss"] > 0, g["gross_win"] / g["gross_loss"].where(g["gross_loss"] > 0, 1), g["gross_win"]),
+        "Expectancy": np.divide(g["closed_pnl"], n, out=np.zeros(len(n)), where=n > 0),
+    }, index=pd.Index(names, name="Cuenta"))
+    return {"table": table, "stats": analytics.compute_stats(df), "ini": float(ini.sum()),
+            "act": float(ini.sum() + d.sum()), "curve": equity.EquityCurve.from_frame(df, float(ini.sum()))}
@@ -0,0 +1,91 @@
+import os
+import json
+import atexit
+import threading
+from modules.cache import file_version
+from modules.locks import file_lock, atomic_write
+
+# --- REGISTRO EN MEMORIA (users.json / accounts_config.json) ---
+# El JSON vive en memoria del proceso como dict (búsqueda por usuario = hash).
+# Solo se relee si cambia la versión del fichero (otro worker escribió) y las
+# escrituras se agrupan y se vuelcan en segundo plano (write-behind).
+FLUSH_DELAY = 0.5
+_registries = []
+
+def _read(path):
+    if not os.path.exists(path): return {}
+    try:
+        with open(path, "r") as f: return json.load(f)
+    except: return {}
+
+def _assign(d, keys, value):
+    for k in keys[:-1]: d = d.setdefault(k, {})
+    d[keys[-1]] = value
+
+class JsonRegistry:
+    def __init__(self, path, flush_delay=FLUSH_DELAY):
+        self.path = path
+        self.flush_delay = flush_delay
+        self._lock = threading.Lock()
+        self._data, self._version = {}, None
+        self._pending = []  # (claves, valor) aún sin volcar
+        self._timer = None
+        _registries.append(self)
+
+    def _refresh(self):
+        ver = file_version(self.path)
+        if ver == self._version: return
+        data = _read(self.path)
+        for k, v in self._pending: _assign(data, k, v)
+        self._data, self._version = data, ver
+
+    def snapshot(self):
+        """Contenido actual (incluye escrituras pendientes). No mutar."""
+        with self._lock:
+            self._refresh()
+            return self._data
+
+    def get(self, *keys, default=None):
+        with self._lock:
+            self._refresh()
+            d = self._data
+            for k in keys:
+                if not isinstance(d, dict) or k not in d: return default
+                d = d[k]
+            return d
+
+    def set(self, keys, value):
+        """Escritura inmediata en memoria; el volcado a disco se agrupa."""
+        with self._lock:
+            self._refresh()
+            _assign(self._data, keys, value)
+            self._pending.append((keys, value))
+            if self._timer is None:
+                self._timer = threading.Timer(self.flush_delay, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self):
+        with self._lock:
+            if self._timer is not None: self._timer.cancel()
+            self._timer = None
+            pending, self._pending = self._pending, []
+        if not pending: return
+        try:
+            # Se reaplican las operaciones sobre lo que haya en disco: no se pisan otros workers
+            with file_lock(self.path):
+                disk = _read(self.path)
+                for k, v in pending: _assign(disk, k, v)
+                atomic_write(self.path, lambda f: json.dump(disk, f))
+                ver = file_version(self.path)
+        except Exception as e:
+            print(f"Error volcando {self.path}: {e}")
+            with self._lock: self._pending = pending + self._pending
+            return
+        with self._lock:
+            for k, v in self._pending: _assign(disk, k, v)
+            self._data, self._version = disk, ver
+
+@atexit.register
+def flush_all():
+    for r in _registries: r.flush()
@@ -0,0 +1,138 @@
+import calendar
+from datetime import date, timedelta
+import numpy as np
+import pandas as pd
+from modules.schema import parse_dates, num
+
+# --- ROLLUPS DIARIOS / SEMANALES (ISO) / MENSUALES ---
+# PnL, nº de trades cerrados y wins por día, semana ISO y mes. Se construye una
+# vez por versión del journal (groupby vectorizado) y después cada escritura
+# suma/resta la aportación del trade: todo son sumas, así que altas, cambios y
+# borrados son O(1). El calendario y el resumen semanal leen solo los días que
+# se ven en pantalla.
+_FIELDS = ("pnl", "trades", "closed", "wins")
+
+def _day(v):
+    try:
+        ts = pd.Timestamp(v)
+        return None if pd.isna(ts) else ts.date()
+    except: return None
+
+def _empty():
+    return {"pnl": 0.0, "trades": 0, "closed": 0, "wins": 0}
+
+def _buckets(keys, table):
+    """Tabla agregada -> {clave: bucket} con tipos de Python (tolist por columna, sin iterar filas)."""
+    return {k: dict(zip(_FIELDS, v)) for k, v in zip(keys, zip(*(table[f].tolist() for f in _FIELDS)))}
+
+def _with_rate(b):
+    b = dict(b or _empty())
+    b["win_rate"] = b["wins"] / b["closed"] * 100 if b["closed"] else 0.0
+    return b
+
+class RollupIndex:
+    def __init__(self):
+        self.days, self.weeks, self.months = {}, {}, {}  # date / (año ISO, semana) / (año, mes) -> bucket
+        self.weekdays = {}  # 0 = lunes ... 6 = domingo -> bucket
+
+    @classmethod
+    def from_frame(cls, df):
+        r = cls()
+        fechas = parse_dates(df["Fecha"])
+        ok = fechas.notna().to_numpy()
+        if not ok.any(): return r
+        closed = (df["Status"] == "CLOSED").to_numpy(dtype=bool)
+        daily = pd.DataFrame({
+            "day": fechas.dt.normalize().to_numpy()[ok],
+            "pnl": pd.to_numeric(df["Dinero"], errors="coerce").fillna(0.0).to_numpy(dtype=np.float64)[ok],
+            "trades": 1, "closed": closed[ok].astype(int),
+            "wins": (closed & (df["Resultado"] == "WIN").to_numpy(dtype=bool))[ok].astype(int),
+        }).groupby("day", sort=True).sum()
+        # Semanas y meses se agregan desde la tabla diaria (cientos de filas, no el journal)
+        iso = daily.index.isocalendar()
+        weekly = daily.groupby([iso["year"].to_numpy(), iso["week"].to_numpy()]).sum()
+        monthly = daily.groupby([daily.index.year, daily.index.month]).sum()
+        by_weekday = daily.groupby(daily.index.dayofweek).sum()
+        r.days = _buckets(daily.index.to_numpy().astype("datetime64[D]").astype(object), daily)
+        r.weeks = _buckets(zip(*(weekly.index.get_level_values(i).astype(int).tolist() for i in (0, 1))), weekly)
+        r.months = _buckets(zip(*(monthly.index.get_level_values(i).astype(int).tolist() for i in (0, 1))), monthly)
+        r.weekdays = _buckets(by_weekday.index.astype(int).tolist(), by_weekday)
+        return r
+
+    def copy(self):
+        """Copia para escribir (copy-on-write en data._live_commit): dicts nuevos, buckets compartidos."""
+        r = RollupIndex()
+        r.days, r.weeks, r.months, r.weekdays = dict(self.days), dict(self.weeks), dict(self.months), dict(self.weekdays)
+        return r
+
+    def _contrib(self, row, sign):
+        d = _day(row.get("Fecha"))
+        if d is None: return
+        closed = row.get("Status") == "CLOSED"
+        delta = {"pnl": sign * num(row.get("Dinero")), "trades": sign, "closed": sign * closed,
+                 "wins": sign * (closed and row.get("Resultado") == "WIN")}
+        y, w, _ = d.isocalendar()
+        for bucket, key in ((self.days, d), (self.weeks, (y, w)), (self.months, (d.year, d.month)), (self.weekdays, d.weekday())):
+            # Bucket nuevo en vez de sumar en sitio: los compartidos con la versión anterior no cambian
+            b = dict(bucket.get(key) or _empty())
+            for k, v in delta.items(): b[k] += v
+            if b["trades"] > 0: bucket[key] = b
+            else: bucket.pop(key, None)
+
+    # Mismo contrato que EquityCurve.apply_*: True = índice al día tras el paso
+    def apply_add(self, row):
+        self._contrib(row, 1); return True
+
+    def apply_update(self, old, new):
+        self._contrib(old, -1); self._contrib(new, 1); return True
+
+    def apply_delete(self, old):
+        self._contrib(old, -1); return True
+
+    @property
+    def nbytes(self):
+        return 400 * (len(self.days) + len(self.weeks) + len(self.months))
+
+    # --- Lecturas (O(días en pantalla)) ---
+    def day(self, d): return _with_rate(self.days.get(d))
+    def week(self, iso_year, week): return _with_rate(self.weeks.get((iso_year, week)))
+    def month(self, y, m): return _with_rate(self.months.get((y, m)))
+
+    def month_days(self, y, m):
+        """{día del mes: pnl} de los días con trades del mes (y, m)."""
+        out = {}
+        for day in range(1, calendar.monthrange(y, m)[1] + 1):
+            b = self.days.get(date(y, m, day))
+            if b: out[day] = b["pnl"]
+        return out
+
+    def month_weeks(self, y, m):
+        """Semanas ISO que tocan el mes, con su lunes y sus cifras completas (también los días fuera del mes)."""
+        first = date(y, m, 1)
+        monday = first - timedelta(days=first.weekday())
+        out = []
+        while monday.year < y or (monday.year == y and monday.month <= m):
+            iy, iw, _ = monday.isocalendar()
+            out.append(dict(self.week(iy, iw), iso_year=iy, week=iw, start=monday))
+            monday += timedelta(days=7)
+        return out
+
+    def active_months(self):
+        """Meses con trades, ordenados (navegación del calendario)."""
+        return sorted(self.months)
+
+    def active_years(self):
+        return sorted({y for y, _ in self.months})
+
+    def year_days(self, y):
+        """(fechas, pnl, trades) de cada día del año y; pnl NaN los días sin trades."""
+        start = date(y, 1, 1)
+        fechas = [start + timedelta(days=i) for i in range(366 if calendar.isleap(y) else 365)]
+        hits = [self.days.get(d) for d in fechas]
+        pnl = np.array([b["pnl"] if b else np.nan for b in hits])
+        trades = np.array([b["trades"] if b else 0 for b in hits])
+        return fechas, pnl, trades
+
+    def weekday_pnl(self):
+        """PnL acumulado por día de la semana (lunes..domingo)."""
+        return [self.weekdays.get(i, _empty())["pnl"] for i in range(7)]
@@ -0,0 +1,102 @@
+import threading
+import numpy as np
+import pandas as pd
+from modules import ohlc, indicators, checklist
+from modules.cache import file_version
+
+# --- CACHÉ DE INDICADORES POR PAR Y TEMPORALIDAD ---
+# Guarda, por (par, temporalidad), las señales de modules.indicators en la
+# última vela (snapshot) y la cola de EMA 50 / ATR necesaria para seguir:
+#   - al leer se comprueba la versión del fichero de velas (un stat); si no ha
+#     cambiado el snapshot sale de memoria (prefill del checklist en O(1));
+#   - si han llegado velas nuevas solo se calculan esas: la EMA / ATR siguen
+#     desde el último valor y las señales de ventana se sacan de las últimas
+#     _LOOKBACK velas;
+#   - si el fichero se reescribió por detrás (fusión de datos antiguos, lo
+#     marca la generación del almacén) se recalcula todo.
+# La última vela se trata como abierta (puede cambiar: vela en curso o semana
+# agregada a medias), así que nunca entra en el estado guardado.
+# Envolvente y SOS cuentan si aparecen en las últimas RECENT_BARS velas.
+RECENT_BARS = 3
+_LOOKBACK = max(indicators.AOI_BARS, indicators.STRUCT_BARS + indicators.PATTERN_BARS) + RECENT_BARS + 1
+_RECENT = ("engulfing", "sos")
+
+class IndicatorCache:
+    def __init__(self, store=None):
+        self.store = store or ohlc.store
+        self._data = {}   # (par, tf) -> estado
+        self._lock = threading.Lock()
+
+    def snapshot(self, symbol, tf):
+        """Señales de la última vela de symbol en tf (dict) o None si no hay velas suficientes."""
+        src = self.store.source(symbol, tf)
+        if src is None: return None
+        ver = file_version(self.store.path(symbol, src))
+        gen = (src, file_version(self.store.gen_path(symbol, src)))
+        with self._lock: st = self._data.get((symbol, tf))
+        if st is not None and st["ver"] == ver and st["gen"] == gen: return st["snap"]
+        # Reescritura (o cambio de temporalidad de origen): la EMA / ATR guardadas ya no valen
+        if st is not None and st["gen"] != gen: st = None
+        st = self._refresh(st, self.store.series(symbol, tf), symbol)
+        st["ver"], st["gen"] = ver, gen
+        with self._lock: self._data[(symbol, tf)] = st
+        return st["snap"]
+
+    def _refresh(self, st, bars, symbol):
+        final = len(bars) - 1   # velas cerradas (la última puede cambiar)
+        if final < indicators.EMA_LEN: return {"n": 0, "snap": None}
+        h, l, c = (np.asarray(bars[f], dtype=np.float64) for f in ("high", "low", "close"))
+        n = st["n"] if st else 0
+        if n and n <= final and bars["t"][n - 1] == st["t"] and c[n - 1] == st["close"]:
+            # Solo las velas nuevas: EMA / ATR continúan desde la última cerrada guardada
+            lo = n - len(st["ema"])
+            e = np.r_[st["ema"], indicators.ema(c[n:], seed=st["ema"][-1])]
+            a = np.r_[st["atr"], indicators.atr(h[n:], l[n:], c[n:], seed=st["atr"][-1], prev_close=c[n - 1])]
+        else:
+            lo, e, a = 0, indicators.ema(c), indicators.atr(h, l, c)
+        start = max(lo, len(bars) - _LOOKBACK)
+        f = indicators.features(bars[start:], symbol, e[start - lo:], a[start - lo:])
+        keep = max(lo, final - _LOOKBACK)
+        snap = {sig: int(f[sig][-1]) for sig in indicators.SIGNALS}
+        for sig in _RECENT:
+            hits = f[sig][-RECENT_BARS:]
+            snap[sig] = int(hits[np.flatnonzero(hits)[-1]]) if hits.any() else 0
+        snap.update(t=int(bars["t"][-1]), close=float(c[-1]), ema50=float(e[-1]), atr=float(a[-1]),
+                    ema_dist=float(abs(c[-1] - e[-1]) / a[-1]) if a[-1] > 0 else np.nan)
+        step = indicators.round_step(symbol)
+        snap["psych_level"] = float(np.round(c[-1] / step) * step) if np.isfinite(step) else np.nan
+        return {"n": final, "t": bars["t"][final - 1], "close": c[final - 1],
+                "ema": e[keep - lo:final - lo], "atr": a[keep - lo:final - lo], "snap": snap}
+
+    def prefill(self, mode, symbol):
+        """Valores para los widgets del checklist (clave -> bool / "Alcista" / "Bajista"); {} sin datos."""
+        snaps = {tf: self.snapshot(symbol, tf) for tf in checklist.timeframes(mode)}
+        if any(s is None for s in snaps.values()): return {}
+        direction = snaps[checklist.TRENDS[mode][-1][1]]["trend"] or 1
+        out = {key: "Alcista" if snaps[tf]["trend"] >= 0 else "Bajista" for key, tf in checklist.TRENDS[mode]}
+        out.update({key: snaps[tf][sig] == direction for key, tf, sig, _ in checklist.ITEMS[mode]})
+        return out
+
+    def rank(self, mode, symbols):
+        """Puntuación sugerida del checklist para cada par con datos, de mayor a menor."""
+        tfs = checklist.timeframes(mode)
+        rows = [(s, {tf: self.snapshot(s, tf) for tf in tfs}) for s in symbols]
+        rows = [(s, sn) for s, sn in rows if all(v is not None for v in sn.values())]
+        cols = ["Par", "Dirección", "Score", "Alineado", "Tendencias", "EMA 50 (ATR)", "Última vela"]
+        if not rows: return pd.DataFrame(columns=cols)
+        signals = {(tf, sig): np.array([sn[tf][sig] for _, sn in rows], np.int8) for tf in tfs for sig in indicators.SIGNALS}
+        last_tf = checklist.TRENDS[mode][-1][1]
+        direction = np.where(signals[(last_tf, "trend")] < 0, -1, 1).astype(np.int8)
+        exec_tf = checklist.EXEC_TF[mode]
+        df = pd.DataFrame({
+            "Par": [s for s, _ in rows],
+            "Dirección": np.where(direction > 0, "LONG 🟢", "SHORT 🔴"),
+            "Score": checklist.score(mode, signals, direction),
+            "Alineado": checklist.aligned(mode, signals),
+            "Tendencias": ["-".join("▲" if sn[tf]["trend"] >= 0 else "▼" for _, tf in checklist.TRENDS[mode]) for _, sn in rows],
+            "EMA 50 (ATR)": [sn[exec_tf]["ema_dist"] for _, sn in rows],
+            "Última vela": pd.to_datetime([sn[exec_tf]["t"] for _, sn in rows], unit="s"),
+        })
+        return df.sort_values(["Score", "Alineado"], ascending=False, kind="stable", ignore_index=True)
+
+scanner = IndicatorCache()
@@ -0,0 +1,77 @@
+import math
+import pandas as pd
+
+# --- ESQUEMA DEL DATAFRAME DE TRADES ---
+# Un único sitio con las columnas y sus tipos. Las columnas de baja
+# cardinalidad son categóricas (los filtros == / isin trabajan sobre códigos
+# enteros), Fecha es datetime64 y float32 solo donde no hay dinero en juego.
+SCHEMA = {
+    "ID": "object",
+    "Fecha": "datetime64[ns]",
+    "Par": "category",
+    "Direccion": "category",
+    "Status": "category",
+    "Resultado": "category",
+    "Dinero": "float64",
+    "Ratio": "float32",
+    "Notas": "object",
+    "Img_Antes": "object",
+    "Img_Despues": "object",
+    "Confluencia": "float32",
+    "Modo": "category",  # Swing / Scalping (checklist con el que se abrió)
+    # Niveles del trade (antes solo en el texto de Notas, ver excursion.levels)
+    "Entry": "float64",
+    "SL": "float64",
+    "TP": "float64",
+}
+TRADE_COLS = list(SCHEMA)
+NUMERIC_COLS = [c for c, t in SCHEMA.items() if t.startswith("float")]
+# En CSV/JSON todo lo no numérico se lee como texto y se tipa al final
+TEXT_COLS = [c for c in TRADE_COLS if c not in NUMERIC_COLS]
+# Texto libre (análisis IA incluido) y rutas: solo se cargan al abrir un trade
+DETAIL_COLS = ["Notas", "Img_Antes", "Img_Despues"]
+LIGHT_COLS = [c for c in TRADE_COLS if c not in DETAIL_COLS]
+
+def parse_dates(s):
+    """Fecha -> datetime64. Conviven "YYYY-MM-DD" (trades antiguos) y "YYYY-MM-DD HH:MM:SS"
+    (con hora); sin format, pandas infiere uno para toda la columna y el otro grupo sale NaT."""
+    return pd.to_datetime(s, errors="coerce", format="ISO8601")
+
+def num(v, default=0.0):
+    """Celda -> float (pasos incrementales fila a fila); default para None, NaN y texto."""
+    try:
+        v = float(v)
+        return default if math.isnan(v) else v
+    except (TypeError, ValueError): return default
+
+def _typed(s, t):
+    if t.startswith("datetime"): return parse_dates(s)
+    if t.startswith("float"): return pd.to_numeric(s, errors="coerce").astype(t)
+    if t == "category": return s.astype("category")
+    return s.astype(object)
+
+def apply_schema(df, columns=TRADE_COLS):
+    """Devuelve df con el esquema declarado para columns (faltan -> vacías). Columnas extra se conservan."""
+    cols = {}
+    for c in columns:
+        s = df[c] if c in df.columns else pd.Series(None, index=df.index, dtype=object)
+        cols[c] = _typed(s, SCHEMA[c])
+    for c in df.columns:
+        if c not in cols: cols[c] = df[c]
+    return pd.DataFrame(cols, index=df.index)
+
+def empty_frame(columns=TRADE_COLS):
+    return apply_schema(pd.DataFrame(columns=columns), columns)
+
+def memory_report(df):
+    """Bytes por columna con el esquema frente a los tipos por defecto (object / float64)."""
+    rows = []
+    for c in df.columns:
+        s = df[c]
+        base = s.astype("float64") if c in NUMERIC_COLS else s.astype(object)
+        rows.append({"col": c, "dtype": str(s.dtype), "bytes": int(s.memory_usage(deep=True, index=False)),
+                     "default_bytes": int(base.memory_usage(deep=True, index=False))})
+    rep = pd.DataFrame(rows).set_index("col")
+    rep.loc["TOTAL"] = ["", rep["bytes"].sum(), rep["default_bytes"].sum()]
+    rep["ratio"] = (rep["default_bytes"] / rep["bytes"].where(rep["bytes"] > 0)).round(1)
+    return rep
@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+from modules.schema import parse_dates
+
+# --- ÍNDICE DE BÚSQUEDA DEL HISTORIAL ---
+# Se construye una vez por versión del journal sobre el DataFrame en caché y
+# devuelve posiciones de fila (df.iloc), no copias:
+#   - par -> posiciones (postings); buscar "JPY" une las listas de los pares
+#     que lo contienen (decenas de claves, no 100k cadenas);
+#   - Resultado y Status -> bitmaps (np.packbits) que se combinan con OR/AND;
+#   - orden por Fecha (argsort estable) para rangos de fechas con searchsorted
+#     y para paginar sin ordenar en cada rerun.
+class SearchIndex:
+    def __init__(self, n=0):
+        self.n = n
+        self.pairs = {}      # par -> posiciones (int32, crecientes)
+        self.results = {}    # Resultado -> bitmap
+        self.status = {}     # Status -> bitmap
+        self.order = np.zeros(0, np.int32)                # posiciones ordenadas por Fecha (NaT al final)
+        self.dates = np.zeros(0, "datetime64[ns]")        # Fecha en ese orden
+        self.valid = 0                                    # filas con fecha (las primeras de order)
+
+    @classmethod
+    def from_frame(cls, df):
+        ix = cls(len(df))
+        if not ix.n: return ix
+        par = df["Par"] if isinstance(df["Par"].dtype, pd.CategoricalDtype) else df["Par"].astype("category")
+        codes = par.cat.codes.to_numpy()
+        by_code = np.argsort(codes, kind="stable").astype(np.int32)
+        bounds = np.searchsorted(codes[by_code], np.arange(len(par.cat.categories) + 1))
+        ix.pairs = {str(c): by_code[bounds[i]:bounds[i + 1]] for i, c in enumerate(par.cat.categories) if bounds[i + 1] > bounds[i]}
+        for attr, col in (("results", "Resultado"), ("status", "Status")):
+            vals = df[col].astype(object).to_numpy()
+            setattr(ix, attr, {str(v): np.packbits(vals == v) for v in pd.unique(vals) if isinstance(v, str)})
+        fechas = parse_dates(df["Fecha"]).to_numpy(dtype="datetime64[ns]")
+        ix.order = np.argsort(fechas, kind="stable").astype(np.int32)   # NumPy deja NaT al final
+        ix.dates = fechas[ix.order]
+        ix.valid = int((~np.isnat(fechas)).sum())
+        return ix
+
+    @property
+    def nbytes(self):
+        maps = list(self.results.values()) + list(self.status.values()) + list(self.pairs.values())
+        return self.order.nbytes + self.dates.nbytes + sum(a.nbytes for a in maps)
+
+    def _any(self, table, keys):
+        """OR de los bitmaps de keys (bitmap vacío si ninguna existe)."""
+        out = np.zeros((self.n + 7) // 8, np.uint8)
+        for k in keys:
+            if k in table: out |= table[k]
+        return out
+
+    def pair_keys(self, text):
+        return [p for p in self.pairs if text.upper() in p.upper()]
+
+    def query(self, pair=None, results=None, status=None, date_from=None, date_to=None, newest_first=True):
+        """Posiciones de las filas que cumplen todos los filtros, ordenadas por fecha."""
+        if not self.n: return self.order
+        bits = None
+        if pair:
+            hit = np.zeros(self.n, bool)
+            for p in self.pair_keys(pair): hit[self.pairs[p]] = True
+            bits = np.packbits(hit)
+        for table, keys in ((self.results, results), (self.status, status)):
+            if keys:
+                m = self._any(table, keys)
+                bits = m if bits is None else bits & m
+        # Rango de fechas (inclusive, por día) sobre el orden precalculado
+        lo = np.searchsorted(self.dates, np.datetime64(pd.Timestamp(date_from).normalize(), "ns")) if date_from is not None else 0
+        hi = np.searchsorted(self.dates[:self.valid], np.datetime64(pd.Timestamp(date_to).normalize() + pd.Timedelta(days=1), "ns")) \
+            if date_to is not None else self.valid if date_from is not None else self.n
+        idx = np.arange(lo, hi) if bits is None else lo + np.flatnonzero(np.unpackbits(bits, count=self.n).view(bool)[self.order[lo:hi]])
+        pos = self.order[idx]
+        if not newest_first: return pos
+        nv = np.searchsorted(idx, self.valid)   # las filas sin fecha van al final en los dos sentidos
+        return np.concatenate((pos[:nv][::-1], pos[nv:]))
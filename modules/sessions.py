@@ -0,0 +1,90 @@
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+import pytz
+from modules.schema import parse_dates
+
+# --- SESIONES DE MERCADO ---
+# Todo el horario está en hora de Nueva York (como el reloj del sidebar):
+# Asia 17:00-3:00, Londres 3:00-8:00, solape NY/Londres 8:00-12:00 y NY
+# 12:00-17:00. Zona prime: 23:00-11:00 de lunes a jueves; el viernes hasta las
+# 11:00 es aviso y después cerrado, igual que el fin de semana.
+# El cambio de horario de NY se resuelve una vez por año (instantes UTC en los
+# que cambia el offset): pasar miles de fechas UTC a hora de NY es un
+# searchsorted más una suma, sin pytz por fila.
+NY = pytz.timezone("America/New_York")
+SESSIONS = ["ASIA", "LONDRES", "NY/LONDRES", "NY"]
+ZONES = ["PRIME", "VIERNES", "FUERA", "CERRADO", "SIN HORA"]
+SESSION_LABELS = {"ASIA": "ASIA 🇯🇵", "LONDRES": "LONDRES 🇬🇧", "NY/LONDRES": "NY / LONDRES 🇺🇸🇬🇧", "NY": "NUEVA YORK 🇺🇸"}
+ZONE_LABELS = {"PRIME": ("✅ ZONA PRIME", "#10b981"), "VIERNES": ("⚠️ VIERNES", "#fbbf24"),
+               "FUERA": ("⛔ FUERA DE SESIÓN", "#ef4444"), "CERRADO": ("CERRADO ❌", "#ef4444")}
+# Sesión por hora de NY (los límites caen en horas en punto)
+SESSION_BY_HOUR = np.array([0] * 3 + [1] * 5 + [2] * 4 + [3] * 5 + [0] * 7, dtype=np.int8)
+PRIME_FROM, PRIME_TO, FRIDAY_CLOSE = 23 * 60, 11 * 60, 11 * 60   # minutos desde medianoche NY
+_DAY_NS, _MIN_NS = 86_400 * 10**9, 60 * 10**9
+
+@lru_cache(maxsize=None)
+def year_schedule(y):
+    """(instantes UTC en ns, offset NY en ns vigente desde cada instante) que cubren el año y."""
+    utc = pd.date_range(f"{y - 1}-12-31", f"{y + 1}-01-02", freq="h", tz="UTC").as_unit("ns")
+    off = utc.tz_convert(NY).tz_localize(None).asi8 - utc.tz_localize(None).asi8
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(off)) + 1))
+    return utc.asi8[starts], off[starts]
+
+def schedule(years):
+    parts = [year_schedule(int(y)) for y in sorted(set(years))]
+    at, off = np.concatenate([p[0] for p in parts]), np.concatenate([p[1] for p in parts])
+    keep = np.concatenate(([True], np.diff(off) != 0))   # los años vecinos se solapan un día
+    return at[keep], off[keep]
+
+def to_ny(utc_ns):
+    """Hora local de NY (ns desde epoch, sin zona) de instantes UTC en ns."""
+    utc_ns = np.asarray(utc_ns, dtype=np.int64)
+    if not len(utc_ns): return utc_ns
+    lo, hi = (int(v) + 1970 for v in np.array([utc_ns.min(), utc_ns.max()]).astype("datetime64[ns]").astype("datetime64[Y]").astype(int))
+    at, off = schedule(range(lo, hi + 1))
+    return utc_ns + off[np.maximum(np.searchsorted(at, utc_ns, side="right") - 1, 0)]
+
+def classify(ny_ns):
+    """Códigos de sesión (índice de SESSIONS) y de zona (índice de ZONES) de horas locales de NY."""
+    ny_ns = np.asarray(ny_ns, dtype=np.int64)
+    mins = (ny_ns % _DAY_NS) // _MIN_NS
+    wd = (ny_ns // _DAY_NS + 3) % 7   # 1970-01-01 fue jueves; 0 = lunes
+    zone = np.where(wd >= 5, 3, np.where(wd == 4, np.where(mins < FRIDAY_CLOSE, 1, 3),
+                    np.where((mins >= PRIME_FROM) | (mins < PRIME_TO), 0, 2)))
+    return SESSION_BY_HOUR[mins // 60], zone
+
+def tag_frame(df):
+    """Sesión y zona de cada trade (columnas categóricas, mismo índice que df).
+    Fecha se guarda en UTC; las filas con solo fecha (hora 00:00:00, anteriores a
+    guardar la hora) o sin fecha quedan como "SIN HORA"."""
+    fechas = parse_dates(df["Fecha"])
+    ns = fechas.to_numpy(dtype="datetime64[ns]").astype(np.int64)
+    timed = fechas.notna().to_numpy() & (ns % _DAY_NS != 0)
+    ses, zone = np.full(len(df), -1), np.full(len(df), ZONES.index("SIN HORA"))
+    if timed.any(): ses[timed], zone[timed] = classify(to_ny(ns[timed]))
+    return pd.DataFrame({"Sesion": pd.Categorical.from_codes(ses, categories=SESSIONS),
+                         "Zona": pd.Categorical.from_codes(zone, categories=ZONES)}, index=df.index)
+
+def breakdown(df):
+    """PnL de los trades cerrados por sesión y por zona: {"session": tabla, "zone": tabla}."""
+    closed = df[df["Status"] == "CLOSED"]
+    tags = tag_frame(closed)
+    t = pd.DataFrame({"Sesion": tags["Sesion"].cat.add_categories("SIN HORA").fillna("SIN HORA"), "Zona": tags["Zona"],
+                      "pnl": pd.to_numeric(closed["Dinero"], errors="coerce").fillna(0.0).to_numpy(dtype=np.float64),
+                      "wins": (closed["Resultado"] == "WIN").to_numpy(dtype=int)})
+    out = {}
+    for name, col in (("session", "Sesion"), ("zone", "Zona")):
+        g = t.groupby(col, observed=True).agg(trades=("pnl", "size"), wins=("wins", "sum"), pnl=("pnl", "sum"))
+        g["win_rate"] = g["wins"] / g["trades"] * 100
+        g["expectancy"] = g["pnl"] / g["trades"]
+        out[name] = g.drop(columns="wins")
+    return out
+
+def status_at(now_utc=None):
+    """(hora NY, sesión, zona) del instante dado (por defecto, ahora)."""
+    ts = pd.Timestamp.now(tz="UTC") if now_utc is None else pd.Timestamp(now_utc)
+    ts = (ts.tz_localize("UTC") if ts.tzinfo is None else ts.tz_convert("UTC")).as_unit("ns")
+    ny = int(to_ny([ts.value])[0])
+    ses, zone = classify([ny])
+    return pd.Timestamp(ny), SESSIONS[int(ses[0])], ZONES[int(zone[0])]
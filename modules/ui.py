@@ -1,11 +1,12 @@
 import streamlit as st
-from datetime import datetime
+from datetime import datetime, timezone
 from PIL import Image
 import random
 import string
-from modules.data import save_trade, OFFICIAL_PAIRS, delete_trade, get_user_config, save_user_config
+from modules.data import save_trade, OFFICIAL_PAIRS, delete_trade, get_user_config, save_user_config, get_trade_details
 from modules.ai import analyze_multiframe, save_image_locally
 from modules.utils import send_telegram_alert, check_telegram_connection
+from modules.instruments import size_position
 import pandas as pd
 
 # --- MODAL: CONFIGURACIÓN MÁGICA (ACTUALIZADO CON USERNAME) ---
@@ -77,15 +78,11 @@ def modal_new_trade(user, account, global_mode, prefilled_pair, confluence_score
     with p2: sl_price = st.number_input("Stop Loss", format="%.5f", value=1.07900)
     with p3: tp_price = st.number_input("Take Profit", format="%.5f", value=1.08250)
 
-    lot_size = 0.0; risk_usd = bal*(risk_pct/100); pips = 0.0
-    if entry_price > 0 and sl_price > 0 and entry_price != sl_price:
-        if "JPY" in par: mult=100
-        elif "XAU" in par: mult=10 
-        else: mult=10000
-        pips = abs(entry_price-sl_price)*mult
-        if pips>0: lot_size = risk_usd/(pips*(9 if "JPY" in par else 100 if "XAU" in par else 10))
+    # Pip, contrato y valor del pip por instrumento (modules.instruments)
+    sz = size_position(par, entry_price, sl_price, risk_pct, bal)
+    lot_size, risk_usd, pips = sz["lots"], sz["risk_usd"], sz["pips"]
 
-    st.markdown(f"""<div style="background-color:#0f172a; border:1px solid #334155; border-radius:10px; padding:15px; margin-top:10px; display:flex; justify-content:space-between;"><div><div style="color:#94a3b8; font-size:0.8rem;">LOTAJE SUGERIDO</div><div style="font-size:2rem; font-weight:900; color:#10b981;">{lot_size:.2f}</div></div><div style="text-align:right;"><div style="color:#e2e8f0;">Riesgo: ${risk_usd:.0f}</div><div style="color:#64748b; font-size:0.8rem;">{pips:.1f} pips</div></div></div><br>""", unsafe_allow_html=True)
+    st.markdown(f"""<div style="background-color:#0f172a; border:1px solid #334155; border-radius:10px; padding:15px; margin-top:10px; display:flex; justify-content:space-between;"><div><div style="color:#94a3b8; font-size:0.8rem;">LOTAJE SUGERIDO</div><div style="font-size:2rem; font-weight:900; color:#10b981;">{lot_size:.2f}</div></div><div style="text-align:right;"><div style="color:#e2e8f0;">Riesgo: ${risk_usd:.0f}</div><div style="color:#64748b; font-size:0.8rem;">{pips:.1f} pips · ${sz['pip_value']:.2f}/pip</div></div></div><br>""", unsafe_allow_html=True)
 
     notes = st.text_area("Notas", placeholder="Plan...", height=100)
     img_file = st.file_uploader("Gráfico (Antes)", type=['png', 'jpg'])
@@ -106,7 +103,8 @@ def modal_new_trade(user, account, global_mode, prefilled_pair, confluence_score
         full_notes = f"Entry: {entry_price} | SL: {sl_price} | TP: {tp_price}\n{notes}"
         if 'temp_ai' in st.session_state: full_notes += f"\n\n[IA]: {st.session_state['temp_ai']}"
 
-        trade_data = {"Fecha": str(datetime.now().date()), "Par": par, "Direccion": direction, "Status": "OPEN", "Resultado": "PENDING", "Dinero": 0.0, "Ratio": 0.0, "Notas": full_notes, "Img_Antes": img_path, "Img_Despues": None, "Confluencia": confluence_score}
+        # Fecha con hora en UTC (la sesión del trade se deduce de ella, ver sessions.tag_frame)
+        trade_data = {"Fecha": datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S"), "Par": par, "Direccion": direction, "Status": "OPEN", "Resultado": "PENDING", "Dinero": 0.0, "Ratio": 0.0, "Notas": full_notes, "Img_Antes": img_path, "Img_Despues": None, "Confluencia": confluence_score, "Modo": global_mode.split()[0], "Entry": entry_price, "SL": sl_price, "TP": tp_price}
         save_trade(user, account, trade_data)
         
         user_config = get_user_config(user); u_chat = user_config.get("telegram_chat_id")
@@ -119,18 +117,25 @@ def modal_new_trade(user, account, global_mode, prefilled_pair, confluence_score
 
 # --- MODAL UPDATE (IGUAL) ---
 @st.dialog("📝 GESTIONAR")
-def modal_update_trade(user, account, idx, data):
+def modal_update_trade(user, account, trade_id, data):
     st.markdown(f"**{data['Par']}** | {data['Direccion']}")
+    det = get_trade_details(user, account, trade_id)  # Notas e imágenes solo de este trade
+    if det['Notas'] or det['Img_Antes']:
+        with st.expander("📝 Notas / Análisis"):
+            if det['Img_Antes']:
+                try: st.image(det['Img_Antes'], width=300)
+                except: pass
+            if det['Notas']: st.markdown(det['Notas'])
     c1, c2 = st.columns(2)
     with c1: res = st.selectbox("Resultado", ["WIN", "LOSS", "BE"], index=0)
     with c2: pnl = st.number_input("PnL ($)", value=0.0)
     img = st.file_uploader("Foto Cierre", type=['png', 'jpg'])
-    if st.button("🗑️ Borrar"): delete_trade(user, account, idx); st.rerun()
+    if st.button("🗑️ Borrar"): delete_trade(user, account, trade_id); st.rerun()
     if st.button("✅ Actualizar", type="primary"):
-        path = data.get('Img_Despues')
+        path = det['Img_Despues']
         if img:
             io = Image.open(img); fn = f"{data['Par']}_after.png"
             path = save_image_locally(io, fn)
         fpnl = abs(pnl) if res=="WIN" else -abs(pnl) if res=="LOSS" else 0.0
-        save_trade(user, account, {"Status": "CLOSED", "Resultado": res, "Dinero": fpnl, "Img_Despues": path}, index=idx)
+        save_trade(user, account, {"Status": "CLOSED", "Resultado": res, "Dinero": fpnl, "Img_Despues": path}, trade_id=trade_id)
         st.rerun()
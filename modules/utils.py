@@ -1,9 +1,14 @@
-import pandas as pd
 import calendar
-import pytz
+import json
 import streamlit as st
-from datetime import datetime, time
+from datetime import datetime
 import requests
+import plotly.graph_objects as go
+import plotly.io as pio
+from plotly.subplots import make_subplots
+import numpy as np
+from modules.cache import VersionedLRU
+from modules import sessions
 
 # --- FUNCIÓN: ENVIAR ALERTA (USANDO TOKEN GLOBAL) ---
 def send_telegram_alert(trade_data, image_path=None, user_chat_id=None):
@@ -66,32 +71,23 @@ def check_telegram_connection(search_code):
     except:
         return None
 
-# --- LÓGICA HORARIO & RELOJ (IGUAL) ---
+# --- LÓGICA HORARIO & RELOJ ---
+# Las reglas de sesión viven en modules.sessions; el reloj JS recibe ya
+# calculados los cambios de horario de NY y la tabla de sesiones por hora.
 def get_market_status():
     try:
-        tz_ny = pytz.timezone('America/New_York')
-        now_ny = datetime.now(tz_ny)
-        curr_t = now_ny.time()
-        in_zone = (curr_t >= time(23, 0)) or (curr_t <= time(11, 0))
-        wd = now_ny.weekday()
-        
-        session_display = "ASIA 🇯🇵"
-        if time(3, 0) <= curr_t < time(8, 0): session_display = "LONDRES 🇬🇧"
-        elif time(8, 0) <= curr_t < time(12, 0): session_display = "NY / LONDRES 🇺🇸🇬🇧"
-        elif time(12, 0) <= curr_t < time(17, 0): session_display = "NUEVA YORK 🇺🇸"
-        
-        status = "ESPERAR 💤"; color = "#94a3b8"
-        if wd >= 5: status = "CERRADO ❌"; color = "#ef4444"
-        elif wd == 4:
-            if curr_t < time(11, 0): status = "⚠️ VIERNES"; color = "#fbbf24"
-            else: status = "CERRADO"; color = "#ef4444"
-        elif in_zone: status = "✅ ZONA PRIME"; color = "#10b981"
-        else: status = "⛔ FUERA DE SESIÓN"; color = "#ef4444"
-
-        return now_ny.strftime("%I:%M %p"), session_display, status, color
+        now_ny, ses, zone = sessions.status_at()
+        status, color = sessions.ZONE_LABELS[zone]
+        return now_ny.strftime("%I:%M %p"), sessions.SESSION_LABELS[ses], status, color
     except: return "--:--", "Error", "Error", "#333"
 
 def get_live_clock_html():
+    y = datetime.now().year
+    at, off = sessions.schedule([y, y + 1])
+    cfg = json.dumps({"at": (at // 10**6).tolist(), "off": (off // 10**6).tolist(),
+                      "ses": [sessions.SESSION_LABELS[s] for s in sessions.SESSIONS], "byHour": sessions.SESSION_BY_HOUR.tolist(),
+                      "zones": {k: v[0] for k, v in sessions.ZONE_LABELS.items()},
+                      "primeFrom": sessions.PRIME_FROM, "primeTo": sessions.PRIME_TO, "fridayClose": sessions.FRIDAY_CLOSE})
     return """
     <!DOCTYPE html>
     <html>
@@ -113,37 +109,35 @@ def get_live_clock_html():
     </style>
     </head>
     <body>
-        <div class="clock-container"><div class="label">HORA NY (EST)</div><div class="time" id="time">--:--:--</div><div class="status-badge stop" id="status">...</div></div>
+        <div class="clock-container"><div class="label" id="label">HORA NY</div><div class="time" id="time">--:--:--</div><div class="status-badge stop" id="status">...</div></div>
         <script>
+            const CFG = __CFG__;
             function updateClock() {
-                const now = new Date();
-                const options = { timeZone: 'America/New_York', hour12: true, hour: 'numeric', minute: '2-digit', second: '2-digit' };
-                document.getElementById('time').innerText = now.toLocaleTimeString('en-US', options);
-                const nyDate = new Date(now.toLocaleString('en-US', { timeZone: 'America/New_York' }));
-                const h = nyDate.getHours(); const d = nyDate.getDay();
-                const inZone = (h >= 23) || (h < 11);
-                let s = "FUERA DE SESIÓN", c = "stop";
-                if (d===0||d===6) { s="CERRADO ❌"; }
-                else if (d===5) { s = h<11 ? "⚠️ VIERNES" : "CERRADO"; c = h<11 ? "warn" : "stop"; }
-                else if (inZone) { s="✅ ZONA PRIME"; c="go"; }
-                const el = document.getElementById('status'); el.innerText = s; el.className = "status-badge " + c;
+                const now = Date.now();
+                let i = 0; while (i + 1 < CFG.at.length && CFG.at[i + 1] <= now) i++;
+                const ny = new Date(now + CFG.off[i]);   // campos UTC = hora local de NY
+                const h = ny.getUTCHours(), m = ny.getUTCMinutes(), sec = ny.getUTCSeconds(), d = (ny.getUTCDay() + 6) % 7;
+                const pad = (v) => String(v).padStart(2, '0');
+                document.getElementById('time').innerText = `${(h % 12) || 12}:${pad(m)}:${pad(sec)} ${h < 12 ? 'AM' : 'PM'}`;
+                document.getElementById('label').innerText = `HORA NY · ${CFG.ses[CFG.byHour[h]]}`;
+                const mins = h * 60 + m;
+                let z = "FUERA", c = "stop";
+                if (d >= 5) z = "CERRADO";
+                else if (d === 4) { z = mins < CFG.fridayClose ? "VIERNES" : "CERRADO"; c = mins < CFG.fridayClose ? "warn" : "stop"; }
+                else if (mins >= CFG.primeFrom || mins < CFG.primeTo) { z = "PRIME"; c = "go"; }
+                const el = document.getElementById('status'); el.innerText = CFG.zones[z]; el.className = "status-badge " + c;
             }
             setInterval(updateClock, 1000); updateClock();
         </script>
     </body>
     </html>
-    """
+    """.replace("__CFG__", cfg)
 
-def render_cal_html(df, is_dark):
-    # (Mantener código calendario)
+def render_cal_html(rollup, is_dark):
+    """Calendario del mes en sesión; el PnL por día sale del índice de rollups (ver data.get_rollups)."""
     d = st.session_state.get('cal_date', datetime.now())
     y, m = d.year, d.month
-    data = {}
-    if not df.empty:
-        try:
-            df['Fecha'] = pd.to_datetime(df['Fecha'])
-            data = df[(df['Fecha'].dt.year==y) & (df['Fecha'].dt.month==m)].groupby(df['Fecha'].dt.day)['Dinero'].sum().to_dict()
-        except: pass
+    data = rollup.month_days(y, m)
     cal = calendar.Calendar(firstweekday=0)
     html = '<div style="display:grid; grid-template-columns:repeat(7, 1fr); gap:5px; margin-top:10px;">'
     for h in ["L","M","M","J","V","S","D"]: html += f'<div style="text-align:center; color:#64748b; font-size:0.65rem;">{h}</div>'
@@ -157,4 +151,70 @@ def render_cal_html(df, is_dark):
                 html+=f'<div style="background:{bg}; border:1px solid {col if val!=0 else "#2a3655"}; border-radius:4px; height:40px; font-size:0.7rem; padding:2px;">{day}</div>'
     return html+'</div>', y, m
 
+def render_equity_fig(curve, is_dark):
+    """Equity y drawdown (serie ya reducida con EquityCurve.plot_frame)."""
+    fig = make_subplots(rows=2, cols=1, shared_xaxes=True, row_heights=[0.7, 0.3], vertical_spacing=0.04)
+    fig.add_trace(go.Scatter(x=curve["Fecha"], y=curve["equity"], mode="lines", name="Equity", line=dict(color="#3b82f6", width=2),
+                             customdata=curve["Trade"], hovertemplate="#%{customdata} · %{x|%Y-%m-%d}<br>$%{y:,.2f}<extra></extra>"), row=1, col=1)
+    fig.add_trace(go.Scatter(x=curve["Fecha"], y=curve["peak"], mode="lines", name="Pico", line=dict(color="#64748b", width=1, dash="dot"),
+                             hoverinfo="skip"), row=1, col=1)
+    fig.add_trace(go.Scatter(x=curve["Fecha"], y=curve["dd_pct"], mode="lines", name="Drawdown", fill="tozeroy",
+                             line=dict(color="#ef4444", width=1), fillcolor="rgba(239,68,68,0.25)",
+                             customdata=curve["dd"], hovertemplate="%{y:.2f}% · $%{customdata:,.2f}<extra></extra>"), row=2, col=1)
+    fig.update_layout(height=420, margin=dict(l=10, r=10, t=10, b=10), showlegend=False, hovermode="x unified",
+                      template="plotly_dark" if is_dark else "plotly_white", paper_bgcolor="rgba(0,0,0,0)", plot_bgcolor="rgba(0,0,0,0)")
+    fig.update_yaxes(tickprefix="$", row=1, col=1); fig.update_yaxes(ticksuffix="%", row=2, col=1)
+    return fig
+
+# --- FRAGMENTOS RENDERIZADOS (calendario, heatmaps) ---
+# HTML y figuras ya construidos, compartidos entre reruns y sesiones del mismo
+# proceso. Clave (usuario, cuenta, vista, periodo) y versión del journal: pasar
+# de mes o de año reutiliza lo ya pintado mientras no cambien los trades.
+# Las figuras se guardan como JSON (inmutable, tamaño real) y cada render recibe
+# una go.Figure nueva: nadie modifica la que ven las demás sesiones.
+_fragments = VersionedLRU(max_bytes=64 * 1024 * 1024, sizeof=lambda v: len(v) if isinstance(v, str) else len(v[1]))
+
+def _frozen(val):
+    return ("fig", val.to_json()) if isinstance(val, go.Figure) else val
+
+def cached_fragment(key, version, build):
+    val = _fragments.get_or_load(key, version, lambda: _frozen(build()))
+    return pio.from_json(val[1]) if isinstance(val, tuple) else val
+
+_WEEKDAYS = ["Lun", "Mar", "Mié", "Jue", "Vie", "Sáb", "Dom"]
+_PNL_SCALE = [[0, "#ef4444"], [0.5, "#1e293b"], [1, "#10b981"]]
+
+def _fig_layout(fig, is_dark, **kw):
+    fig.update_layout(template="plotly_dark" if is_dark else "plotly_white", paper_bgcolor="rgba(0,0,0,0)", plot_bgcolor="rgba(0,0,0,0)",
+                      font=dict(color='#94a3b8' if is_dark else '#0f172a'), margin=dict(l=10, r=10, t=30, b=10), **kw)
+    return fig
+
+def render_year_heatmap(rollup, years, is_dark):
+    """PnL diario de varios años (una fila de semanas por año), escala de color común centrada en 0."""
+    fig = make_subplots(rows=len(years), cols=1, subplot_titles=[str(y) for y in years], vertical_spacing=0.25 / max(len(years), 1))
+    grids = []
+    for y in years:
+        fechas, pnl, trades = rollup.year_days(y)
+        i = np.arange(len(fechas)) + fechas[0].weekday()
+        wd, col = i % 7, i // 7
+        z = np.full((7, col[-1] + 1), np.nan); z[wd, col] = pnl
+        info = np.full(z.shape, "", dtype=object)
+        info[wd, col] = [f"{d:%a %d %b %Y} · {t} trades" for d, t in zip(fechas, trades)]
+        month_cols = [int(col[k]) for k, f in enumerate(fechas) if f.day == 1]
+        grids.append((z, info, month_cols))
+    lim = max([np.nanmax(np.abs(z)) for z, _, _ in grids if not np.isnan(z).all()] or [1])
+    for r, (z, info, month_cols) in enumerate(grids, 1):
+        fig.add_trace(go.Heatmap(z=z, y=_WEEKDAYS, customdata=info, zmin=-lim, zmax=lim, colorscale=_PNL_SCALE, showscale=False, xgap=2, ygap=2,
+                                 hovertemplate="%{customdata}<br>$%{z:,.2f}<extra></extra>"), row=r, col=1)
+        fig.update_xaxes(tickvals=month_cols, ticktext=[calendar.month_abbr[m] for m in range(1, 13)], showgrid=False, row=r, col=1)
+        fig.update_yaxes(autorange="reversed", showgrid=False, row=r, col=1)
+    return _fig_layout(fig, is_dark, height=170 * len(years) + 40)
+
+def render_weekday_bars(rollup, is_dark):
+    """PnL por día de la semana (el antiguo render_heatmap), desde el índice de rollups."""
+    vals = rollup.weekday_pnl()
+    fig = go.Figure(go.Bar(x=_WEEKDAYS, y=vals, marker_color=["#10b981" if v >= 0 else "#ef4444" for v in vals],
+                           hovertemplate="%{x}: $%{y:,.2f}<extra></extra>"))
+    return _fig_layout(fig, is_dark, title="PnL por Día", height=300)
+
 def mostrar_imagen(n, c): return None
@@ -0,0 +1,22 @@
+import numpy as np
+from modules.instruments import size_position, size_positions
+
+
+def test_scalar_symbol_with_price_arrays():
+    entries = np.array([1.1000, 1.2000, 1.3000])
+    out = size_positions("EURUSD", entries, entries - 0.0020, 1.0, 10_000)
+    assert out["lots"].shape == (3,)
+    np.testing.assert_allclose(out["pips"], 20)
+    np.testing.assert_allclose(out["lots"], 0.5)
+    single = size_position("EURUSD", 1.2000, 1.1980, 1.0, 10_000)
+    assert out["lots"][1] == single["lots"]
+
+
+def test_symbol_column_against_price_row():
+    # (2, 1) símbolos x (3,) precios -> (2, 3) escenarios, con la tabla de cada símbolo por fila
+    symbols = np.array([["EURUSD"], ["USDJPY"]], dtype=object)
+    entries = np.array([1.0, 2.0, 3.0])
+    out = size_positions(symbols, entries, entries * 0.99, 1.0, 10_000)
+    assert out["lots"].shape == (2, 3)
+    np.testing.assert_allclose(out["pips"][0], entries * 0.01 / 0.0001)
+    np.testing.assert_allclose(out["pips"][1], entries * 0.01 / 0.01)